@@ -0,0 +1,78 @@
+import logging
+import os
+import sys
+
+from elasticsearch import Elasticsearch
+from elasticsearch.helpers import scan
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from build_field_profiles import read_generation  # noqa: E402
+from load_asset_data_to_es import DATA_FILE_PATH, generate_bulk_actions  # noqa: E402
+
+from twenty_one_tech_pocs.equipment_entry_app.vector_store.equipment_entry import EquipmentEntryIndex  # noqa: E402
+from twenty_one_tech_pocs.equipment_entry_app.vector_store.snapshot import (  # noqa: E402
+    build_snapshot,
+    snapshot_root,
+)
+
+# --- Configuration ---
+# Run after load_asset_data_to_es.py; "es" reads the loaded index, "json" the loader's data file
+SNAPSHOT_SOURCE = os.getenv("SNAPSHOT_SOURCE", "es").lower()
+ELASTICSEARCH_HOST = os.getenv("ES_HOST", "http://localhost:9201")
+INDEX_NAME = "assets_index"
+SNAPSHOT_PATH = snapshot_root()  # ASSET_SNAPSHOT_PATH, data/asset_snapshot by default
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def documents_from_index(client: Elasticsearch, index: str):
+    """(document id, _source) of every asset of the index, with the fields the snapshot keeps."""
+    source = sorted(set(EquipmentEntryIndex.label_mapping.values()) | {EquipmentEntryIndex.last_seen_field})
+    for count, hit in enumerate(
+        scan(client, index=index, query={"query": {"match_all": {}}, "_source": source}, size=1000), start=1
+    ):
+        if count % 50000 == 0:
+            logging.info(f"{count} assets scanned.")
+        yield hit["_id"], hit.get("_source", {})
+
+
+def documents_from_file(filepath: str):
+    """(document id, _source) of the assets of the data file, as the loader indexes them."""
+    for action in generate_bulk_actions(filepath, INDEX_NAME):
+        yield action["_id"], action["_source"]
+
+
+# --- Main Execution ---
+if __name__ == "__main__":
+    logging.info("Script started.")
+
+    try:
+        if SNAPSHOT_SOURCE == "json":
+            logging.info(f"Building the asset snapshot from '{DATA_FILE_PATH}'")
+            build_snapshot(documents_from_file(DATA_FILE_PATH), SNAPSHOT_PATH)
+        else:
+            logging.info(f"Connecting to Elasticsearch at {ELASTICSEARCH_HOST}")
+            es_client = Elasticsearch(
+                hosts=[ELASTICSEARCH_HOST],
+                verify_certs=False,  # Set to True if using HTTPS with valid certs
+                ssl_show_warn=False  # Suppress SSL warnings if verify_certs=False
+            )
+            if not es_client.ping():
+                raise ConnectionError(
+                    f"Could not connect to Elasticsearch at {ELASTICSEARCH_HOST}")
+            logging.info(f"Building the asset snapshot from index '{INDEX_NAME}'")
+            build_snapshot(
+                documents_from_index(es_client, INDEX_NAME),
+                SNAPSHOT_PATH,
+                generation=read_generation(es_client, INDEX_NAME),
+            )
+    except FileNotFoundError:
+        logging.error(
+            f"Fatal Error: Data file '{DATA_FILE_PATH}' not found. Exiting.")
+    except ConnectionError as e:
+        logging.error(
+            f"Fatal Error: Could not establish connection to Elasticsearch. {e}. Exiting.")
+    except Exception as e:
+        logging.error(f"An unexpected fatal error occurred: {e}. Exiting.")
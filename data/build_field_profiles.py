@@ -0,0 +1,224 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+
+from elasticsearch import Elasticsearch
+from elasticsearch.helpers import scan
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from twenty_one_tech_pocs.equipment_entry_app.profiles import (  # noqa: E402
+    DEFAULT_PROFILES_PATH,
+    PROFILE_DIMENSIONS,
+    PROFILES_SCHEMA,
+)
+from twenty_one_tech_pocs.equipment_entry_app.vector_store.equipment_entry import (  # noqa: E402
+    GENERATION_FILTER_PATH,
+    EquipmentEntryIndex,
+)
+
+# --- Configuration ---
+# Run after load_asset_data_to_es.py, against the same index
+ELASTICSEARCH_HOST = os.getenv("ES_HOST", "http://localhost:9201")
+INDEX_NAME = "assets_index"
+PROFILES_PATH = os.getenv("ASSET_FIELD_PROFILES_PATH", DEFAULT_PROFILES_PATH)
+TOP_VALUES = 20  # Values kept per profile, most frequent first
+RECENT_VALUES = 5  # Distinct values kept by latest COMMISSIONDATE
+# A field is a sequence when this share of its distinct values follow one prefix + number pattern
+SEQUENCE_MIN_SHARE = 0.8
+SEQUENCE_MIN_VALUES = 5
+# Only identifier fields (e.g. equipmentno) are sequences: nearly every asset has its own value
+SEQUENCE_MIN_DISTINCT_SHARE = 0.9
+DATE_FIELD = "COMMISSIONDATE"
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+
+_NUMBERED_VALUE = re.compile(r"^(.*?)(\d+)$")
+
+
+def _value_at(source: dict, path: str):
+    value = source
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    if isinstance(value, (dict, list)):
+        # Profiles hold scalar values; nested ones are compared by their JSON form
+        return json.dumps(value, sort_keys=True, default=str)
+    return value
+
+
+def _as_date(value):
+    """COMMISSIONDATE as an ISO date; the loader stores epoch millis."""
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value / 1000, tz=timezone.utc).strftime("%Y-%m-%d")
+    if isinstance(value, str) and value:
+        return value[:10]
+    return None
+
+
+def detect_sequence(counts: Counter) -> dict:
+    """
+    The dominant prefix + zero-padded number pattern of an identifier field, e.g. PUMP-0042, if any.
+
+    Categorical code fields (e.g. departments DEP-001..DEP-005) also follow a pattern,
+    but their next number is not a value to predict; they repeat their values across
+    assets, while an identifier has about as many distinct values as assets.
+    """
+    distinct = [str(value) for value in counts]
+    if len(distinct) < SEQUENCE_MIN_VALUES or len(distinct) < SEQUENCE_MIN_DISTINCT_SHARE * sum(counts.values()):
+        return {}
+    patterns = Counter()
+    highest = {}
+    for value in distinct:
+        match = _NUMBERED_VALUE.match(value)
+        if not match:
+            continue
+        prefix, number = match.groups()
+        key = (prefix, len(number))
+        patterns[key] += 1
+        highest[key] = max(highest.get(key, 0), int(number))
+    if not patterns:
+        return {}
+    (prefix, width), count = patterns.most_common(1)[0]
+    share = count / len(distinct)
+    if share < SEQUENCE_MIN_SHARE:
+        return {}
+    return {"prefix": prefix, "width": width, "max": highest[(prefix, width)], "share": round(share, 3)}
+
+
+class ProfileAccumulator:
+    """
+    Value counts and last-seen dates per (dimension, group, field), built in one pass over the index.
+
+    Identifiers are unique index-wide, so the highest number of each prefix +
+    width pattern is tracked over all assets: a group's sequence continues after
+    it, not after the group's own highest value.
+    """
+
+    def __init__(self, fields: dict):
+        # label key -> index path, without the grouping fields themselves
+        self.fields = fields
+        self.counts = defaultdict(Counter)
+        self.last_seen = defaultdict(dict)
+        # (label key, prefix, width) -> highest number among all assets
+        self.highest_numbers = {}
+        self.assets = 0
+
+    def add(self, source: dict, group_paths: dict):
+        self.assets += 1
+        seen = _as_date(source.get(DATE_FIELD))
+        for label_key, field_path in self.fields.items():
+            match = _NUMBERED_VALUE.match(str(_value_at(source, field_path) or ""))
+            if match:
+                prefix, number = match.groups()
+                key = (label_key, prefix, len(number))
+                self.highest_numbers[key] = max(self.highest_numbers.get(key, 0), int(number))
+        for dimension, path in group_paths.items():
+            group = _value_at(source, path)
+            if group in (None, ""):
+                continue
+            for label_key, field_path in self.fields.items():
+                if label_key == dimension:
+                    continue
+                value = _value_at(source, field_path)
+                if value in (None, ""):
+                    continue
+                key = (dimension, str(group), label_key)
+                self.counts[key][value] += 1
+                if seen and seen > self.last_seen[key].get(value, ""):
+                    self.last_seen[key][value] = seen
+
+    def profiles(self):
+        for key, counts in self.counts.items():
+            last_seen = self.last_seen[key]
+            recent = sorted(last_seen, key=last_seen.get, reverse=True)[:RECENT_VALUES]
+            pattern = detect_sequence(counts)
+            if pattern:
+                highest = self.highest_numbers.get((key[2], pattern["prefix"], pattern["width"]), 0)
+                pattern["max"] = max(pattern["max"], highest)
+            profile = {
+                "total": sum(counts.values()),
+                "values": [[value, count, last_seen.get(value)] for value, count in counts.most_common(TOP_VALUES)],
+                "recent": recent,
+                "pattern": pattern,
+            }
+            yield key, profile
+
+
+def read_generation(client: Elasticsearch, index: str) -> str:
+    response = client.indices.get(index=index, filter_path=GENERATION_FILTER_PATH)
+    return EquipmentEntryIndex._generation_from_response(response) or ""
+
+
+def build_profiles(client: Elasticsearch, index: str, path: str):
+    """Scans the index and writes the profiles to a new SQLite file that replaces path atomically."""
+    group_paths = {dimension: EquipmentEntryIndex.label_mapping[dimension] for dimension in PROFILE_DIMENSIONS}
+    fields = dict(EquipmentEntryIndex.label_mapping)
+    accumulator = ProfileAccumulator(fields)
+    source = sorted(set(fields.values()) | {DATE_FIELD})
+
+    logging.info(f"Scanning '{index}' for {len(fields)} fields grouped by {', '.join(PROFILE_DIMENSIONS)}...")
+    for hit in scan(client, index=index, query={"query": {"match_all": {}}, "_source": source}, size=1000):
+        accumulator.add(hit.get("_source", {}), group_paths)
+        if accumulator.assets % 50000 == 0:
+            logging.info(f"{accumulator.assets} assets scanned.")
+
+    temporary_path = f"{path}.tmp"
+    if os.path.exists(temporary_path):
+        os.remove(temporary_path)
+    connection = sqlite3.connect(temporary_path)
+    try:
+        connection.executescript(PROFILES_SCHEMA)
+        rows = (
+            (dimension, group, label_key, profile["total"], json.dumps(profile, separators=(",", ":"), default=str))
+            for (dimension, group, label_key), profile in accumulator.profiles()
+        )
+        connection.executemany(
+            "INSERT INTO field_profiles (dimension, group_value, field, total, profile) VALUES (?, ?, ?, ?, ?)", rows
+        )
+        connection.executemany(
+            "INSERT INTO profile_meta (key, value) VALUES (?, ?)",
+            [
+                ("index", index),
+                ("generation", read_generation(client, index)),
+                ("built_at", datetime.now(timezone.utc).isoformat()),
+                ("assets", str(accumulator.assets)),
+            ],
+        )
+        connection.commit()
+        profiles = connection.execute("SELECT COUNT(*) FROM field_profiles").fetchone()[0]
+        connection.execute("VACUUM")
+    finally:
+        connection.close()
+    # The Django process reopens the file when it sees a new modification time
+    os.replace(temporary_path, path)
+    logging.info(f"Wrote {profiles} profiles from {accumulator.assets} assets to '{path}'.")
+
+
+# --- Main Execution ---
+if __name__ == "__main__":
+    logging.info("Script started.")
+    logging.info(f"Connecting to Elasticsearch at {ELASTICSEARCH_HOST}")
+
+    try:
+        es_client = Elasticsearch(
+            hosts=[ELASTICSEARCH_HOST],
+            verify_certs=False,  # Set to True if using HTTPS with valid certs
+            ssl_show_warn=False  # Suppress SSL warnings if verify_certs=False
+        )
+        if not es_client.ping():
+            raise ConnectionError(
+                f"Could not connect to Elasticsearch at {ELASTICSEARCH_HOST}")
+        build_profiles(es_client, INDEX_NAME, PROFILES_PATH)
+    except ConnectionError as e:
+        logging.error(
+            f"Fatal Error: Could not establish connection to Elasticsearch. {e}. Exiting.")
+    except Exception as e:
+        logging.error(f"An unexpected fatal error occurred: {e}. Exiting.")
@@ -1,18 +1,56 @@
+import codecs
 import json
 import os
+import sys
+import time
+from collections import deque
+from datetime import datetime, timezone
 from elasticsearch import Elasticsearch
-from elasticsearch.helpers import bulk
+from elasticsearch.helpers import parallel_bulk
 from elasticsearch.exceptions import RequestError, NotFoundError
 import logging
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from twenty_one_tech_pocs.equipment_entry_app.vector_store.embeddings import (  # noqa: E402
+    EMBEDDING_DIMS,
+    SENTENCE_TRANSFORMERS_AVAILABLE,
+)
+from twenty_one_tech_pocs.equipment_entry_app.vector_store.asset_documents import (  # noqa: E402
+    EMBEDDING_BATCH_SIZE,
+    embed_descriptions,
+    prepare_asset_action,
+    stamp_index_generation,
+)
+
 # --- Configuration ---
 # Default to 9200, adjust if needed (like your class uses 9201)
 ELASTICSEARCH_HOST = os.getenv("ES_HOST", "http://localhost:9201")
+# An alias: each load builds a new assets_index_v{n} index and then points the alias at it
 INDEX_NAME = "assets_index"
-DATA_FILE_PATH = "assets.json"  # Path to your JSON data file
+INDEX_REPLICAS = int(os.getenv("INDEX_REPLICAS", "1"))  # Replicas once the new index serves searches
+INDEX_VERSIONS_TO_KEEP = int(os.getenv("INDEX_VERSIONS_TO_KEEP", "2"))  # The serving index and one to roll back to
+FORCE_MERGE_TIMEOUT = 3600  # Seconds
+# Keyword fields whose global ordinals are built before the new index serves searches
+WARMUP_FIELDS = ["CLASSID.CLASSCODE", "TYPE.TYPECODE", "CATEGORYID.CATEGORYCODE", "DEPARTMENTID.DEPARTMENTCODE"]
+# Path to your data file: a JSON list of assets, or NDJSON (one asset per line)
+DATA_FILE_PATH = os.getenv("DATA_FILE_PATH", "assets.json")
+# ISO time the data file was exported from EAM; defaults to the file's modification time
+DATA_EXPORTED_AT = os.getenv("DATA_EXPORTED_AT")
 # Set USE_PROVIDED_CLASS_FOR_TESTING to True if you want to run a test search
 # using your class after loading. Make sure the class is importable.
 USE_PROVIDED_CLASS_FOR_TESTING = True
+# Embed ASSETID.DESCRIPTION for the hybrid (BM25 + kNN) asset search; needs sentence-transformers
+EMBED_DESCRIPTIONS = os.getenv("EMBED_DESCRIPTIONS", "true").lower() == "true" and SENTENCE_TRANSFORMERS_AVAILABLE
+# Bulk indexing: concurrent bulk requests, and the size bounds of each request
+BULK_THREADS = int(os.getenv("BULK_THREADS", "4"))
+BULK_CHUNK_BYTES = int(os.getenv("BULK_CHUNK_BYTES", str(10 * 1024 * 1024)))
+BULK_CHUNK_DOCS = 5000
+BULK_REQUEST_TIMEOUT = 60  # Increase timeout for large bulks
+# The data file offset reached is saved every CHECKPOINT_EVERY documents; a rerun resumes from it
+CHECKPOINT_EVERY = 10000
+PROGRESS_INTERVAL = 10  # Seconds between progress reports
+READ_BLOCK_SIZE = 1024 * 1024  # Bytes read from the data file at a time
 # Adjust the import path based on your project structure if testing
 # from your_package.elasticsearch_vector_store import EquipmentEntryElasticSearch
 
@@ -61,6 +99,8 @@ INDEX_MAPPING = {
         "class": {"type": "keyword"},
         # Handle potential date format
         "commissiondate": {"type": "date", "format": "epoch_millis||strict_date_optional_time"},
+        # Epoch millis (see prepare_asset_action); the last-seen dates of the historical value statistics
+        "COMMISSIONDATE": {"type": "date", "format": "epoch_millis||strict_date_optional_time"},
         # Add other known important fields or let them be dynamically mapped
         # Map fields referenced in the Python class explicitly if types matter
         "TYPE": {
@@ -87,6 +127,13 @@ INDEX_MAPPING = {
             "properties": {
                 "CATEGORYCODE": {"type": "keyword"}
             }
+        },
+        # Normalized description embeddings (see vector_store/embeddings.py)
+        "embedding": {
+            "type": "dense_vector",
+            "dims": EMBEDDING_DIMS,
+            "index": True,
+            "similarity": "cosine"
         }
         # ... map other fields as needed based on their expected type and usage
     }
@@ -95,125 +142,376 @@ INDEX_MAPPING = {
 }
 
 
-def create_index_if_not_exists(client: Elasticsearch, index: str, mapping: dict):
-    """Creates an index in Elasticsearch if it doesn't already exist."""
+def index_versions(client: Elasticsearch, alias: str) -> dict:
+    """{version: index name} of the alias_v{n} indices."""
+    versions = {}
+    for name in client.indices.get_alias(index=f"{alias}_v*"):
+        suffix = name[len(alias) + 2:]
+        if suffix.isdigit():
+            versions[int(suffix)] = name
+    return versions
+
+
+def serving_indices(client: Elasticsearch, alias: str) -> list:
+    """The indices the alias points to (none before the first versioned load)."""
+    if not client.indices.exists_alias(name=alias):
+        return []
+    return list(client.indices.get_alias(name=alias))
+
+
+def create_versioned_index(client: Elasticsearch, alias: str, mapping: dict) -> str:
+    """
+    Creates the next alias_v{n} index with the current mapping, set up for bulk loading:
+    no replicas and no periodic refresh until finalize_index.
+    """
+    versions = index_versions(client, alias)
+    index = f"{alias}_v{max(versions, default=0) + 1}"
     try:
-        if not client.indices.exists(index=index):
-            logging.info(f"Index '{index}' not found. Creating...")
-            client.indices.create(index=index, mappings=mapping)
-            logging.info(f"Index '{index}' created successfully.")
-        else:
-            logging.info(f"Index '{index}' already exists.")
-            # Optionally update mapping if needed (use with caution)
-            # try:
-            #     client.indices.put_mapping(index=index, properties=mapping['properties'])
-            #     logging.info(f"Mapping updated for index '{index}'.")
-            # except RequestError as e:
-            #     logging.warning(f"Could not update mapping for index '{index}': {e.info['error']['reason']}")
+        client.indices.create(
+            index=index,
+            mappings=mapping,
+            settings={"number_of_replicas": 0, "refresh_interval": "-1"},
+        )
     except RequestError as e:
         logging.error(f"Elasticsearch error creating index '{index}': {e}")
         raise
-    except Exception as e:
-        logging.error(
-            f"An unexpected error occurred during index creation: {e}")
-        raise
+    logging.info(f"Index '{index}' created for the next load of '{alias}'.")
+    return index
+
 
+def resumable_index(client: Elasticsearch, alias: str, filepath: str):
+    """The index of an interrupted load of the data file, if it still exists and does not serve yet."""
+    index = read_checkpoint(filepath).get("index")
+    if not index or not index.startswith(f"{alias}_v") or not client.indices.exists(index=index):
+        return None
+    if index in serving_indices(client, alias):
+        return None
+    return index
 
-def generate_bulk_actions(filepath: str, index_name: str):
-    """Reads the JSON file and yields actions for the Elasticsearch bulk helper."""
+
+def finalize_index(client: Elasticsearch, index: str):
+    """
+    Makes a loaded index ready to serve: merged to one segment, replicated,
+    refreshed periodically again, and with its global ordinals built.
+    """
+    logging.info(f"Force-merging '{index}'...")
+    client.options(request_timeout=FORCE_MERGE_TIMEOUT).indices.forcemerge(index=index, max_num_segments=1)
+    # Replicas copy the merged segments rather than merging themselves
+    client.indices.put_settings(
+        index=index, settings={"index": {"number_of_replicas": INDEX_REPLICAS, "refresh_interval": None}}
+    )
+    health = client.options(request_timeout=FORCE_MERGE_TIMEOUT).cluster.health(
+        index=index, wait_for_status="yellow", wait_for_no_initializing_shards=True, timeout="30m"
+    )
+    if health["timed_out"]:
+        raise RuntimeError(f"Shards of '{index}' are still initializing; the alias was not switched.")
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-    except FileNotFoundError:
-        logging.error(f"Error: Data file not found at '{filepath}'")
-        raise
-    except json.JSONDecodeError:
-        logging.error(f"Error: Could not decode JSON from file '{filepath}'")
-        raise
+        aggregations = {
+            f"warmup_{position}": {"terms": {"field": field, "size": 1}} for position, field in enumerate(WARMUP_FIELDS)
+        }
+        client.search(index=index, size=0, aggs=aggregations)
     except Exception as e:
-        logging.error(f"An error occurred reading the data file: {e}")
-        raise
+        logging.warning(f"Could not warm up '{index}': {e}")
+    logging.info(f"Index '{index}' is ready to serve ({INDEX_REPLICAS} replicas).")
 
-    if not isinstance(data, list):
-        logging.error(
-            f"Error: Expected a JSON list in '{filepath}', but got {type(data)}")
-        raise ValueError("Invalid JSON format: Expected a list of objects.")
 
-    logging.info(f"Preparing {len(data)} documents for bulk indexing.")
+def swap_alias(client: Elasticsearch, alias: str, index: str):
+    """Points the alias at index, away from the indices it pointed to, in one atomic update."""
+    actions = [{"remove": {"index": name, "alias": alias}} for name in serving_indices(client, alias) if name != index]
+    if not actions and client.indices.exists(index=alias) and not client.indices.exists_alias(name=alias):
+        # An index loaded before versioning holds the name; it is dropped in the same update
+        logging.warning(f"Replacing the unversioned index '{alias}' with the alias.")
+        actions.append({"remove_index": {"index": alias}})
+    actions.append({"add": {"index": index, "alias": alias}})
+    client.indices.update_aliases(actions=actions)
+    logging.info(f"Alias '{alias}' now points to '{index}'.")
+
+
+def prune_versions(client: Elasticsearch, alias: str, keep: int = INDEX_VERSIONS_TO_KEEP):
+    """Deletes the versions older than the serving one, except the newest keep - 1 to roll back to."""
+    versions = index_versions(client, alias)
+    serving = set(serving_indices(client, alias))
+    serving_versions = [version for version, name in versions.items() if name in serving]
+    if not serving_versions:
+        return
+    older = sorted(version for version in versions if version < min(serving_versions))
+    for version in older[:max(len(older) - (keep - 1), 0)]:
+        client.indices.delete(index=versions[version])
+        logging.info(f"Deleted old index '{versions[version]}'.")
+
+
+def data_file_exported_at(filepath: str) -> datetime:
+    """When the data file was exported from EAM: DATA_EXPORTED_AT, or its last modification time."""
+    if DATA_EXPORTED_AT:
+        exported_at = datetime.fromisoformat(DATA_EXPORTED_AT)
+        return exported_at if exported_at.tzinfo else exported_at.replace(tzinfo=timezone.utc)
+    return datetime.fromtimestamp(os.path.getmtime(filepath), tz=timezone.utc)
+
+
+def read_records(filepath: str, start_offset: int = 0):
+    """
+    Streams the records of a JSON list or NDJSON file without loading the file.
+
+    Yields (record, offset) pairs, where offset is the byte offset just after the
+    record: reading again from it (start_offset) continues with the next record.
+    """
+    with open(filepath, 'rb') as f:
+        head = f.read(READ_BLOCK_SIZE).lstrip()
+        if head.startswith(codecs.BOM_UTF8):
+            head = head[len(codecs.BOM_UTF8):].lstrip()
+        f.seek(0)
+        if head.startswith(b"["):
+            yield from _read_json_list(f, start_offset)
+        elif head.startswith(b"{") or not head:
+            yield from _read_ndjson(f, start_offset)
+        else:
+            logging.error(
+                f"Error: Expected a JSON list or NDJSON objects in '{filepath}'")
+            raise ValueError("Invalid JSON format: Expected a list of objects.")
+
+
+def _read_ndjson(f, start_offset: int):
+    offset = start_offset
+    f.seek(start_offset)
+    for line in f:
+        offset += len(line)
+        if line.strip():
+            yield json.loads(line), offset
+
+
+def _read_json_list(f, start_offset: int):
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    f.seek(start_offset)
+    offset = start_offset
+    # A resumed read starts just after a record, inside the list
+    opened = start_offset > 0
+    buffer, position, eof = "", 0, False
+
+    def read_more():
+        nonlocal buffer, position, eof
+        block = f.read(READ_BLOCK_SIZE)
+        eof = not block
+        buffer = buffer[position:] + utf8.decode(block, final=eof)
+        position = 0
+
+    while True:
+        # Skip whitespace and separators up to the next record
+        start = position
+        while position < len(buffer) and (
+            buffer[position].isspace() or buffer[position] == "," or (not opened and buffer[position] in "\ufeff[")
+        ):
+            opened = opened or buffer[position] == "["
+            position += 1
+        offset += len(buffer[start:position].encode("utf-8"))
+        if position == len(buffer):
+            if eof:
+                raise json.JSONDecodeError("Unterminated JSON list", buffer, position)
+            read_more()
+            continue
+        if buffer[position] == "]":
+            return
+        try:
+            record, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            read_more()
+            continue
+        if end == len(buffer) and not eof:
+            # The record may continue in the next block (e.g. a number)
+            read_more()
+            continue
+        offset += len(buffer[position:end].encode("utf-8"))
+        position = end
+        yield record, offset
+
+
+def generate_bulk_actions(filepath: str, index_name: str, start_offset: int = 0, offsets: deque = None):
+    """
+    Streams the data file and yields actions for the Elasticsearch bulk helpers.
+
+    Records are transformed by prepare_asset_action, as the EAM sync does.
+
+    Args:
+        start_offset: Byte offset of the data file to resume from (see read_records).
+        offsets: If given, the data file offset after each yielded action is appended
+                 to it, so the caller can checkpoint as the bulk results come back.
+    """
+    logging.info(f"Streaming documents from '{filepath}' for bulk indexing.")
     count = 0
     skipped = 0
-    for doc in data:
-        try:
-            # Use ASSETID.EQUIPMENTCODE as the document ID for idempotency
-            # Handle potential missing keys gracefully
-            asset_id_data = doc.get("ASSETID")
-            if not asset_id_data or not isinstance(asset_id_data, dict):
-                logging.warning(
-                    f"Skipping record due to missing or invalid 'ASSETID': {doc.get('recordid', 'N/A')}")
+    try:
+        records = read_records(filepath, start_offset)
+        for doc, offset in records:
+            try:
+                action = prepare_asset_action(doc, index_name)
+            except Exception as e:
+                logging.error(f"Error preparing document: {e}. Skipping.")
                 skipped += 1
                 continue
-
-            equipment_code = asset_id_data.get("EQUIPMENTCODE")
-            if not equipment_code:
-                logging.warning(
-                    f"Skipping record due to missing 'ASSETID.EQUIPMENTCODE': {doc.get('recordid', 'N/A')}")
+            if action is None:
                 skipped += 1
                 continue
-
-            # Clean up potential problematic fields before indexing if needed
-            # For example, H3 requires specific date formats if mapped as date
-            # Convert epoch millis in COMMISSIONDATE if present and mapping expects it
-            if 'COMMISSIONDATE' in doc and isinstance(doc['COMMISSIONDATE'], dict) and 'YEAR' in doc['COMMISSIONDATE']:
-                if isinstance(doc['COMMISSIONDATE']['YEAR'], (int, float)):
-                   # Assuming 'YEAR' field actually holds epoch millis
-                    doc['COMMISSIONDATE'] = int(doc['COMMISSIONDATE']['YEAR'])
-                else:
-                    # Handle cases where the date isn't epoch millis as expected
-                    logging.warning(
-                        f"Unexpected format for COMMISSIONDATE in doc id {equipment_code}, removing.")
-                    del doc['COMMISSIONDATE']  # Or transform differently
-
-            action = {
-                "_index": index_name,
-                "_id": equipment_code,  # Use equipment code as ID
-                "_source": doc
-            }
+            if offsets is not None:
+                offsets.append(offset)
             yield action
             count += 1
-        except Exception as e:
-            logging.error(
-                f"Error preparing document with equipment code '{equipment_code}': {e}. Skipping.")
-            skipped += 1
+    except FileNotFoundError:
+        logging.error(f"Error: Data file not found at '{filepath}'")
+        raise
+    except json.JSONDecodeError as e:
+        logging.error(f"Error: Could not decode JSON from file '{filepath}': {e}")
+        raise
 
     logging.info(f"Generated {count} actions, skipped {skipped} records.")
 
 
-def load_data_to_es(client: Elasticsearch, index: str, filepath: str):
-    """Loads data from the JSON file into the specified Elasticsearch index."""
-    logging.info(f"Starting data load from '{filepath}' to index '{index}'...")
+def _checkpoint_path(filepath: str) -> str:
+    return f"{filepath}.checkpoint.json"
+
+
+def read_checkpoint(filepath: str, index: str = None) -> dict:
+    """The checkpoint of an interrupted load of this data file (into index, if given), or {}."""
     try:
-        success, failed = bulk(
-            client=client,
-            actions=generate_bulk_actions(filepath, index),
-            chunk_size=500,  # Adjust chunk size based on document size and ES capacity
-            request_timeout=60  # Increase timeout for large bulks
-        )
+        with open(_checkpoint_path(filepath), 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    stat = os.stat(filepath)
+    # A changed data file starts over
+    if [checkpoint.get("size"), checkpoint.get("mtime")] != [stat.st_size, stat.st_mtime] or (
+        index is not None and checkpoint.get("index") != index
+    ):
+        logging.warning("Ignoring a checkpoint of another data file or index.")
+        return {}
+    return checkpoint
+
+
+def write_checkpoint(filepath: str, index: str, offset: int, indexed: int, failed: int):
+    stat = os.stat(filepath)
+    checkpoint = {
+        "index": index,
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "offset": offset,
+        "indexed": indexed,
+        "failed": failed,
+    }
+    temporary_path = f"{_checkpoint_path(filepath)}.tmp"
+    with open(temporary_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+    os.replace(temporary_path, _checkpoint_path(filepath))
+
+
+def disable_refresh(client: Elasticsearch, index: str):
+    """Turns periodic refreshes off for the load; returns the refresh_interval to restore (None: the default)."""
+    response = client.indices.get_settings(index=index, name="index.refresh_interval")
+    previous = None
+    for settings in response.values():
+        previous = settings.get("settings", {}).get("index", {}).get("refresh_interval", previous)
+    client.indices.put_settings(index=index, settings={"index": {"refresh_interval": "-1"}})
+    # "-1" is left over from an interrupted load
+    return None if previous == "-1" else previous
+
+
+def restore_refresh(client: Elasticsearch, index: str, refresh_interval):
+    client.indices.put_settings(index=index, settings={"index": {"refresh_interval": refresh_interval}})
+
+
+class LoadProgress:
+    """Counts the bulk results and logs the throughput every PROGRESS_INTERVAL seconds."""
+
+    def __init__(self, start_offset: int, indexed: int = 0, failed: int = 0):
+        self.start_offset = start_offset
+        self.offset = start_offset
+        self.indexed = indexed
+        self.failed = failed
+        self.documents = 0
+        self.started = time.monotonic()
+        self.reported = self.started
+
+    def add(self, ok: bool, offset: int):
+        self.documents += 1
+        self.offset = offset
+        if ok:
+            self.indexed += 1
+        else:
+            self.failed += 1
+        if time.monotonic() - self.reported >= PROGRESS_INTERVAL:
+            self.report()
+
+    def report(self, final: bool = False):
+        self.reported = time.monotonic()
+        elapsed = max(self.reported - self.started, 1e-9)
+        megabytes = (self.offset - self.start_offset) / (1024 * 1024)
         logging.info(
-            f"Bulk indexing completed. Success: {success}, Failed: {failed}")
-        if failed > 0:
+            f"{'Loaded' if final else 'Loading'}: {self.indexed} indexed, {self.failed} failed, "
+            f"{self.documents / elapsed:.0f} docs/s, {megabytes:.1f} MB read at {megabytes / elapsed:.1f} MB/s.")
+
+
+def load_data_to_es(client: Elasticsearch, index: str, filepath: str):
+    """
+    Streams the data file into the specified Elasticsearch index.
+
+    The documents are indexed by BULK_THREADS concurrent bulk requests of at most
+    BULK_CHUNK_BYTES each, with refreshes off until the end. The data file offset
+    reached is checkpointed, and a rerun after a failure resumes from it.
+    """
+    checkpoint = read_checkpoint(filepath, index)
+    start_offset = checkpoint.get("offset", 0)
+    if start_offset:
+        logging.info(f"Resuming the load of '{filepath}' at byte {start_offset}.")
+    logging.info(f"Starting data load from '{filepath}' to index '{index}' with {BULK_THREADS} threads...")
+    progress = LoadProgress(start_offset, checkpoint.get("indexed", 0), checkpoint.get("failed", 0))
+    refresh_interval = disable_refresh(client, index)
+    try:
+        # Offsets of the actions in flight; parallel_bulk returns the results in action order
+        offsets = deque()
+        actions = generate_bulk_actions(filepath, index, start_offset, offsets)
+        if EMBED_DESCRIPTIONS:
+            logging.info(f"Embedding asset descriptions in batches of {EMBEDDING_BATCH_SIZE}.")
+            actions = embed_descriptions(actions)
+        for ok, item in parallel_bulk(
+            client.options(request_timeout=BULK_REQUEST_TIMEOUT),
+            actions,
+            thread_count=BULK_THREADS,
+            chunk_size=BULK_CHUNK_DOCS,
+            max_chunk_bytes=BULK_CHUNK_BYTES,
+            queue_size=BULK_THREADS,
+            raise_on_error=False,
+        ):
+            progress.add(ok, offsets.popleft())
+            if not ok and progress.failed <= 10:
+                logging.warning(f"Failed to index document: {item}")
+            if progress.documents % CHECKPOINT_EVERY == 0:
+                write_checkpoint(filepath, index, progress.offset, progress.indexed, progress.failed)
+        progress.report(final=True)
+        if progress.failed > 0:
             logging.warning(
                 "Some documents failed to index. Check Elasticsearch logs for details.")
-        # Explicitly refresh the index to make changes searchable immediately (optional)
-        try:
-            client.indices.refresh(index=index)
-            logging.info(f"Index '{index}' refreshed.")
-        except NotFoundError:
-            logging.warning(
-                f"Index '{index}' not found during refresh (might indicate previous failure).")
-
     except Exception as e:
         logging.error(f"An error occurred during bulk indexing: {e}")
+        if progress.documents:
+            write_checkpoint(filepath, index, progress.offset, progress.indexed, progress.failed)
+            logging.info(f"Checkpoint saved at byte {progress.offset}; rerun to resume.")
         raise
+    finally:
+        restore_refresh(client, index, refresh_interval)
+
+    # The whole file is in the index
+    if os.path.exists(_checkpoint_path(filepath)):
+        os.remove(_checkpoint_path(filepath))
+    # Explicitly refresh the index to make changes searchable immediately (optional)
+    try:
+        client.indices.refresh(index=index)
+        logging.info(f"Index '{index}' refreshed.")
+    except NotFoundError:
+        logging.warning(
+            f"Index '{index}' not found during refresh (might indicate previous failure).")
+    # Lets running servers drop historical values cached from the previous load, and
+    # the EAM sync replay the changes it wrote to the old index since the export
+    stamp_index_generation(client, index, exported_at=data_file_exported_at(filepath))
 
 
 # --- Main Execution ---
@@ -237,11 +535,20 @@ if __name__ == "__main__":
                 f"Could not connect to Elasticsearch at {ELASTICSEARCH_HOST}")
         logging.info("Successfully connected to Elasticsearch.")
 
-        # 1. Create index with mapping (if it doesn't exist)
-        create_index_if_not_exists(es_client, INDEX_NAME, INDEX_MAPPING)
+        # 1. Create the next index version (or resume an interrupted load into one)
+        index = resumable_index(es_client, INDEX_NAME, DATA_FILE_PATH)
+        if index:
+            logging.info(f"Resuming the interrupted load into '{index}'.")
+        else:
+            index = create_versioned_index(es_client, INDEX_NAME, INDEX_MAPPING)
 
         # 2. Load data using bulk API
-        load_data_to_es(es_client, INDEX_NAME, DATA_FILE_PATH)
+        load_data_to_es(es_client, index, DATA_FILE_PATH)
+
+        # 3. Serve the new index once it is complete and warm
+        finalize_index(es_client, index)
+        swap_alias(es_client, INDEX_NAME, index)
+        prune_versions(es_client, INDEX_NAME)
 
     except FileNotFoundError:
         logging.error(
@@ -0,0 +1,133 @@
+"""
+Compares the fuzzy and hybrid (BM25 + kNN) asset retrieval on latency and recall.
+
+Usage (from the repository root):
+    python llm_benchmarking/asset_retrieval_benchmark.py [--host http://localhost:9201] [--index assets_index]
+        [--samples 200] [--k 10] [--field class] [--seed 42]
+
+It samples assets from the index and searches for each with a perturbed copy of
+its description (one word dropped, one typo), as a user would type it. For every
+retrieval mode it prints:
+  - the median and p95 search latency (query embedding included for hybrid)
+  - recall@k: how often the sampled asset is among the k hits
+  - value accuracy: how often the most frequent value of --field among the other
+    hits is the sampled asset's own value, i.e. what the prediction relies on
+
+The index must have been loaded with embeddings (data/load_asset_data_to_es.py).
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from twenty_one_tech_pocs.equipment_entry_app.vector_store.equipment_entry import (  # noqa: E402
+    FUZZY_RETRIEVAL,
+    HYBRID_RETRIEVAL,
+    EquipmentEntryElasticSearch,
+)
+
+
+def sample_assets(store, field_path, samples, seed):
+    response = store.search(
+        {
+            "query": {
+                "function_score": {
+                    "query": {"exists": {"field": "ASSETID.DESCRIPTION"}},
+                    "random_score": {"seed": seed, "field": "_seq_no"},
+                }
+            },
+            "_source": ["ASSETID.DESCRIPTION", field_path],
+            "size": samples,
+        }
+    )
+    return response["hits"]["hits"]
+
+
+def perturb(description, rng):
+    words = description.split()
+    if len(words) > 3:
+        words.pop(rng.randrange(len(words)))
+    candidates = [position for position, word in enumerate(words) if len(word) > 4]
+    if candidates:
+        position = rng.choice(candidates)
+        word = words[position]
+        swap = rng.randrange(1, len(word) - 1)
+        words[position] = word[:swap - 1] + word[swap] + word[swap - 1] + word[swap + 1:]
+    return " ".join(words)
+
+
+def field_value(source, field_path):
+    value = source
+    for part in field_path.split("."):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+def run_mode(store, mode, queries, field_path, k):
+    latencies = []
+    found = 0
+    correct = 0
+    with_value = 0
+    for hit, query in queries:
+        started = time.perf_counter()
+        results = store.similar_assets(query, [field_path], size=k, mode=mode)
+        latencies.append(time.perf_counter() - started)
+
+        found += any(result["_id"] == hit["_id"] for result in results)
+        expected = field_value(hit["_source"], field_path)
+        if expected is None:
+            continue
+        with_value += 1
+        others = [field_value(result["_source"], field_path) for result in results if result["_id"] != hit["_id"]]
+        counts = store._count_values([{"_source": {"value": value}} for value in others], "value")
+        correct += bool(counts) and counts[0][0] == expected
+
+    latencies.sort()
+    return {
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+        "recall": found / len(queries),
+        "value_accuracy": correct / with_value if with_value else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("ES_HOST", "http://localhost:9201"))
+    parser.add_argument("--index", default="assets_index")
+    parser.add_argument("--samples", type=int, default=200, help="Assets to search for")
+    parser.add_argument("--k", type=int, default=10, help="Hits per search")
+    parser.add_argument("--field", default="class", help="Label key whose value accuracy is measured")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    store = EquipmentEntryElasticSearch(es_host=args.host, index_name=args.index)
+    field_path = store.label_mapping[args.field]
+    rng = random.Random(args.seed)
+    queries = [
+        (hit, perturb(hit["_source"]["ASSETID"]["DESCRIPTION"], rng))
+        for hit in sample_assets(store, field_path, args.samples, args.seed)
+    ]
+    if not queries:
+        sys.exit(f"No assets with a description in '{args.index}'")
+
+    # Load the embedding model outside the timings
+    store.similar_assets(queries[0][1], [field_path], size=args.k, mode=HYBRID_RETRIEVAL)
+
+    print(f"{len(queries)} queries, k={args.k}, field={args.field} ({field_path})")
+    print(f"{'mode':<8} {'p50 ms':>8} {'p95 ms':>8} {'recall@k':>9} {'value acc':>10}")
+    for mode in (FUZZY_RETRIEVAL, HYBRID_RETRIEVAL):
+        result = run_mode(store, mode, queries, field_path, args.k)
+        accuracy = f"{result['value_accuracy']:.3f}" if result["value_accuracy"] is not None else "n/a"
+        print(
+            f"{mode:<8} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} "
+            f"{result['recall']:>9.3f} {accuracy:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Compares the in-process asset snapshot with Elasticsearch on historical value lookups.
+
+Usage (from the repository root):
+    python llm_benchmarking/asset_snapshot_benchmark.py [--host http://localhost:9201] [--index assets_index]
+        [--snapshot data/asset_snapshot] [--samples 200] [--fields class,eqtype,category] [--seed 42]
+
+It samples assets from the index and looks up the historical values of --fields
+for a perturbed copy of each description (one word dropped, one typo), as the
+asset entry views do. For both backends and both lookups (the top 10 hit counts
+and the aggregation statistics) it prints:
+  - the median and p95 lookup latency
+  - agreement: how often the most frequent value of a field is the one
+    Elasticsearch returns
+
+Build the snapshot of the same index first (data/build_asset_snapshot.py). The
+Elasticsearch lookups run with fuzzy retrieval and without the historical value
+cache, as the snapshot has neither kNN search nor a cache.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from asset_retrieval_benchmark import perturb, sample_assets  # noqa: E402
+
+from twenty_one_tech_pocs.equipment_entry_app.vector_store.equipment_entry import (  # noqa: E402
+    FUZZY_RETRIEVAL,
+    EquipmentEntryElasticSearch,
+)
+from twenty_one_tech_pocs.equipment_entry_app.vector_store.snapshot import (  # noqa: E402
+    EquipmentEntrySnapshot,
+    snapshot_available,
+    snapshot_root,
+)
+
+LOOKUPS = {
+    "counts": lambda store, query, fields: {
+        field: [value for value, _ in counts]
+        for field, counts in store.historical_value_counts_multi(query, fields).items()
+    },
+    "stats": lambda store, query, fields: {
+        field: [item["value"] for item in stats]
+        for field, stats in store.historical_value_stats_multi(query, fields).items()
+    },
+}
+
+
+def run_lookup(store, lookup, queries, fields):
+    latencies = []
+    top_values = []
+    for query in queries:
+        started = time.perf_counter()
+        values = LOOKUPS[lookup](store, query, fields)
+        latencies.append(time.perf_counter() - started)
+        top_values.append({field: values[field][0] if values[field] else None for field in fields})
+    latencies.sort()
+    return {
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+        "top_values": top_values,
+    }
+
+
+def agreement(top_values, reference):
+    pairs = [
+        (values[field], expected[field])
+        for values, expected in zip(top_values, reference)
+        for field in expected
+        if expected[field] is not None
+    ]
+    return sum(value == expected for value, expected in pairs) / len(pairs) if pairs else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("ES_HOST", "http://localhost:9201"))
+    parser.add_argument("--index", default="assets_index")
+    parser.add_argument("--snapshot", default=snapshot_root(), help="Snapshot directory")
+    parser.add_argument("--samples", type=int, default=200, help="Assets to look up")
+    parser.add_argument("--fields", default="class,eqtype,category", help="Comma-separated label keys")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if not snapshot_available(args.snapshot):
+        sys.exit(f"No asset snapshot in '{args.snapshot}'; run data/build_asset_snapshot.py")
+    fields = args.fields.split(",")
+    elasticsearch = EquipmentEntryElasticSearch(es_host=args.host, index_name=args.index)
+    elasticsearch.retrieval_mode = FUZZY_RETRIEVAL
+    elasticsearch.cache = None
+    snapshot = EquipmentEntrySnapshot(args.snapshot)
+
+    rng = random.Random(args.seed)
+    queries = [
+        perturb(hit["_source"]["ASSETID"]["DESCRIPTION"], rng)
+        for hit in sample_assets(elasticsearch, elasticsearch.label_mapping[fields[0]], args.samples, args.seed)
+    ]
+    if not queries:
+        sys.exit(f"No assets with a description in '{args.index}'")
+
+    # Open the snapshot and warm the connection pool outside the timings
+    for store in (elasticsearch, snapshot):
+        LOOKUPS["counts"](store, queries[0], fields)
+
+    print(f"{len(queries)} queries, fields={','.join(fields)}, {len(snapshot.snapshot)} assets in the snapshot")
+    print(f"{'lookup':<7} {'backend':<14} {'p50 ms':>8} {'p95 ms':>8} {'agreement':>10}")
+    for lookup in LOOKUPS:
+        reference = None
+        for name, store in (("elasticsearch", elasticsearch), ("snapshot", snapshot)):
+            result = run_lookup(store, lookup, queries, fields)
+            reference = reference or result["top_values"]
+            share = agreement(result["top_values"], reference)
+            share = f"{share:.3f}" if share is not None else "n/a"
+            print(f"{lookup:<7} {name:<14} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {share:>10}")
+
+
+if __name__ == "__main__":
+    main()
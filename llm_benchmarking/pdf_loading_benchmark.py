@@ -0,0 +1,75 @@
+"""
+Compares UnstructuredPDFLoader with TieredPDFLoader on sample manuals.
+
+Usage (from the repository root):
+    python llm_benchmarking/pdf_loading_benchmark.py manual1.pdf manual2.pdf [--runs 3]
+
+For every PDF it prints the wall time of both loaders, the pages sent to Unstructured
+by the tiered loader, and how similar the extracted texts are.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from difflib import SequenceMatcher
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from twenty_one_tech_pocs.common.pdf_loader import (  # noqa: E402
+    UNSTRUCTURED,
+    UNSTRUCTURED_AVAILABLE,
+    TieredPDFLoader,
+    UnstructuredPDFLoader,
+)
+
+
+def time_loader(load, runs):
+    timings = []
+    documents = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        documents = load()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), documents
+
+
+def text_similarity(first, second, max_chars=200000):
+    # SequenceMatcher is quadratic; compare word sequences of a bounded prefix
+    return SequenceMatcher(None, first[:max_chars].split(), second[:max_chars].split(), autojunk=False).ratio()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdfs", nargs="+", help="PDF files to load")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per loader (the median is reported)")
+    args = parser.parse_args()
+
+    print(f"{'file':<40} {'pages':>5} {'fallback':>8} {'tiered s':>9} {'unstr. s':>9} {'speedup':>8} {'similarity':>10}")
+    for pdf_path in args.pdfs:
+        tiered_time, tiered_documents = time_loader(lambda: TieredPDFLoader(pdf_path).load(), args.runs)
+        fallback_pages = sum(1 for document in tiered_documents if document.metadata.get("extraction") == UNSTRUCTURED)
+        tiered_text = "\n\n".join(document.page_content for document in tiered_documents)
+
+        if UNSTRUCTURED_AVAILABLE:
+            unstructured_time, unstructured_documents = time_loader(
+                lambda: UnstructuredPDFLoader(pdf_path).load(), args.runs
+            )
+            unstructured_text = "\n\n".join(document.page_content for document in unstructured_documents)
+            speedup = f"{unstructured_time / tiered_time:.1f}x" if tiered_time else "-"
+            similarity = f"{text_similarity(tiered_text, unstructured_text):.3f}"
+            unstructured_time = f"{unstructured_time:.2f}"
+        else:
+            unstructured_time = speedup = similarity = "n/a"
+
+        print(
+            f"{os.path.basename(pdf_path)[:40]:<40} {len(tiered_documents):>5} {fallback_pages:>8} "
+            f"{tiered_time:>9.2f} {unstructured_time:>9} {speedup:>8} {similarity:>10}"
+        )
+
+    if not UNSTRUCTURED_AVAILABLE:
+        print("\nunstructured[pdf] is not installed: only the tiered loader was timed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Measures page-parallel PDF parsing: wall time against page count and worker count.
+
+Usage (from the repository root):
+    python llm_benchmarking/pdf_parallel_benchmark.py manual.pdf [--pages 50 100 300] [--workers 1 2 4 8] [--runs 3]
+
+For every page count (the first N pages of the file) and every worker count it
+parses the pages with PDFParsingPool and prints the median wall time, the
+speedup over one worker and the parallel efficiency (speedup / workers). It also
+checks that the parallel result has the same pages, in the same order, as the
+single-worker one.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from twenty_one_tech_pocs.common.pdf_loader import PdfReader  # noqa: E402
+from twenty_one_tech_pocs.common.pdf_pool import PDFParsingPool  # noqa: E402
+
+
+def time_pool(pool, pdf_path, pages, runs):
+    # The first call starts the worker processes; keep it out of the timings
+    pool.load(pdf_path, pages=pages)
+    timings = []
+    documents = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        documents = pool.load(pdf_path, pages=pages)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), documents
+
+
+def page_signature(documents):
+    return [(document.metadata.get("page"), len(document.page_content)) for document in documents]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdf", help="PDF file to parse (a long manual)")
+    parser.add_argument("--pages", type=int, nargs="+", help="Page counts to test (default: the whole file)")
+    parser.add_argument(
+        "--workers", type=int, nargs="+", help="Worker counts to test (default: 1, 2, 4... up to the CPU count)"
+    )
+    parser.add_argument("--runs", type=int, default=3, help="Runs per configuration (the median is reported)")
+    parser.add_argument("--min-pages-per-range", type=int, default=20, help="Smallest page range per job")
+    args = parser.parse_args()
+
+    total_pages = len(PdfReader(args.pdf).pages)
+    page_counts = [min(count, total_pages) for count in (args.pages or [total_pages])]
+    if args.workers:
+        worker_counts = args.workers
+    else:
+        worker_counts, count = [], 1
+        while count < (os.cpu_count() or 1):
+            worker_counts.append(count)
+            count *= 2
+        worker_counts.append(os.cpu_count() or 1)
+    if 1 not in worker_counts:
+        worker_counts = [1] + worker_counts
+
+    print(f"{os.path.basename(args.pdf)}: {total_pages} pages, {os.cpu_count()} CPUs\n")
+    print(f"{'pages':>6} {'workers':>7} {'ranges':>6} {'wall s':>8} {'pages/s':>8} {'speedup':>8} {'efficiency':>10}")
+    for page_count in page_counts:
+        pages = list(range(page_count))
+        baseline_time = baseline_signature = None
+        for workers in sorted(set(worker_counts)):
+            pool = PDFParsingPool(workers=workers, min_pages_per_range=args.min_pages_per_range)
+            try:
+                wall_time, documents = time_pool(pool, args.pdf, pages, args.runs)
+                range_count = len(pool.page_ranges(pages))
+            finally:
+                pool.shutdown()
+
+            signature = page_signature(documents)
+            if baseline_time is None:
+                baseline_time, baseline_signature = wall_time, signature
+            elif signature != baseline_signature:
+                print(f"  warning: {workers} workers returned different pages than 1 worker")
+            speedup = baseline_time / wall_time if wall_time else 0.0
+            print(
+                f"{page_count:>6} {workers:>7} {range_count:>6} {wall_time:>8.2f} "
+                f"{page_count / wall_time if wall_time else 0:>8.1f} {speedup:>7.2f}x {speedup / workers:>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+import contextvars
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Generic, Iterable, List, Optional
+
+from langchain_core.documents import Document
+from langchain_core.language_models import BaseChatModel
+from langchain_core.prompts import ChatPromptTemplate
+
+from .structured_output import (
+    DOCUMENT_SEPARATOR,
+    SchemaT,
+    StructuredExtractor,
+    StructuredOutputError,
+    get_model_name,
+)
+from .tokens import count_tokens, get_context_window, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+# Tokens kept free in the context window for the model's answer
+DEFAULT_OUTPUT_RESERVE = 4096
+# Upper bound per chunk even for 128k models: smaller calls run in parallel and fail independently
+DEFAULT_MAX_CHUNK_TOKENS = 16000
+# Length limit the prompts give for task codes and checklist IDs
+MAX_CODE_LENGTH = 20
+
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_key(value) -> str:
+    """Normalizes a code or description for duplicate detection."""
+    return _WHITESPACE_PATTERN.sub(" ", str(value or "")).strip().lower()
+
+
+def dedupe_by(items: Iterable, *keys: Callable) -> list:
+    """
+    Keeps the first occurrence of each item.
+
+    An item is a duplicate if any of the key functions gives a (non-empty) value
+    already seen, e.g. the same code or the same description.
+    """
+    seen = [set() for _ in keys]
+    unique = []
+    for item in items:
+        values = [normalize_key(key(item)) for key in keys]
+        if any(value and value in seen_values for value, seen_values in zip(values, seen)):
+            continue
+        for value, seen_values in zip(values, seen):
+            if value:
+                seen_values.add(value)
+        unique.append(item)
+    return unique
+
+
+def _unique_code(code: str, taken, number: int) -> str:
+    """code with the first -<number> suffix not in taken, shortened to fit MAX_CODE_LENGTH."""
+    while True:
+        suffix = f"-{number}"
+        candidate = f"{code[:MAX_CODE_LENGTH - len(suffix)]}{suffix}"
+        if normalize_key(candidate) not in taken:
+            return candidate
+        number += 1
+
+
+class CodeRegistry:
+    """
+    Tells apart the coded items (qualifications, hazards, ...) that the chunks of one document name.
+
+    Each chunk proposes codes without seeing the others. An item with the
+    description of an earlier one is that item; a different item that reuses a
+    code gets the code suffixed with its chunk number (e.g. QUAL-WELD-001-3), so
+    every EAM create gets its own code. Callers rewrite the chunk's references to
+    the code returned.
+    """
+
+    def __init__(self):
+        self._by_code = {}
+        self._by_description = {}
+
+    def match(self, code: str, description: str):
+        """The earlier item with this description (or this code, if there is no description), or None."""
+        description_key = normalize_key(description)
+        if description_key:
+            return self._by_description.get(description_key)
+        return self._by_code.get(normalize_key(code))
+
+    def add(self, item, code: str, description: str, chunk_number: int) -> str:
+        """Registers a new item and returns its code, suffixed if an earlier item has the same one."""
+        if normalize_key(code) in self._by_code:
+            code = _unique_code(code, self._by_code, chunk_number)
+        self._by_code[normalize_key(code)] = item
+        description_key = normalize_key(description)
+        if description_key:
+            self._by_description.setdefault(description_key, item)
+        return code
+
+
+def merge_task_plans(chunks: Iterable[Iterable]) -> list:
+    """
+    Merges the task plans extracted from the chunks of one document.
+
+    Each chunk names its task plans and checklist items without seeing the others.
+    A task plan with the code and description of an earlier one continues it: its
+    checklist items are appended, without duplicate descriptions. A different task
+    plan that reuses a code gets the code suffixed with its chunk number (e.g.
+    TP_INSPECTION-3), and checklist IDs used twice are renumbered, so every EAM
+    create gets its own code. Order follows the first appearance in the document.
+
+    Args:
+        chunks: The task plans of every chunk, in document order.
+    """
+    merged = {}
+    for chunk_number, task_plans in enumerate(chunks, start=1):
+        for task_plan in task_plans:
+            task_plan = task_plan.model_copy(deep=True)
+            key = normalize_key(task_plan.task_code)
+            existing = merged.get(key)
+            if existing is None:
+                merged[key] = task_plan
+            elif normalize_key(existing.description) == normalize_key(task_plan.description):
+                existing.checklist = dedupe_by(
+                    list(existing.checklist) + list(task_plan.checklist),
+                    lambda item: item.description,
+                )
+            else:
+                code = _unique_code(task_plan.task_code, merged, chunk_number)
+                logger.info(f"Task code '{task_plan.task_code}' of chunk {chunk_number} is taken; using '{code}'")
+                task_plan.task_code = code
+                merged[normalize_key(code)] = task_plan
+
+    checklist_ids = set()
+    for task_plan in merged.values():
+        for item in task_plan.checklist:
+            if normalize_key(item.checklist_id) in checklist_ids:
+                item.checklist_id = _unique_code(item.checklist_id, checklist_ids, 2)
+            if item.checklist_id:
+                checklist_ids.add(normalize_key(item.checklist_id))
+    return list(merged.values())
+
+
+class ChunkedExtractor(Generic[SchemaT]):
+    """
+    Map-reduce extraction for documents that are too large for a single call.
+
+    The document is split at page and paragraph boundaries into chunks sized from
+    the model's context window, every chunk is extracted in parallel with bounded
+    concurrency, and the partial results are merged in document order by the
+    schema-specific merge function. Documents that fit in one chunk take a single
+    call, exactly like StructuredExtractor.
+    """
+
+    def __init__(
+        self,
+        extractor: StructuredExtractor,
+        merge: Callable[[List[SchemaT]], SchemaT],
+        max_workers: int = 4,
+        output_reserve: int = DEFAULT_OUTPUT_RESERVE,
+        max_chunk_tokens: int = DEFAULT_MAX_CHUNK_TOKENS,
+    ):
+        """
+        Args:
+            extractor: Extracts the schema from one chunk.
+            merge: Combines the per-chunk results (given in document order) into one.
+            max_workers: Chunks extracted concurrently.
+            output_reserve: Tokens left free in the context window for the answer.
+            max_chunk_tokens: Upper bound on the document tokens per chunk.
+        """
+        self.extractor = extractor
+        self.merge = merge
+        self.max_workers = max_workers
+        self.output_reserve = output_reserve
+        self.max_chunk_tokens = max_chunk_tokens
+
+    def chunk_token_budget(self, llm: BaseChatModel, prompt: ChatPromptTemplate) -> int:
+        """Returns the document tokens that fit in one call next to the prompt and the answer."""
+        model_name = get_model_name(llm)
+        prompt_tokens = count_tokens(
+            "\n".join(str(message.content) for message in prompt.format_messages(text="")), model_name
+        )
+        available = get_context_window(model_name) - prompt_tokens - self.output_reserve
+        return max(min(available, self.max_chunk_tokens), 512)
+
+    def split(self, llm: BaseChatModel, prompt: ChatPromptTemplate, documents: List[Document]) -> List[str]:
+        """Splits the documents into chunk texts that each fit the model's token budget."""
+        budget = self.chunk_token_budget(llm, prompt)
+        model_name = get_model_name(llm)
+
+        chunks: List[str] = []
+        current: List[str] = []
+        current_tokens = 0
+        separator_tokens = count_tokens(DOCUMENT_SEPARATOR, model_name)
+
+        for section, section_tokens in self._sections(documents, budget, model_name):
+            if current and current_tokens + separator_tokens + section_tokens > budget:
+                chunks.append(DOCUMENT_SEPARATOR.join(current))
+                current, current_tokens = [], 0
+            current.append(section)
+            current_tokens += section_tokens + separator_tokens
+        if current:
+            chunks.append(DOCUMENT_SEPARATOR.join(current))
+
+        logger.info(f"Split {len(documents)} document(s) into {len(chunks)} chunk(s) of at most {budget} tokens")
+        return chunks
+
+    def extract(
+        self, llm: BaseChatModel, prompt: ChatPromptTemplate, chunks: List[str], prompt_name: str
+    ) -> SchemaT:
+        """
+        Extracts every chunk and merges the results.
+
+        Chunks whose output cannot be validated are skipped with a warning; the
+        extraction only fails if no chunk succeeded.
+
+        Raises:
+            StructuredOutputError: If no chunk could be extracted.
+        """
+        if len(chunks) == 1:
+            return self.extractor.extract(llm, prompt, {"text": chunks[0]}, prompt_name=prompt_name)
+
+        def extract_chunk(index_and_text):
+            index, text = index_and_text
+            try:
+                return self.extractor.extract(llm, prompt, {"text": text}, prompt_name=prompt_name)
+            except StructuredOutputError as e:
+                logger.warning(f"Chunk {index + 1}/{len(chunks)} could not be extracted and is skipped: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="chunk-extraction") as executor:
+            # Each chunk keeps the request's call context (metrics labels); results stay in document order
+            futures = [
+                executor.submit(contextvars.copy_context().run, extract_chunk, item) for item in enumerate(chunks)
+            ]
+            results = [future.result() for future in futures]
+
+        partial_results = [result for result in results if result is not None]
+        if not partial_results:
+            raise StructuredOutputError(f"None of the {len(chunks)} chunks could be extracted")
+        return self.merge(partial_results)
+
+    @staticmethod
+    def _sections(documents: List[Document], budget: int, model_name: Optional[str]):
+        """Yields (text, tokens) per page, splitting pages that exceed the budget by paragraph and line."""
+        for document in documents:
+            text = document.page_content
+            tokens = count_tokens(text, model_name)
+            if tokens <= budget:
+                if text.strip():
+                    yield text, tokens
+                continue
+            yield from ChunkedExtractor._split_text(text, budget, model_name)
+
+    @staticmethod
+    def _split_text(text: str, budget: int, model_name: Optional[str], separators=("\n\n", "\n", " ")):
+        separator, remaining_separators = separators[0], separators[1:]
+        pieces: List[str] = []
+        pieces_tokens = 0
+        for part in text.split(separator):
+            part_tokens = count_tokens(part, model_name)
+            if part_tokens > budget:
+                if pieces:
+                    yield separator.join(pieces), pieces_tokens
+                    pieces, pieces_tokens = [], 0
+                if remaining_separators:
+                    yield from ChunkedExtractor._split_text(part, budget, model_name, remaining_separators)
+                else:
+                    # A single "word" above the budget (e.g. a huge table cell dump)
+                    yield truncate_to_tokens(part, budget, model_name), budget
+                continue
+            if pieces and pieces_tokens + part_tokens + 1 > budget:
+                yield separator.join(pieces), pieces_tokens
+                pieces, pieces_tokens = [], 0
+            pieces.append(part)
+            pieces_tokens += part_tokens + 1
+        if pieces:
+            yield separator.join(pieces), pieces_tokens
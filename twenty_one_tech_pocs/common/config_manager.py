@@ -28,7 +28,6 @@ class ConfigManager:
         Returns:
             dict: A dictionary containing the LLM configuration parameters.
         """
-        config = {}
         # Define expected keys and their types (optional, for validation/casting)
         expected_keys = {
             "NAME": str,
@@ -39,7 +38,165 @@ class ConfigManager:
             "API_KEY": str,
             "BASE_URL": str,
         }
+        config = self._read_typed_env(prefix, expected_keys)
+
+        # Filter out None values before returning, as get_llm handles defaults
+        return {k: v for k, v in config.items() if v is not None}
+
+    def get_hedge_config(self, prefix="LLM_HEDGE_") -> dict:
+        """
+        Retrieves LLM hedging parameters from environment variables.
 
+        Args:
+            prefix (str): The prefix for hedging-related environment variables.
+
+        Returns:
+            dict: enabled, name, percentile, initial_delay, min_delay and max_delay
+                  for the keys that are set.
+        """
+        expected_keys = {
+            "ENABLED": bool,
+            "NAME": str,
+            "PERCENTILE": float,
+            "INITIAL_DELAY": float,
+            "MIN_DELAY": float,
+            "MAX_DELAY": float,
+        }
+        config = self._read_typed_env(prefix, expected_keys)
+        return {k: v for k, v in config.items() if v is not None}
+
+    def get_scheduler_config(self, prefix="LLM_SCHEDULER_") -> dict:
+        """
+        Retrieves the LLM scheduler limits from environment variables.
+
+        Args:
+            prefix (str): The prefix for scheduler-related environment variables.
+
+        Returns:
+            dict: enabled, max_concurrency, interactive_concurrency, batch_concurrency
+                  and tokens_per_minute for the keys that are set.
+        """
+        expected_keys = {
+            "ENABLED": bool,
+            "MAX_CONCURRENCY": int,
+            "INTERACTIVE_CONCURRENCY": int,
+            "BATCH_CONCURRENCY": int,
+            "TOKENS_PER_MINUTE": int,
+        }
+        config = self._read_typed_env(prefix, expected_keys)
+        return {k: v for k, v in config.items() if v is not None}
+
+    def get_pdf_pool_config(self, prefix="PDF_POOL_") -> dict:
+        """
+        Retrieves the PDF parsing pool settings from environment variables.
+
+        Args:
+            prefix (str): The prefix for pool-related environment variables.
+
+        Returns:
+            dict: enabled, workers, max_tasks_per_child, max_queue, timeout and
+                  min_pages_per_range for the keys that are set.
+        """
+        expected_keys = {
+            "ENABLED": bool,
+            "WORKERS": int,
+            "MAX_TASKS_PER_CHILD": int,
+            "MAX_QUEUE": int,
+            "TIMEOUT": int,
+            "MIN_PAGES_PER_RANGE": int,
+        }
+        config = self._read_typed_env(prefix, expected_keys)
+        return {k: v for k, v in config.items() if v is not None}
+
+    def get_document_jobs_config(self, prefix="DOCUMENT_JOBS_") -> dict:
+        """
+        Retrieves the background document job settings from environment variables.
+
+        Args:
+            prefix (str): The prefix for job-related environment variables.
+
+        Returns:
+            dict: workers, in_process, poll_interval, stale_after and max_attempts
+                  for the keys that are set.
+        """
+        expected_keys = {
+            "WORKERS": int,
+            "IN_PROCESS": bool,
+            "POLL_INTERVAL": float,
+            "STALE_AFTER": int,
+            "MAX_ATTEMPTS": int,
+        }
+        config = self._read_typed_env(prefix, expected_keys)
+        return {k: v for k, v in config.items() if v is not None}
+
+    def get_document_batch_config(self, prefix="DOCUMENT_BATCH_") -> dict:
+        """
+        Retrieves the batch document processing settings from environment variables.
+
+        Args:
+            prefix (str): The prefix for batch-related environment variables.
+
+        Returns:
+            dict: download_concurrency, parse_concurrency, llm_concurrency,
+                  eam_concurrency and max_documents for the keys that are set.
+        """
+        expected_keys = {
+            "DOWNLOAD_CONCURRENCY": int,
+            "PARSE_CONCURRENCY": int,
+            "LLM_CONCURRENCY": int,
+            "EAM_CONCURRENCY": int,
+            "MAX_DOCUMENTS": int,
+        }
+        config = self._read_typed_env(prefix, expected_keys)
+        return {k: v for k, v in config.items() if v is not None}
+
+    def get_asset_sync_config(self, prefix="ASSET_SYNC_") -> dict:
+        """
+        Retrieves the incremental EAM asset sync settings from environment variables.
+
+        Args:
+            prefix (str): The prefix for asset sync-related environment variables.
+
+        Returns:
+            dict: page_size, fetch_concurrency, max_attempts, interval, grid_name
+                  and updated_field for the keys that are set.
+        """
+        expected_keys = {
+            "PAGE_SIZE": int,
+            "FETCH_CONCURRENCY": int,
+            "MAX_ATTEMPTS": int,
+            "INTERVAL": float,
+            "GRID_NAME": str,
+            "UPDATED_FIELD": str,
+        }
+        config = self._read_typed_env(prefix, expected_keys)
+        return {k: v for k, v in config.items() if v is not None}
+
+    def get_elasticsearch_config(self, prefix="ELASTICSEARCH_") -> dict:
+        """
+        Retrieves the Elasticsearch client settings from environment variables.
+
+        Args:
+            prefix (str): The prefix for Elasticsearch-related environment variables.
+
+        Returns:
+            dict: connections_per_node, request_timeout, max_retries, retry_on_timeout
+                  and http_compress for the keys that are set.
+        """
+        expected_keys = {
+            "CONNECTIONS_PER_NODE": int,
+            "REQUEST_TIMEOUT": float,
+            "MAX_RETRIES": int,
+            "RETRY_ON_TIMEOUT": bool,
+            "HTTP_COMPRESS": bool,
+        }
+        config = self._read_typed_env(prefix, expected_keys)
+        return {k: v for k, v in config.items() if v is not None}
+
+    @staticmethod
+    def _read_typed_env(prefix: str, expected_keys: dict) -> dict:
+        """Reads prefixed environment variables and casts them to the expected types."""
+        config = {}
         for key, key_type in expected_keys.items():
             env_var = f"{prefix}{key}"
             value = os.getenv(env_var)
@@ -51,6 +208,8 @@ class ConfigManager:
                         if value == '' and key_type in (int, float):
                             # Or set a default like 0 or 0.0 if appropriate
                             config[key.lower()] = None
+                        elif key_type is bool:
+                            config[key.lower()] = value.strip().lower() in ("1", "true", "yes", "on")
                         else:
                             config[key.lower()] = key_type(value)
                     else:
@@ -63,6 +222,4 @@ class ConfigManager:
             else:
                 # Set to None if the environment variable is not found
                 config[key.lower()] = None
-
-        # Filter out None values before returning, as get_llm handles defaults
-        return {k: v for k, v in config.items() if v is not None}
+        return config
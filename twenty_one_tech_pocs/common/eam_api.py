@@ -34,6 +34,49 @@ class EAMApiService:
         auth_bytes = auth_str.encode('ascii')
         return f"Basic {base64.b64encode(auth_bytes).decode('ascii')}"
 
+    def fetch_document_attachment(self, document_code: str) -> bytes:
+        """Fetch the file attached to an EAM document.
+
+        Args:
+            document_code: Code of the EAM document.
+
+        Returns:
+            The decoded file content.
+
+        Raises:
+            ValueError: If the request fails or the response has no FILECONTENT.
+        """
+        url = f"{self.base_url}/documentattachments"
+        headers = self.headers.copy()
+        headers["Authorization"] = self._get_auth()
+        headers["accept"] = "application/json"
+        payload = {"DOCUMENTCODE": document_code, "UPLOADTYPE": "MOBILE"}
+
+        try:
+            response = requests.put(url, json=payload, headers=headers)
+            response.raise_for_status()
+            eam_data = response.json()
+        except requests.exceptions.RequestException as e:
+            error_message = f"Failed to fetch document from EAM: {str(e)}"
+            if hasattr(e, 'response') and e.response is not None:
+                error_message += f" | Response: {e.response.text}"
+            logger.error(error_message)
+            raise ValueError(error_message)
+
+        file_content_base64 = (
+            eam_data.get("Result", {}).get("ResultData", {}).get("Attachment", {}).get("FILECONTENT")
+        )
+        if not file_content_base64:
+            error_detail = eam_data.get("ErrorAlert")
+            raise ValueError(
+                f"EAM API Error: {error_detail}" if error_detail else "FILECONTENT not found in EAM response."
+            )
+
+        try:
+            return base64.b64decode(file_content_base64)
+        except base64.binascii.Error as e:
+            raise ValueError(f"Failed to decode FILECONTENT: {str(e)}")
+
     def create_task_plan(self, task_plan):
         """Create a task plan in the EAM system."""
         url = f"{self.base_url}/tasks"
@@ -166,6 +209,39 @@ class EAMApiService:
             "PMDURATION": maintenance_schedule.duration
         }
 
+    def _get_record(self, path: str, organization_code: str = "*"):
+        """Fetch one EAM record by its id path.
+
+        Returns:
+            The record, or None if EAM answers 404.
+
+        Raises:
+            ValueError: If the request fails for another reason.
+        """
+        url = f"{self.base_url}/{path}"
+        headers = self.headers.copy()
+        headers["Authorization"] = self._get_auth()
+        headers["organization"] = organization_code
+        headers["accept"] = "application/json"
+
+        try:
+            response = requests.get(url, headers=headers)
+            if response.status_code == 404:
+                return None
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error looking up {path}: {str(e)}")
+            raise ValueError(f"Failed to look up {path}: {str(e)}")
+
+    def get_task_plan(self, task_code: str, revision: int = 0):
+        """Fetch a task plan, or None if it does not exist."""
+        return self._get_record(f"tasks/{task_code}%23{revision}%23*")
+
+    def get_maintenance_schedule(self, ppm_code: str, revision: int = 0):
+        """Fetch a maintenance schedule, or None if it does not exist."""
+        return self._get_record(f"pmschedulesforwork/{ppm_code}%23{revision}%23*")
+
     # --- Methods for Safety Procedure Assistant --- 
     def create_hazard(self, hazard_data: dict, organization_code: str = "*", max_retries: int = 5):
         """Create a hazard in the EAM system using the new payload structure.
@@ -353,6 +429,40 @@ class EAMApiService:
         
         # Step 5: Create the safety matrix link
         logger.info(f"Step 5: Creating safety matrix link for approved hazard {eam_hazard_code} and precaution {eam_precaution_code}")
+        result = self.create_safety_matrix(
+            eam_hazard_code=eam_hazard_code,
+            hazard_eam_type_code=hazard_eam_type_code,
+            eam_precaution_code=eam_precaution_code,
+            equipment_details=equipment_details,
+            organization_code=organization_code,
+            hazard_revision=hazard_revision,
+            precaution_revision=precaution_revision,
+            hazard_description=hazard_description,
+            precaution_description=precaution_description,
+        )
+        approval_results = {
+            "hazard_ra_result": hazard_ra_result,
+            "hazard_approval_result": hazard_approval_result,
+            "precaution_ra_result": precaution_ra_result,
+            "precaution_approval_result": precaution_approval_result
+        }
+        if "error" in result:
+            return {**result, **approval_results}
+        return {"status": "success", "safety_matrix_result": result, **approval_results}
+
+    def create_safety_matrix(self,
+                             eam_hazard_code: str, hazard_eam_type_code: str,
+                             eam_precaution_code: str,
+                             equipment_details: Optional[dict] = None,
+                             organization_code: str = "*",
+                             hazard_revision: int = 0,
+                             precaution_revision: int = 0,
+                             hazard_description: str = "",
+                             precaution_description: str = ""
+                             ):
+        """Creates the safety matrix record linking an approved hazard and precaution.
+        Returns the EAM response, or an error dict if the request failed.
+        """
         url = f"{self.base_url}/safetymatrix" 
         headers = self.headers.copy()
         headers["Authorization"] = self._get_auth()
@@ -410,14 +520,7 @@ class EAMApiService:
             response = requests.post(url, json=payload, headers=headers)
             response.raise_for_status()
             logger.info(f"Safety link record created successfully: {response.json()}")
-            return {
-                "status": "success",
-                "safety_matrix_result": response.json(),
-                "hazard_ra_result": hazard_ra_result,
-                "hazard_approval_result": hazard_approval_result,
-                "precaution_ra_result": precaution_ra_result,
-                "precaution_approval_result": precaution_approval_result
-            }
+            return response.json()
         except requests.exceptions.RequestException as e:
             logger.error(f"Error creating safety link record: {str(e)}")
             response_text = e.response.text if hasattr(e, 'response') and e.response is not None else "No response text"
@@ -426,11 +529,7 @@ class EAMApiService:
                 "error": str(e), 
                 "status": "failed", 
                 "payload_sent": payload, 
-                "response_text": response_text,
-                "hazard_ra_result": hazard_ra_result,
-                "hazard_approval_result": hazard_approval_result,
-                "precaution_ra_result": precaution_ra_result,
-                "precaution_approval_result": precaution_approval_result
+                "response_text": response_text
             }
 
     def get_equipment_categories(self, organization_code: str = "*"):
@@ -653,3 +752,6 @@ class EAMApiService:
                 "response_text": response_text
             }
 
+    def get_qualification(self, qualification_code: str, organization_code: str = "*"):
+        """Fetch a qualification, or None if it does not exist."""
+        return self._get_record(f"qualifications/{qualification_code}%23{organization_code}", organization_code)
@@ -0,0 +1,86 @@
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from .eam_api import EAMApiService
+from .eam_writes import EAMWrite, WriteResults, apply_write, maintenance_schedule_write, task_plan_writes
+from .llm_metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class TaskPlanCommitPipeline:
+    """
+    Background EAM commit stage for extracted task plans.
+
+    Task plans are submitted while the LLM is still streaming the rest of the
+    document, and a single worker creates them (and their checklists) in EAM in
+    submission order, so generation and EAM writes overlap. Each write is keyed
+    like the planned writes of the draft outbox: failed writes, and the writes
+    depending on them, are left to the outbox, which only replays those.
+    """
+
+    def __init__(self, eam_api: Optional[EAMApiService] = None, assistant: str = "unknown"):
+        self.eam_api = eam_api or EAMApiService()
+        self.assistant = assistant
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="eam-commit")
+        self._futures: List[Future] = []
+        self._started = time.monotonic()
+        # Only touched by the worker thread until finish() has shut it down
+        self._completed: WriteResults = {}
+        self._failed: Dict[str, str] = {}
+
+    def submit_maintenance_schedule(self, maintenance_schedule) -> None:
+        """Queues the creation of the maintenance schedule (before its task plans)."""
+        self._submit([maintenance_schedule_write(maintenance_schedule)])
+
+    def submit_task_plan(self, task_plan) -> None:
+        """Queues the creation of a task plan and its checklists."""
+        self._submit(task_plan_writes(task_plan))
+
+    def finish(self) -> WriteResults:
+        """
+        Waits for all queued writes.
+
+        Returns:
+            The EAM responses of the writes that succeeded, by write key.
+        """
+        try:
+            for future in self._futures:
+                future.result()
+        finally:
+            self._executor.shutdown(wait=True)
+            metrics.set_gauge("eam_commit_queue_depth", 0, {"assistant": self.assistant})
+        logger.info(
+            f"Committed {len(self._completed)} EAM writes ({len(self._failed)} failed); pipeline finished "
+            f"{time.monotonic() - self._started:.1f}s after it started"
+        )
+        return dict(self._completed)
+
+    def abort(self) -> None:
+        """Drops the writes that have not started yet (e.g. when the extraction failed)."""
+        for future in self._futures:
+            future.cancel()
+        self._executor.shutdown(wait=True)
+
+    def _submit(self, writes: List[EAMWrite]) -> None:
+        self._futures.append(self._executor.submit(self._apply_writes, writes))
+        metrics.set_gauge(
+            "eam_commit_queue_depth", self._pending_count(), {"assistant": self.assistant}
+        )
+
+    def _pending_count(self) -> int:
+        return sum(1 for future in self._futures if not future.done())
+
+    def _apply_writes(self, writes: List[EAMWrite]) -> None:
+        started = time.monotonic()
+        for write in writes:
+            if any(dependency not in self._completed for dependency in write.depends_on):
+                continue
+            try:
+                self._completed[write.key] = apply_write(self.eam_api, write, self._completed)
+            except Exception as e:
+                logger.warning(f"EAM write {write.key} failed, leaving it to the outbox: {e}")
+                self._failed[write.key] = str(e)
+        metrics.observe("eam_commit_seconds", time.monotonic() - started, {"assistant": self.assistant})
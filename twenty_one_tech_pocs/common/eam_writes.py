@@ -0,0 +1,238 @@
+import logging
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .eam_api import EAMApiService
+
+logger = logging.getLogger(__name__)
+
+# Responses of the writes already done, by write key
+WriteResults = Dict[str, dict]
+
+
+@dataclass(frozen=True)
+class EAMWrite:
+    """
+    One planned EAM write.
+
+    The key identifies the write within a commit and is derived from the extracted
+    codes, so planning the same extraction again gives the same keys. Writes listed
+    in depends_on must be done first; their responses provide the EAM codes and
+    revisions this write refers to.
+    """
+
+    key: str
+    operation: str
+    payload: dict
+    depends_on: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class EAMOperation:
+    apply: Callable[[EAMApiService, dict, WriteResults], dict]
+    # Looks up the record in EAM; used before resending a write whose earlier attempt may have succeeded
+    find: Optional[Callable[[EAMApiService, dict, WriteResults], Optional[dict]]] = None
+    # Sending it twice has the same effect as once (e.g. setting a status)
+    idempotent: bool = False
+
+
+class EAMWriteError(ValueError):
+    """An EAM write that failed; EAMApiService returns some failures as error dicts instead of raising."""
+
+    def __init__(self, message: str, response: Optional[dict] = None):
+        super().__init__(message)
+        self.response = response
+
+
+def task_plan_key(task_code: str) -> str:
+    return f"task_plan:{task_code}"
+
+
+def checklist_key(task_code: str, sequence: int) -> str:
+    return f"checklist:{task_code}:{sequence}"
+
+
+def maintenance_schedule_key(code: str) -> str:
+    return f"maintenance_schedule:{code}"
+
+
+def hazard_key(hazard_code: str) -> str:
+    return f"hazard:{hazard_code}"
+
+
+def precaution_key(precaution_code: str) -> str:
+    return f"precaution:{precaution_code}"
+
+
+def hazard_status_key(hazard_code: str, status_code: str) -> str:
+    return f"hazard_status:{hazard_code}:{status_code}"
+
+
+def precaution_status_key(precaution_code: str, status_code: str) -> str:
+    return f"precaution_status:{precaution_code}:{status_code}"
+
+
+def safety_matrix_key(link_index: int) -> str:
+    return f"safety_matrix:{link_index}"
+
+
+def qualification_key(qualification_code: str) -> str:
+    return f"qualification:{qualification_code}"
+
+
+def maintenance_schedule_write(maintenance_schedule) -> EAMWrite:
+    """The creation of a maintenance schedule (without its task plans)."""
+    return EAMWrite(
+        key=maintenance_schedule_key(maintenance_schedule.code),
+        operation="create_maintenance_schedule",
+        payload={
+            "code": maintenance_schedule.code,
+            "description": maintenance_schedule.description,
+            "duration": maintenance_schedule.duration,
+        },
+    )
+
+
+def task_plan_writes(task_plan) -> List[EAMWrite]:
+    """The creation of a task plan followed by its checklists, numbered 10, 20, ..."""
+    writes = [
+        EAMWrite(
+            key=task_plan_key(task_plan.task_code),
+            operation="create_task_plan",
+            payload={"task_code": task_plan.task_code, "description": task_plan.description},
+        )
+    ]
+    for i, checklist_item in enumerate(task_plan.checklist):
+        sequence = (i + 1) * 10
+        writes.append(
+            EAMWrite(
+                key=checklist_key(task_plan.task_code, sequence),
+                operation="create_checklist",
+                payload={
+                    "task_code": task_plan.task_code,
+                    "description": checklist_item.description,
+                    "sequence": sequence,
+                },
+                depends_on=(task_plan_key(task_plan.task_code),),
+            )
+        )
+    return writes
+
+
+def task_plan_summaries(task_plans: List[dict], results: WriteResults) -> List[dict]:
+    """One summary per task plan with the EAM responses of the plan and its checklists."""
+    summaries = []
+    for task_plan in task_plans:
+        summaries.append(
+            {
+                "task_code": task_plan["task_code"],
+                "description": task_plan["description"],
+                "api_response": results.get(task_plan_key(task_plan["task_code"])),
+                "checklists": [
+                    {
+                        "checklist_id": checklist_item["checklist_id"],
+                        "description": checklist_item["description"],
+                        "api_response": results.get(checklist_key(task_plan["task_code"], (i + 1) * 10)),
+                    }
+                    for i, checklist_item in enumerate(task_plan["checklist"])
+                ],
+            }
+        )
+    return summaries
+
+
+def apply_write(eam_api: EAMApiService, write: EAMWrite, results: WriteResults) -> dict:
+    """
+    Sends one write to EAM.
+
+    Args:
+        results: Responses of the writes it depends on.
+
+    Raises:
+        ValueError: The EAM error (EAMWriteError for failures EAM returned as a response).
+    """
+    response = OPERATIONS[write.operation].apply(eam_api, write.payload, results)
+    if isinstance(response, dict) and (response.get("error") or response.get("status") == "failed"):
+        raise EAMWriteError(f"{write.key}: {response.get('error') or 'EAM reported a failure'}", response)
+    return response
+
+
+def find_write(eam_api: EAMApiService, write: EAMWrite, results: WriteResults) -> Optional[dict]:
+    """The record of a write if it already exists in EAM, None if not or if it cannot be looked up."""
+    operation = OPERATIONS[write.operation]
+    if operation.find is None:
+        return None
+    return operation.find(eam_api, write.payload, results)
+
+
+def can_find(write: EAMWrite) -> bool:
+    return OPERATIONS[write.operation].find is not None
+
+
+def is_idempotent(write: EAMWrite) -> bool:
+    return OPERATIONS[write.operation].idempotent
+
+
+def _created_hazard(results: WriteResults, hazard_code: str) -> Tuple[str, int]:
+    # create_hazard may have moved to a later revision if the code already existed
+    response = results[hazard_key(hazard_code)]
+    return response.get("HAZARDCODE", hazard_code), response.get("revision_used", 0)
+
+
+def _created_precaution(results: WriteResults, precaution_code: str) -> Tuple[str, int]:
+    response = results[precaution_key(precaution_code)]
+    return response.get("PRECAUTIONCODE", precaution_code), response.get("revision_used", 0)
+
+
+def _update_hazard_status(eam_api: EAMApiService, payload: dict, results: WriteResults) -> dict:
+    eam_code, revision = _created_hazard(results, payload["hazard_code"])
+    return eam_api.update_hazard_status(eam_code, payload["status_code"], revision=revision)
+
+
+def _update_precaution_status(eam_api: EAMApiService, payload: dict, results: WriteResults) -> dict:
+    eam_code, revision = _created_precaution(results, payload["precaution_code"])
+    return eam_api.update_precaution_status(eam_code, payload["status_code"], revision=revision)
+
+
+def _create_safety_matrix(eam_api: EAMApiService, payload: dict, results: WriteResults) -> dict:
+    eam_hazard_code, hazard_revision = _created_hazard(results, payload["hazard_code"])
+    eam_precaution_code, precaution_revision = _created_precaution(results, payload["precaution_code"])
+    return eam_api.create_safety_matrix(
+        eam_hazard_code=eam_hazard_code,
+        hazard_eam_type_code=payload["hazard_eam_type_code"],
+        eam_precaution_code=eam_precaution_code,
+        equipment_details=payload.get("equipment_details"),
+        hazard_revision=hazard_revision,
+        precaution_revision=precaution_revision,
+        hazard_description=payload.get("hazard_description", ""),
+        precaution_description=payload.get("precaution_description", ""),
+    )
+
+
+OPERATIONS: Dict[str, EAMOperation] = {
+    "create_maintenance_schedule": EAMOperation(
+        apply=lambda eam_api, payload, results: eam_api.create_maintenance_schedule(SimpleNamespace(**payload)),
+        find=lambda eam_api, payload, results: eam_api.get_maintenance_schedule(payload["code"]),
+    ),
+    "create_task_plan": EAMOperation(
+        apply=lambda eam_api, payload, results: eam_api.create_task_plan(SimpleNamespace(**payload)),
+        find=lambda eam_api, payload, results: eam_api.get_task_plan(payload["task_code"]),
+    ),
+    "create_checklist": EAMOperation(
+        apply=lambda eam_api, payload, results: eam_api.create_checklist(
+            payload["task_code"], SimpleNamespace(description=payload["description"]), sequence=payload["sequence"]
+        ),
+    ),
+    "create_hazard": EAMOperation(apply=lambda eam_api, payload, results: eam_api.create_hazard(payload)),
+    "create_precaution": EAMOperation(apply=lambda eam_api, payload, results: eam_api.create_precaution(payload)),
+    "update_hazard_status": EAMOperation(apply=_update_hazard_status, idempotent=True),
+    "update_precaution_status": EAMOperation(apply=_update_precaution_status, idempotent=True),
+    "create_safety_matrix": EAMOperation(apply=_create_safety_matrix),
+    "create_qualification": EAMOperation(
+        apply=lambda eam_api, payload, results: eam_api.create_qualification(
+            payload, organization_code="*", class_code="*"
+        ),
+        find=lambda eam_api, payload, results: eam_api.get_qualification(payload["qualification_code"]),
+    ),
+}
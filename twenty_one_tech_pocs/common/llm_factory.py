@@ -1,6 +1,12 @@
+import threading
 from enum import Enum
 from langchain_openai import ChatOpenAI
 
+from .config_manager import ConfigManager
+from .llm_hedging import HedgedChatModel, HedgeStats
+from .llm_metrics import get_metrics_handler
+from .llm_scheduler import BATCH_LANE, INTERACTIVE_LANE, LLMScheduler, ScheduledChatModel
+
 # Optional import for Ollama - only needed if using Ollama models
 try:
     from langchain_ollama import ChatOllama
@@ -28,6 +34,35 @@ class LLMsEnum(Enum):
         return True
 
 
+# Hedging statistics are process-wide so latency history survives across requests
+_hedge_stats = {}
+_hedge_stats_lock = threading.Lock()
+
+# The scheduler is process-wide so all views share one concurrency and token budget
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def _get_scheduler():
+    """Returns the process-wide LLMScheduler, or None if scheduling is disabled."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            config = ConfigManager().get_scheduler_config()
+            if not config.get("enabled", True):
+                _scheduler = False
+            else:
+                _scheduler = LLMScheduler(
+                    max_concurrency=config.get("max_concurrency", 16),
+                    lane_concurrency={
+                        INTERACTIVE_LANE: config.get("interactive_concurrency", 12),
+                        BATCH_LANE: config.get("batch_concurrency", 4),
+                    },
+                    tokens_per_minute=config.get("tokens_per_minute", 0),
+                )
+        return _scheduler or None
+
+
 class LLMFactory:
     """Factory class to create LLM instances dynamically."""
 
@@ -47,13 +82,23 @@ class LLMFactory:
         max_tokens: int = None,
         timeout: int = 60,
         max_retries: int = 5,
+        lane: str = INTERACTIVE_LANE,
         **kwargs,
     ):
-        """Creates an LLM instance based on the provided name and parameters."""
+        """
+        Creates an LLM instance based on the provided name and parameters.
+
+        Calls are queued by the process-wide LLMScheduler in the given lane:
+        "interactive" for user-facing predictions, "batch" for document extraction.
+        Pass lane=None to bypass the scheduler.
+        """
         LLMsEnum.validate_llm(llm_name)  # Ensures the LLM name is valid
 
+        # Every model is instrumented (latency, tokens, cost) - see llm_metrics.py
+        kwargs["callbacks"] = list(kwargs.get("callbacks") or []) + [get_metrics_handler()]
+
         llm_creator = getattr(self, self._llms_mapping[llm_name])
-        return llm_creator(
+        llm = llm_creator(
             llm_name=llm_name,
             temperature=temperature,
             max_tokens=max_tokens,
@@ -62,6 +107,99 @@ class LLMFactory:
             **kwargs,
         )
 
+        scheduler = _get_scheduler()
+        if scheduler is None or lane is None:
+            return llm
+        return ScheduledChatModel(model=llm, scheduler=scheduler, lane=lane)
+
+    def get_configured_llm(self, lane: str = INTERACTIVE_LANE):
+        """
+        Creates the LLM configured by the LLM_* environment variables.
+
+        Raises:
+            ValueError: If LLM_NAME is not set.
+        """
+        llm_params = ConfigManager().get_llm_config()
+        if not llm_params.get("name"):
+            raise ValueError("LLM_NAME not found in environment variables.")
+        return self.get_llm(llm_name=llm_params.pop("name"), lane=lane, **llm_params)
+
+    def get_hedged_llm(
+        self,
+        llm_name: str,
+        hedge_llm_name: str,
+        temperature: float = 0.1,
+        max_tokens: int = None,
+        timeout: int = 60,
+        max_retries: int = 5,
+        hedge_percentile: float = 0.95,
+        initial_hedge_delay: float = 4.0,
+        min_hedge_delay: float = 1.0,
+        max_hedge_delay: float = 15.0,
+        hedge_kwargs: dict = None,
+        **kwargs,
+    ):
+        """
+        Creates a primary LLM hedged by a secondary backend.
+
+        If the primary model has not answered within its hedge_percentile latency
+        (clamped to [min_hedge_delay, max_hedge_delay]), the same request is sent to
+        hedge_llm_name and the first answer wins.
+
+        Args:
+            llm_name (str): The primary model (e.g. "gpt-4o").
+            hedge_llm_name (str): The secondary model (e.g. "gpt-4o-mini", "tgi", "llama3").
+            hedge_kwargs (dict, optional): Provider arguments for the secondary model
+                (api_key, base_url, ...). Defaults to the primary model's kwargs.
+        """
+        LLMsEnum.validate_llm(hedge_llm_name)
+        primary = self.get_llm(
+            llm_name,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=timeout,
+            max_retries=max_retries,
+            **kwargs,
+        )
+        secondary = self.get_llm(
+            hedge_llm_name,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=timeout,
+            max_retries=max_retries,
+            **(kwargs if hedge_kwargs is None else hedge_kwargs),
+        )
+        return HedgedChatModel(
+            primary=primary,
+            secondary=secondary,
+            hedge_percentile=hedge_percentile,
+            initial_hedge_delay=initial_hedge_delay,
+            min_hedge_delay=min_hedge_delay,
+            max_hedge_delay=max_hedge_delay,
+            stats=self._get_hedge_stats(llm_name, hedge_llm_name),
+        )
+
+    @staticmethod
+    def _get_hedge_stats(llm_name: str, hedge_llm_name: str) -> HedgeStats:
+        key = f"{llm_name}->{hedge_llm_name}"
+        with _hedge_stats_lock:
+            if key not in _hedge_stats:
+                _hedge_stats[key] = HedgeStats()
+            return _hedge_stats[key]
+
+    @staticmethod
+    def get_hedge_stats() -> dict:
+        """Returns hedge rate and win rates per primary->secondary pair."""
+        with _hedge_stats_lock:
+            stats = dict(_hedge_stats)
+        return {key: value.snapshot() for key, value in stats.items()}
+
+    @staticmethod
+    def get_scheduler_stats() -> dict:
+        """Returns in-flight and waiting calls per lane and the remaining token budget."""
+        scheduler = _get_scheduler()
+        return scheduler.snapshot() if scheduler else {"enabled": False}
+
     @staticmethod
     def _create_ollama_llm(
         llm_name: str,
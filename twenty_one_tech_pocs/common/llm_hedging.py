@@ -0,0 +1,224 @@
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, List, Optional
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import Field
+
+logger = logging.getLogger(__name__)
+
+# Shared by all hedged models. Sync losers cannot be interrupted mid-request, so
+# they finish (bounded by the model timeout) in the background and are discarded.
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+# Abandoned losers running at once; past it no new hedge starts, so most of the
+# pool stays free for new primary calls
+MAX_ABANDONED_CALLS = 8
+
+
+class _AbandonedCalls:
+    """Counts the losing sync calls still running in _executor."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def add(self, future) -> None:
+        with self._lock:
+            self.count += 1
+        future.add_done_callback(self._done)
+
+    def _done(self, future) -> None:
+        with self._lock:
+            self.count -= 1
+
+
+_abandoned = _AbandonedCalls()
+
+
+class HedgeStats:
+    """Thread-safe hedging counters and a rolling window of primary latencies."""
+
+    def __init__(self, window_size: int = 200):
+        self._lock = threading.Lock()
+        self._primary_latencies = deque(maxlen=window_size)
+        self.requests = 0
+        self.hedged = 0
+        self.primary_wins = 0
+        self.secondary_wins = 0
+        self.failures = 0
+
+    def record_primary_latency(self, seconds: float) -> None:
+        with self._lock:
+            self._primary_latencies.append(seconds)
+
+    def record_result(self, hedged: bool, winner: Optional[str]) -> None:
+        with self._lock:
+            self.requests += 1
+            if hedged:
+                self.hedged += 1
+            if winner == "primary":
+                self.primary_wins += 1
+            elif winner == "secondary":
+                self.secondary_wins += 1
+            else:
+                self.failures += 1
+
+    def hedge_delay(
+        self, percentile: float, initial_delay: float, min_delay: float, max_delay: float, min_samples: int = 20
+    ) -> float:
+        """Returns the primary latency at the given percentile, clamped to [min_delay, max_delay]."""
+        with self._lock:
+            samples = sorted(self._primary_latencies)
+        if len(samples) < min_samples:
+            return initial_delay
+        index = min(int(percentile * len(samples)), len(samples) - 1)
+        return min(max(samples[index], min_delay), max_delay)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            requests = self.requests or 1
+            hedged = self.hedged or 1
+            return {
+                "requests": self.requests,
+                "hedged": self.hedged,
+                "hedge_rate": self.hedged / requests,
+                "primary_wins": self.primary_wins,
+                "secondary_wins": self.secondary_wins,
+                # Share of hedged requests answered first by the secondary backend
+                "secondary_win_rate": self.secondary_wins / hedged if self.hedged else 0.0,
+                "failures": self.failures,
+            }
+
+
+class HedgedChatModel(BaseChatModel):
+    """
+    Chat model that hedges a slow primary model with a secondary backend.
+
+    The primary model is called first. If it has not answered after the hedge delay
+    (the configured percentile of its recent latencies), or if it fails, the same
+    messages are sent to the secondary model and whichever answers first wins.
+    """
+
+    primary: BaseChatModel
+    secondary: BaseChatModel
+    hedge_percentile: float = 0.95
+    initial_hedge_delay: float = 4.0
+    min_hedge_delay: float = 1.0
+    max_hedge_delay: float = 15.0
+    stats: HedgeStats = Field(default_factory=HedgeStats)
+
+    @property
+    def _llm_type(self) -> str:
+        return "hedged-chat-model"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {
+            "primary": self.primary._llm_type,
+            "secondary": self.secondary._llm_type,
+            "hedge_percentile": self.hedge_percentile,
+        }
+
+    def _hedge_delay(self) -> float:
+        return self.stats.hedge_delay(
+            self.hedge_percentile, self.initial_hedge_delay, self.min_hedge_delay, self.max_hedge_delay
+        )
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        started = time.monotonic()
+
+        def call(model):
+            return model.invoke(messages, stop=stop, **kwargs)
+
+        def on_primary_done(future):
+            # Record the real primary latency even when it lost the race
+            if not future.cancelled() and future.exception() is None:
+                self.stats.record_primary_latency(time.monotonic() - started)
+
+        primary_future = _executor.submit(contextvars.copy_context().run, call, self.primary)
+        primary_future.add_done_callback(on_primary_done)
+        futures = {primary_future: "primary"}
+
+        done, _ = wait([primary_future], timeout=self._hedge_delay())
+        if not done and _abandoned.count >= MAX_ABANDONED_CALLS:
+            logger.warning(f"{_abandoned.count} abandoned hedged calls still running; waiting for the primary only")
+        elif not done or primary_future.exception() is not None:
+            if done:
+                logger.warning(f"Primary model failed, falling back: {primary_future.exception()}")
+            secondary_future = _executor.submit(contextvars.copy_context().run, call, self.secondary)
+            futures[secondary_future] = "secondary"
+
+        pending = set(futures)
+        last_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    last_error = future.exception()
+                    continue
+                winner = futures[future]
+                for loser in pending:
+                    # Only cancels a loser that has not started yet; a running call is abandoned
+                    if not loser.cancel():
+                        _abandoned.add(loser)
+                self.stats.record_result(hedged=len(futures) > 1, winner=winner)
+                logger.debug(f"Hedged request answered by {winner} in {time.monotonic() - started:.2f}s")
+                return ChatResult(generations=[ChatGeneration(message=future.result())])
+
+        self.stats.record_result(hedged=len(futures) > 1, winner=None)
+        raise last_error
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        started = time.monotonic()
+
+        async def call(model, record_latency=False):
+            result = await model.ainvoke(messages, stop=stop, **kwargs)
+            if record_latency:
+                self.stats.record_primary_latency(time.monotonic() - started)
+            return result
+
+        primary_task = asyncio.ensure_future(call(self.primary, record_latency=True))
+        tasks = {primary_task: "primary"}
+
+        done, _ = await asyncio.wait([primary_task], timeout=self._hedge_delay())
+        if not done or primary_task.exception() is not None:
+            tasks[asyncio.ensure_future(call(self.secondary))] = "secondary"
+
+        pending = set(tasks)
+        last_error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    last_error = task.exception()
+                    continue
+                for loser in pending:
+                    loser.cancel()
+                self.stats.record_result(hedged=len(tasks) > 1, winner=tasks[task])
+                return ChatResult(generations=[ChatGeneration(message=task.result())])
+
+        self.stats.record_result(hedged=len(tasks) > 1, winner=None)
+        raise last_error
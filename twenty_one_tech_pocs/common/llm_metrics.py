@@ -0,0 +1,350 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from .tokens import get_token_usage
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536, 131072)
+COST_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10)
+
+# USD per 1M tokens: (input, cached input, output). Unknown models are costed at 0.
+MODEL_PRICES_PER_MILLION = {
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+}
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for index, upper_bound in enumerate(self.buckets):
+            if value <= upper_bound:
+                self.bucket_counts[index] += 1
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": {str(bound): count for bound, count in zip(self.buckets, self.bucket_counts)},
+        }
+
+
+class MetricsRegistry:
+    """Process-wide registry of labelled counters, gauges and histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[tuple, float] = {}
+        self._gauges: Dict[tuple, float] = {}
+        self._histograms: Dict[tuple, Histogram] = {}
+
+    @staticmethod
+    def _key(name: str, labels: Optional[dict]) -> tuple:
+        return (name, tuple(sorted((labels or {}).items())))
+
+    def increment(self, name: str, labels: Optional[dict] = None, amount: float = 1) -> None:
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def set_gauge(self, name: str, value: float, labels: Optional[dict] = None) -> None:
+        with self._lock:
+            self._gauges[self._key(name, labels)] = value
+
+    def observe(self, name: str, value: float, labels: Optional[dict] = None, buckets=LATENCY_BUCKETS) -> None:
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def snapshot(self) -> dict:
+        """Returns all metrics as JSON-serializable data."""
+        with self._lock:
+            return {
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(self._counters.items())
+                ],
+                "gauges": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(self._gauges.items())
+                ],
+                "histograms": [
+                    {"name": name, "labels": dict(labels), **histogram.to_dict()}
+                    for (name, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0])
+                ],
+            }
+
+    def to_prometheus(self) -> str:
+        """Renders all metrics in the Prometheus text exposition format."""
+
+        def render_labels(labels, extra=None):
+            pairs = list(labels) + list((extra or {}).items())
+            if not pairs:
+                return ""
+            escaped = [f'{key}="{str(value).replace(chr(34), chr(39))}"' for key, value in pairs]
+            return "{" + ",".join(escaped) + "}"
+
+        lines = []
+        with self._lock:
+            for (name, labels), value in sorted(self._counters.items()):
+                lines.append(f"{name}{render_labels(labels)} {value}")
+            for (name, labels), value in sorted(self._gauges.items()):
+                lines.append(f"{name}{render_labels(labels)} {value}")
+            for (name, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0]):
+                for bound, count in zip(histogram.buckets, histogram.bucket_counts):
+                    lines.append(f"{name}_bucket{render_labels(labels, {'le': bound})} {count}")
+                lines.append(f"{name}_bucket{render_labels(labels, {'le': '+Inf'})} {histogram.count}")
+                lines.append(f"{name}_sum{render_labels(labels)} {histogram.sum}")
+                lines.append(f"{name}_count{render_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+# Endpoint and prompt of the LLM calls made in the current request/task
+_call_context: ContextVar[dict] = ContextVar("llm_call_context", default={})
+# Retry counter of the LLM call running in the current context
+_retry_counter: ContextVar[Optional[list]] = ContextVar("llm_retry_counter", default=None)
+# Token totals of the LLM calls made inside the current track_llm_usage block
+_usage_totals: ContextVar[Optional[dict]] = ContextVar("llm_usage_totals", default=None)
+
+
+@contextmanager
+def llm_call_context(**values):
+    """
+    Attributes the LLM calls made inside the block (e.g. endpoint=..., prompt_name=...).
+
+    Nested blocks inherit and override the outer values.
+    """
+    token = _call_context.set({**_call_context.get(), **values})
+    try:
+        yield
+    finally:
+        _call_context.reset(token)
+
+
+def update_call_context(**values) -> None:
+    """Updates the current call context in place (until the enclosing llm_call_context exits)."""
+    _call_context.set({**_call_context.get(), **values})
+
+
+def get_call_context() -> dict:
+    return dict(_call_context.get())
+
+
+@contextmanager
+def track_llm_usage():
+    """
+    Totals the LLM calls made inside the block (including threads started with a copied context).
+
+    Yields a dict with calls, input_tokens, output_tokens and cost_usd, updated as
+    the calls finish; e.g. the token usage of one document of a batch.
+    """
+    totals = {"calls": 0, "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0}
+    token = _usage_totals.set(totals)
+    try:
+        yield totals
+    finally:
+        _usage_totals.reset(token)
+
+
+def estimate_cost(model: Optional[str], input_tokens: int, output_tokens: int, cached_tokens: int = 0) -> float:
+    """Estimates the USD cost of a call from MODEL_PRICES_PER_MILLION."""
+    prices = MODEL_PRICES_PER_MILLION.get(model or "")
+    if not prices:
+        return 0.0
+    input_price, cached_price, output_price = prices
+    cached_tokens = min(cached_tokens or 0, input_tokens or 0)
+    uncached_tokens = (input_tokens or 0) - cached_tokens
+    return (uncached_tokens * input_price + cached_tokens * cached_price + (output_tokens or 0) * output_price) / 1_000_000
+
+
+class _OpenAIRetryCounter(logging.Handler):
+    """Counts the openai client's internal retries ("Retrying request to ...") per call."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        counter = _retry_counter.get()
+        if counter is not None and str(record.msg).startswith("Retrying request"):
+            counter[0] += 1
+
+
+class LLMMetricsCallbackHandler(BaseCallbackHandler):
+    """
+    Records latency, token usage and cost for every chat model call.
+
+    Calls are labelled with the endpoint and prompt name taken from the run metadata
+    ("endpoint", "prompt_name") or from llm_call_context. Metrics go to the process
+    registry, and optionally one JSON line per call to LLM_TRACE_FILE.
+    """
+
+    def __init__(self, registry: MetricsRegistry = metrics, trace_file: Optional[str] = None):
+        self.registry = registry
+        self.trace_file = trace_file
+        self._runs: Dict[UUID, dict] = {}
+        self._lock = threading.Lock()
+        self._trace_lock = threading.Lock()
+
+    def on_chat_model_start(
+        self,
+        serialized: Dict[str, Any],
+        messages: List[list],
+        *,
+        run_id: UUID,
+        tags: Optional[List[str]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> Any:
+        metadata = metadata or {}
+        context = get_call_context()
+        invocation_params = kwargs.get("invocation_params") or {}
+        retry_counter = [0]
+        _retry_counter.set(retry_counter)
+        with self._lock:
+            self._runs[run_id] = {
+                "started": time.monotonic(),
+                "first_token": None,
+                "endpoint": metadata.get("endpoint") or context.get("endpoint") or "unknown",
+                "prompt_name": metadata.get("prompt_name") or context.get("prompt_name") or "unknown",
+                "model": invocation_params.get("model")
+                or invocation_params.get("model_name")
+                or metadata.get("ls_model_name")
+                or "unknown",
+                "queue_time": metadata.get("llm_queue_time", context.get("llm_queue_time", 0.0)),
+                "retries": retry_counter,
+                "usage_totals": _usage_totals.get(),
+            }
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> Any:
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run and run["first_token"] is None:
+                run["first_token"] = time.monotonic()
+
+    def on_retry(self, retry_state: Any, *, run_id: UUID, **kwargs: Any) -> Any:
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run:
+                run["retries"][0] += 1
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> Any:
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        usage = {"input_tokens": None, "output_tokens": None, "cached_tokens": None}
+        if response.generations and response.generations[0]:
+            usage = get_token_usage(getattr(response.generations[0][0], "message", None))
+        if usage["input_tokens"] is None and response.llm_output:
+            token_usage = response.llm_output.get("token_usage") or {}
+            usage["input_tokens"] = token_usage.get("prompt_tokens")
+            usage["output_tokens"] = token_usage.get("completion_tokens")
+        self._record(run, usage, error=None)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> Any:
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        self._record(run, {"input_tokens": None, "output_tokens": None, "cached_tokens": None}, error=error)
+
+    def _record(self, run: dict, usage: dict, error: Optional[BaseException]) -> None:
+        now = time.monotonic()
+        latency = now - run["started"]
+        ttft = run["first_token"] - run["started"] if run["first_token"] else None
+        input_tokens = usage["input_tokens"] or 0
+        output_tokens = usage["output_tokens"] or 0
+        cached_tokens = usage["cached_tokens"] or 0
+        cost = estimate_cost(run["model"], input_tokens, output_tokens, cached_tokens)
+        retries = run["retries"][0]
+        labels = {"endpoint": run["endpoint"], "prompt": run["prompt_name"], "model": run["model"]}
+
+        registry = self.registry
+        registry.increment("llm_calls_total", labels)
+        if error is not None:
+            registry.increment("llm_errors_total", labels)
+        registry.observe("llm_latency_seconds", latency, labels)
+        registry.observe("llm_queue_time_seconds", run["queue_time"] or 0.0, labels)
+        if ttft is not None:
+            registry.observe("llm_time_to_first_token_seconds", ttft, labels)
+        registry.observe("llm_input_tokens", input_tokens, labels, buckets=TOKEN_BUCKETS)
+        registry.observe("llm_output_tokens", output_tokens, labels, buckets=TOKEN_BUCKETS)
+        registry.observe("llm_cached_tokens", cached_tokens, labels, buckets=TOKEN_BUCKETS)
+        registry.observe("llm_cost_usd", cost, labels, buckets=COST_BUCKETS)
+        registry.observe("llm_retries", retries, labels, buckets=COUNT_BUCKETS)
+        registry.increment("llm_input_tokens_total", labels, input_tokens)
+        registry.increment("llm_output_tokens_total", labels, output_tokens)
+        registry.increment("llm_cached_tokens_total", labels, cached_tokens)
+        registry.increment("llm_cost_usd_total", labels, cost)
+
+        totals = run.get("usage_totals")
+        if totals is not None:
+            with self._lock:
+                totals["calls"] += 1
+                totals["input_tokens"] += input_tokens
+                totals["output_tokens"] += output_tokens
+                totals["cost_usd"] += cost
+
+        if self.trace_file:
+            self._write_trace({
+                "timestamp": time.time(),
+                **labels,
+                "queue_time": run["queue_time"],
+                "time_to_first_token": ttft,
+                "latency": latency,
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "cached_tokens": cached_tokens,
+                "cost_usd": cost,
+                "retries": retries,
+                "error": str(error) if error is not None else None,
+            })
+
+    def _write_trace(self, record: dict) -> None:
+        try:
+            with self._trace_lock, open(self.trace_file, "a", encoding="utf-8") as trace:
+                trace.write(json.dumps(record) + "\n")
+        except OSError as e:
+            logger.error(f"Could not write LLM trace to {self.trace_file}: {e}")
+
+
+_handler: Optional[LLMMetricsCallbackHandler] = None
+_handler_lock = threading.Lock()
+
+
+def get_metrics_handler() -> LLMMetricsCallbackHandler:
+    """Returns the process-wide metrics callback handler (created on first use)."""
+    global _handler
+    with _handler_lock:
+        if _handler is None:
+            _handler = LLMMetricsCallbackHandler(trace_file=os.getenv("LLM_TRACE_FILE") or None)
+            # The openai client logs its internal retries at INFO level
+            openai_logger = logging.getLogger("openai._base_client")
+            openai_logger.addHandler(_OpenAIRetryCounter())
+            if openai_logger.level == logging.NOTSET or openai_logger.level > logging.INFO:
+                openai_logger.setLevel(logging.INFO)
+        return _handler
@@ -0,0 +1,263 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Iterator, List, Optional, Tuple
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from .llm_metrics import metrics
+from .tokens import count_tokens, get_token_usage
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE_LANE = "interactive"
+BATCH_LANE = "batch"
+# Highest priority first
+LANES = (INTERACTIVE_LANE, BATCH_LANE)
+
+# Output tokens reserved for a call that does not set max_tokens
+DEFAULT_OUTPUT_TOKENS = 1024
+
+
+class LLMScheduler:
+    """
+    Process-wide admission control for LLM calls.
+
+    Every call takes a slot in a lane before it is sent to the provider. A call is
+    admitted when its lane and the process are under their concurrency caps, no
+    higher-priority lane has calls waiting, and the tokens-per-minute budget has
+    room for its estimated tokens. Interactive calls therefore always go first and
+    document extraction only uses the capacity they leave.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 16,
+        lane_concurrency: Optional[dict] = None,
+        tokens_per_minute: int = 0,
+    ):
+        """
+        Args:
+            max_concurrency (int): Maximum calls in flight across all lanes.
+            lane_concurrency (dict, optional): Maximum calls in flight per lane.
+            tokens_per_minute (int): Token budget shared by all lanes; 0 disables it.
+        """
+        self.max_concurrency = max_concurrency
+        self.lane_concurrency = {INTERACTIVE_LANE: 12, BATCH_LANE: 4, **(lane_concurrency or {})}
+        self.tokens_per_minute = tokens_per_minute
+        self._condition = threading.Condition()
+        self._in_flight = {lane: 0 for lane in LANES}
+        self._waiting = {lane: 0 for lane in LANES}
+        self._available_tokens = float(tokens_per_minute)
+        self._last_refill = time.monotonic()
+
+    def acquire(self, lane: str, estimated_tokens: int = 0) -> float:
+        """
+        Blocks until a call in the lane may start.
+
+        Returns:
+            float: The seconds spent waiting in the queue.
+        """
+        self._validate_lane(lane)
+        # A single call larger than the whole budget waits for a full bucket instead of forever
+        tokens = min(estimated_tokens, self.tokens_per_minute) if self.tokens_per_minute else 0
+        started = time.monotonic()
+        with self._condition:
+            self._waiting[lane] += 1
+            self._publish_gauges(lane)
+            try:
+                while True:
+                    admitted, retry_after = self._try_admit(lane, tokens)
+                    if admitted:
+                        break
+                    self._condition.wait(timeout=retry_after)
+            finally:
+                self._waiting[lane] -= 1
+                self._publish_gauges(lane)
+                # Lower-priority lanes may have been held back by this call
+                self._condition.notify_all()
+
+        wait_time = time.monotonic() - started
+        metrics.observe("llm_scheduler_queue_seconds", wait_time, {"lane": lane})
+        if wait_time > 1:
+            logger.debug(f"LLM call waited {wait_time:.2f}s in the {lane} lane")
+        return wait_time
+
+    def release(self, lane: str, estimated_tokens: int = 0, used_tokens: Optional[int] = None) -> None:
+        """Frees the call's slot and settles its token estimate against the real usage."""
+        with self._condition:
+            self._in_flight[lane] -= 1
+            if self.tokens_per_minute and used_tokens is not None:
+                reserved = min(estimated_tokens, self.tokens_per_minute)
+                self._available_tokens = min(
+                    self._available_tokens + reserved - used_tokens, float(self.tokens_per_minute)
+                )
+            self._publish_gauges(lane)
+            self._condition.notify_all()
+
+    async def acquire_async(self, lane: str, estimated_tokens: int = 0) -> float:
+        """Async variant of acquire; waits in a worker thread so the event loop stays free."""
+        future = asyncio.ensure_future(asyncio.to_thread(self.acquire, lane, estimated_tokens))
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # The slot is granted even if the caller went away - hand it back once it is
+            future.add_done_callback(
+                lambda done: done.cancelled() or done.exception() or self.release(lane, estimated_tokens)
+            )
+            raise
+
+    def snapshot(self) -> dict:
+        with self._condition:
+            self._refill()
+            return {
+                "max_concurrency": self.max_concurrency,
+                "tokens_per_minute": self.tokens_per_minute,
+                "available_tokens": int(self._available_tokens) if self.tokens_per_minute else None,
+                "lanes": {
+                    lane: {
+                        "concurrency": self.lane_concurrency[lane],
+                        "in_flight": self._in_flight[lane],
+                        "waiting": self._waiting[lane],
+                    }
+                    for lane in LANES
+                },
+            }
+
+    def _try_admit(self, lane: str, tokens: int) -> Tuple[bool, Optional[float]]:
+        """
+        Admits the call if possible.
+
+        Returns:
+            Tuple[bool, Optional[float]]: Whether the call was admitted, and otherwise how
+            long to wait for tokens to refill (None to wait until another call finishes).
+        """
+        if self._in_flight[lane] >= self.lane_concurrency[lane]:
+            return False, None
+        if sum(self._in_flight.values()) >= self.max_concurrency:
+            return False, None
+        if any(self._waiting[higher_lane] for higher_lane in LANES[: LANES.index(lane)]):
+            return False, None
+
+        if self.tokens_per_minute:
+            self._refill()
+            if self._available_tokens < tokens:
+                refill_rate = self.tokens_per_minute / 60
+                return False, max((tokens - self._available_tokens) / refill_rate, 0.01)
+            self._available_tokens -= tokens
+
+        self._in_flight[lane] += 1
+        return True, None
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        refill = (now - self._last_refill) * self.tokens_per_minute / 60
+        self._available_tokens = min(self._available_tokens + refill, float(self.tokens_per_minute))
+        self._last_refill = now
+
+    def _publish_gauges(self, lane: str) -> None:
+        metrics.set_gauge("llm_scheduler_in_flight", self._in_flight[lane], {"lane": lane})
+        metrics.set_gauge("llm_scheduler_waiting", self._waiting[lane], {"lane": lane})
+
+    @staticmethod
+    def _validate_lane(lane: str) -> None:
+        if lane not in LANES:
+            raise ValueError(f"Invalid LLM lane: {lane}. Expected one of {LANES}")
+
+
+class ScheduledChatModel(BaseChatModel):
+    """Chat model that waits for an LLMScheduler slot before calling the wrapped model."""
+
+    model: BaseChatModel
+    scheduler: LLMScheduler
+    lane: str = INTERACTIVE_LANE
+    max_output_tokens: int = DEFAULT_OUTPUT_TOKENS
+
+    @property
+    def _llm_type(self) -> str:
+        return "scheduled-chat-model"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"model": self.model._llm_type, "lane": self.lane}
+
+    def _estimate_tokens(self, messages: List[BaseMessage]) -> int:
+        model_name = getattr(self.model, "model_name", None) or getattr(self.model, "model", None)
+        prompt_tokens = sum(count_tokens(str(message.content), model_name) for message in messages)
+        return prompt_tokens + (getattr(self.model, "max_tokens", None) or self.max_output_tokens)
+
+    @staticmethod
+    def _used_tokens(message) -> Optional[int]:
+        usage = get_token_usage(message)
+        if usage["input_tokens"] is None:
+            return None
+        return usage["input_tokens"] + (usage["output_tokens"] or 0)
+
+    @staticmethod
+    def _queue_config(wait_time: float) -> dict:
+        # Picked up by LLMMetricsCallbackHandler as the call's queue time
+        return {"metadata": {"llm_queue_time": wait_time}}
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        estimated_tokens = self._estimate_tokens(messages)
+        wait_time = self.scheduler.acquire(self.lane, estimated_tokens)
+        used_tokens = None
+        try:
+            message = self.model.invoke(messages, config=self._queue_config(wait_time), stop=stop, **kwargs)
+            used_tokens = self._used_tokens(message)
+            return ChatResult(generations=[ChatGeneration(message=message)])
+        finally:
+            self.scheduler.release(self.lane, estimated_tokens, used_tokens)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        estimated_tokens = self._estimate_tokens(messages)
+        wait_time = await self.scheduler.acquire_async(self.lane, estimated_tokens)
+        used_tokens = None
+        try:
+            message = await self.model.ainvoke(
+                messages, config=self._queue_config(wait_time), stop=stop, **kwargs
+            )
+            used_tokens = self._used_tokens(message)
+            return ChatResult(generations=[ChatGeneration(message=message)])
+        finally:
+            self.scheduler.release(self.lane, estimated_tokens, used_tokens)
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        estimated_tokens = self._estimate_tokens(messages)
+        wait_time = self.scheduler.acquire(self.lane, estimated_tokens)
+        aggregate: Optional[AIMessageChunk] = None
+        try:
+            # The slot is held until the stream is exhausted or closed
+            for chunk in self.model.stream(messages, config=self._queue_config(wait_time), stop=stop, **kwargs):
+                aggregate = chunk if aggregate is None else aggregate + chunk
+                if run_manager:
+                    run_manager.on_llm_new_token(str(chunk.content), chunk=ChatGenerationChunk(message=chunk))
+                yield ChatGenerationChunk(message=chunk)
+        finally:
+            used_tokens = self._used_tokens(aggregate) if aggregate is not None else None
+            self.scheduler.release(self.lane, estimated_tokens, used_tokens)
@@ -0,0 +1,18 @@
+from .llm_metrics import llm_call_context, update_call_context
+
+
+class LLMCallContextMiddleware:
+    """Labels every LLM call made while handling a request with the endpoint's URL name."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # Scope the call context to this request; process_view fills in the endpoint
+        with llm_call_context():
+            return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        update_call_context(endpoint=(match.url_name or match.view_name) if match else request.path)
+        return None
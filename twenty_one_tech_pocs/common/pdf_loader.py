@@ -0,0 +1,201 @@
+import logging
+import os
+import re
+import tempfile
+import unicodedata
+from typing import List, Optional, Sequence
+
+from langchain_core.documents import Document
+
+# Optional import for pypdf - without it every page goes through Unstructured
+try:
+    from pypdf import PdfReader, PdfWriter
+    PYPDF_AVAILABLE = True
+except ImportError:
+    PYPDF_AVAILABLE = False
+    PdfReader = PdfWriter = None
+
+# Optional import for Unstructured - only needed for scanned or badly encoded pages
+try:
+    from langchain_community.document_loaders import UnstructuredPDFLoader
+    from unstructured.partition.pdf import partition_pdf  # noqa: F401 - checks the pdf extra is installed
+    UNSTRUCTURED_AVAILABLE = True
+except ImportError:
+    UNSTRUCTURED_AVAILABLE = False
+    UnstructuredPDFLoader = None
+
+logger = logging.getLogger(__name__)
+
+TEXT_LAYER = "text_layer"
+UNSTRUCTURED = "unstructured"
+
+DEFAULT_MIN_CHARS_PER_PAGE = 100
+DEFAULT_MAX_GARBAGE_RATIO = 0.2
+
+# Glyphs pdf text extraction emits for fonts without a usable unicode map
+_CID_PATTERN = re.compile(r"\(cid:\d+\)")
+_TRAILING_SPACES_PATTERN = re.compile(r"[ \t]+\n")
+_BLANK_LINES_PATTERN = re.compile(r"\n{3,}")
+_HYPHENATED_BREAK_PATTERN = re.compile(r"(\w)-\n(\w)")
+
+
+def clean_text(text: str) -> str:
+    """Normalizes extracted page text: unicode form, hyphenated line breaks and blank lines."""
+    text = unicodedata.normalize("NFKC", text or "").replace("\x00", "")
+    text = _HYPHENATED_BREAK_PATTERN.sub(r"\1\2", text)
+    text = _TRAILING_SPACES_PATTERN.sub("\n", text)
+    text = _BLANK_LINES_PATTERN.sub("\n\n", text)
+    return text.strip()
+
+
+def score_page_text(text: str) -> dict:
+    """
+    Scores the extraction quality of one page.
+
+    Returns:
+        dict: chars (non-whitespace characters) and garbage_ratio, the share of
+              characters that are replacement glyphs, (cid:n) codes, control or
+              private-use characters.
+    """
+    cid_chars = sum(len(match) for match in _CID_PATTERN.findall(text))
+    visible = [char for char in _CID_PATTERN.sub("", text) if not char.isspace()]
+    garbage = sum(
+        1
+        for char in visible
+        if char == "\ufffd" or unicodedata.category(char) in ("Cc", "Co", "Cs", "Cn")
+    )
+    total = len(visible) + cid_chars
+    return {
+        "chars": total,
+        "garbage_ratio": (garbage + cid_chars) / total if total else 1.0,
+    }
+
+
+class TieredPDFLoader:
+    """
+    PDF loader that only pays for Unstructured where the text layer is not good enough.
+
+    Every page is first read from the PDF text layer with pypdf. Pages with too few
+    characters (scans, image-only pages) or too many unreadable glyphs are re-parsed
+    with Unstructured (which OCRs them if needed). The result is one Document per
+    page, in page order, with the page number and the tier used in the metadata.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        min_chars_per_page: int = DEFAULT_MIN_CHARS_PER_PAGE,
+        max_garbage_ratio: float = DEFAULT_MAX_GARBAGE_RATIO,
+        pages: Optional[Sequence[int]] = None,
+        unstructured_kwargs: Optional[dict] = None,
+    ):
+        """
+        Args:
+            file_path: Path of the PDF file.
+            min_chars_per_page: Pages with fewer characters go to Unstructured.
+            max_garbage_ratio: Pages with a higher share of unreadable glyphs go to Unstructured.
+            pages: Optional 0-based page indexes to load (default: all pages).
+            unstructured_kwargs: Extra arguments for UnstructuredPDFLoader (e.g. strategy).
+        """
+        self.file_path = file_path
+        self.min_chars_per_page = min_chars_per_page
+        self.max_garbage_ratio = max_garbage_ratio
+        self.pages = pages
+        self.unstructured_kwargs = unstructured_kwargs or {}
+
+    def load(self) -> List[Document]:
+        if not PYPDF_AVAILABLE:
+            logger.warning("pypdf is not installed; parsing the whole PDF with Unstructured")
+            return self._load_all_with_unstructured()
+
+        reader = PdfReader(self.file_path)
+        page_indexes = list(self.pages) if self.pages is not None else list(range(len(reader.pages)))
+
+        documents = {}
+        fallback_pages = []
+        for page_index in page_indexes:
+            try:
+                text = clean_text(reader.pages[page_index].extract_text() or "")
+            except Exception as e:
+                logger.warning(f"Text layer of page {page_index + 1} could not be read: {e}")
+                text = ""
+            quality = score_page_text(text)
+            if quality["chars"] < self.min_chars_per_page or quality["garbage_ratio"] > self.max_garbage_ratio:
+                fallback_pages.append(page_index)
+            documents[page_index] = self._page_document(text, page_index, TEXT_LAYER, quality)
+
+        if fallback_pages:
+            documents.update(self._load_pages_with_unstructured(reader, fallback_pages, documents))
+
+        logger.info(
+            f"Loaded {len(page_indexes)} pages from {os.path.basename(self.file_path)}: "
+            f"{len(page_indexes) - len(fallback_pages)} from the text layer, {len(fallback_pages)} with Unstructured"
+        )
+        return [documents[index] for index in page_indexes if documents[index].page_content]
+
+    def _page_document(self, text: str, page_index: int, extraction: str, quality: dict) -> Document:
+        return Document(
+            page_content=text,
+            metadata={
+                "source": self.file_path,
+                "page": page_index,
+                "page_number": page_index + 1,
+                "extraction": extraction,
+                "chars": quality["chars"],
+                "garbage_ratio": round(quality["garbage_ratio"], 3),
+            },
+        )
+
+    def _load_pages_with_unstructured(self, reader, page_indexes: List[int], text_layer_documents: dict) -> dict:
+        """Re-parses only the given pages with Unstructured, keeping the text layer if that fails."""
+        if not UNSTRUCTURED_AVAILABLE:
+            logger.warning(
+                f"{len(page_indexes)} low-quality pages kept from the text layer: unstructured[pdf] is not installed"
+            )
+            return {}
+
+        writer = PdfWriter()
+        for page_index in page_indexes:
+            writer.add_page(reader.pages[page_index])
+        handle, subset_path = tempfile.mkstemp(suffix=".pdf")
+        try:
+            with os.fdopen(handle, "wb") as subset_file:
+                writer.write(subset_file)
+            loader = UnstructuredPDFLoader(subset_path, mode="paged", **self.unstructured_kwargs)
+            parsed = loader.load()
+        except Exception as e:
+            logger.error(f"Unstructured failed on {len(page_indexes)} pages, keeping their text layer: {e}")
+            return {}
+        finally:
+            os.remove(subset_path)
+
+        documents = {}
+        for document in parsed:
+            # Page numbers of the subset file map back to the original pages
+            subset_page = int(document.metadata.get("page_number", 1)) - 1
+            if not 0 <= subset_page < len(page_indexes):
+                continue
+            page_index = page_indexes[subset_page]
+            text = clean_text(document.page_content)
+            quality = score_page_text(text)
+            text_layer = text_layer_documents[page_index].metadata
+            if self._readable_chars(quality) < self._readable_chars(text_layer):
+                # Unstructured found less than the text layer (e.g. a genuinely short page)
+                continue
+            documents[page_index] = self._page_document(text, page_index, UNSTRUCTURED, quality)
+        return documents
+
+    @staticmethod
+    def _readable_chars(quality: dict) -> float:
+        return quality["chars"] * (1 - quality["garbage_ratio"])
+
+    def _load_all_with_unstructured(self) -> List[Document]:
+        if not UNSTRUCTURED_AVAILABLE:
+            raise ImportError(
+                "Neither pypdf nor unstructured[pdf] is installed. Please install one of them: pip install pypdf"
+            )
+        documents = UnstructuredPDFLoader(self.file_path, mode="paged", **self.unstructured_kwargs).load()
+        for document in documents:
+            document.page_content = clean_text(document.page_content)
+            document.metadata["extraction"] = UNSTRUCTURED
+        return [document for document in documents if document.page_content]
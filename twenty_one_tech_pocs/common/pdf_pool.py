@@ -0,0 +1,368 @@
+import itertools
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+from .config_manager import ConfigManager
+from .llm_metrics import metrics
+from .pdf_loader import PYPDF_AVAILABLE, PdfReader, TieredPDFLoader
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 300
+# Pages per parallel range; shorter documents are parsed in a single job
+DEFAULT_MIN_PAGES_PER_RANGE = 20
+# Extra time the caller waits for a worker past the in-worker alarm before giving up
+TIMEOUT_GRACE = 10
+# Seconds between two checks of a waiting caller for the start of its job
+START_POLL_INTERVAL = 1.0
+# Times a job is submitted again after a worker of another job broke the pool
+MAX_RESUBMITS = 1
+
+
+class PDFParsingTimeout(TimeoutError):
+    """Raised when a document takes longer than the pool timeout to parse."""
+
+
+class PDFPoolBusyError(RuntimeError):
+    """Raised when the parsing queue is full and no slot frees up in time."""
+
+
+def _raise_timeout(signum, frame):
+    raise PDFParsingTimeout("PDF parsing timed out")
+
+
+# Set in each pool process: where a worker reports the jobs it starts
+_started_queue = None
+
+
+def _init_worker(started_queue) -> None:
+    global _started_queue
+    _started_queue = started_queue
+
+
+def _parse_in_worker(job_id: int, file_path: str, loader_kwargs: dict, timeout: int, submitted_at: float):
+    """Runs in a pool process: reports its start, loads the PDF under an alarm and returns the queue wait."""
+    queue_wait = time.time() - submitted_at
+    if _started_queue is not None:
+        _started_queue.put((job_id, os.getpid(), time.time()))
+    use_alarm = timeout and hasattr(signal, "SIGALRM")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.alarm(timeout)
+    try:
+        documents = TieredPDFLoader(file_path, **loader_kwargs).load()
+    finally:
+        if use_alarm:
+            signal.alarm(0)
+    return documents, queue_wait
+
+
+class _ParseJob:
+    """A page range submitted to the pool, and the worker running it once it started."""
+
+    def __init__(self, job_id: int, file_path: str, loader_kwargs: dict):
+        self.job_id = job_id
+        self.file_path = file_path
+        self.loader_kwargs = loader_kwargs
+        self.future: Optional[Future] = None
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.resubmits = 0
+
+
+class PDFParsingPool:
+    """
+    Size-bounded process pool for CPU-bound PDF parsing.
+
+    Web threads submit a document and wait on the future, so parsing uses its own
+    processes (and cores) instead of pinning the request worker. Workers are
+    recycled after max_tasks_per_child documents to contain memory growth in the
+    PDF/OCR libraries, each document runs under a timeout counted from the moment a
+    worker picks it up, and at most max_queue jobs can be queued or running at
+    once. Long documents are split into page ranges that are parsed in parallel.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        max_tasks_per_child: int = 20,
+        max_queue: Optional[int] = None,
+        timeout: int = DEFAULT_TIMEOUT,
+        submit_timeout: float = 30.0,
+        min_pages_per_range: int = DEFAULT_MIN_PAGES_PER_RANGE,
+    ):
+        """
+        Args:
+            workers: Parsing processes. Defaults to the number of CPUs.
+            max_tasks_per_child: Documents a process parses before it is replaced.
+            max_queue: Jobs (documents or page ranges) queued or running at once.
+                Defaults to 4 per worker.
+            timeout: Seconds a single document may take.
+            submit_timeout: Seconds to wait for a queue slot before PDFPoolBusyError.
+            min_pages_per_range: Smallest page range parsed as a separate job (0 disables splitting).
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.max_tasks_per_child = max_tasks_per_child
+        self.max_queue = max_queue or self.workers * 4
+        self.timeout = timeout
+        self.submit_timeout = submit_timeout
+        self.min_pages_per_range = min_pages_per_range
+        self._slots = threading.BoundedSemaphore(self.max_queue)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # max_tasks_per_child needs a non-fork start method; spawn is also safe with threads
+        self._context = multiprocessing.get_context("spawn")
+        # Workers write (job ID, pid, start time) here synchronously, so a worker
+        # stuck in native code right after has still reported its job. Each pool
+        # gets its own queue, as a worker killed mid-write leaves it locked.
+        self._started_queue = None
+        self._started_lock = threading.Lock()
+        # Started jobs of the waiting callers: job ID -> (worker pid, start time)
+        self._started: Dict[int, Optional[Tuple[int, float]]] = {}
+        self._job_ids = itertools.count(1)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._started_queue = self._context.SimpleQueue()
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=self._context,
+                    max_tasks_per_child=self.max_tasks_per_child,
+                    initializer=_init_worker,
+                    initargs=(self._started_queue,),
+                )
+            return self._executor
+
+    def _reset_executor(self, executor: ProcessPoolExecutor) -> None:
+        """Replaces a broken pool; its queued jobs already failed and are resubmitted by their callers."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    def _track(self, delta: int) -> None:
+        with self._lock:
+            self._in_flight += delta
+            in_flight = self._in_flight
+        metrics.set_gauge("pdf_pool_in_flight", in_flight)
+        metrics.set_gauge("pdf_pool_queue_depth", max(in_flight - self.workers, 0))
+
+    def submit(self, fn, *args) -> Future:
+        """
+        Queues fn(*args) in the pool and returns its future.
+
+        The queue slot is released when the job finishes, whether the caller waits
+        for it or not.
+
+        Raises:
+            PDFPoolBusyError: If the queue stays full for submit_timeout seconds.
+        """
+        if not self._slots.acquire(timeout=self.submit_timeout):
+            metrics.increment("pdf_pool_rejected_total")
+            raise PDFPoolBusyError(f"PDF parsing queue is full ({self.max_queue} jobs)")
+        self._track(1)
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._track(-1)
+            self._slots.release()
+            raise
+        future.add_done_callback(self._job_done)
+        return future
+
+    def _job_done(self, future: Future) -> None:
+        self._track(-1)
+        self._slots.release()
+
+    def _submit_job(self, job: _ParseJob) -> None:
+        with self._started_lock:
+            self._started[job.job_id] = None
+        job.executor = self._get_executor()
+        job.future = self.submit(
+            _parse_in_worker, job.job_id, job.file_path, job.loader_kwargs, self.timeout, time.time()
+        )
+
+    def _started_job(self, job: _ParseJob) -> Optional[Tuple[int, float]]:
+        """The worker pid and start time of the job, or None while it is queued."""
+        with self._started_lock:
+            started_queue = self._started_queue
+            while started_queue is not None and not started_queue.empty():
+                job_id, pid, started_at = started_queue.get()
+                # Reports of jobs whose caller stopped waiting are dropped
+                if job_id in self._started:
+                    self._started[job_id] = (pid, started_at)
+            return self._started.get(job.job_id)
+
+    def _forget_job(self, job: _ParseJob) -> None:
+        with self._started_lock:
+            self._started.pop(job.job_id, None)
+
+    def _wait(self, job: _ParseJob):
+        """
+        Waits for a job; its timeout starts when a worker picks it up, not at submission.
+
+        A worker that does not answer its own alarm (stuck in native code) is killed,
+        which fails this job with PDFParsingTimeout. Killing it (or a worker dying,
+        e.g. out of memory) breaks the pool for every queued job, so the pool is
+        replaced and the other callers submit their job again, up to MAX_RESUBMITS times.
+        """
+        while True:
+            started = self._started_job(job)
+            poll = START_POLL_INTERVAL
+            if started is not None and self.timeout:
+                pid, started_at = started
+                remaining = started_at + self.timeout + TIMEOUT_GRACE - time.time()
+                if remaining <= 0:
+                    self._kill_worker(pid, job)
+                    raise PDFParsingTimeout(f"PDF parsing did not finish within {self.timeout}s")
+                poll = min(poll, remaining)
+            try:
+                return job.future.result(timeout=poll)
+            except FutureTimeoutError:
+                continue
+            except BrokenProcessPool:
+                self._reset_executor(job.executor)
+                if job.resubmits >= MAX_RESUBMITS:
+                    raise
+                job.resubmits += 1
+                # A new ID, so a late report from the broken pool is not taken for the new run
+                self._forget_job(job)
+                job.job_id = next(self._job_ids)
+                metrics.increment("pdf_pool_resubmitted_total")
+                logger.warning(f"PDF parsing pool broke; submitting {os.path.basename(job.file_path)} again")
+                self._submit_job(job)
+
+    def _kill_worker(self, pid: int, job: _ParseJob) -> None:
+        logger.error(f"Killing PDF parsing worker {pid}: {os.path.basename(job.file_path)} ignored its timeout")
+        try:
+            os.kill(pid, getattr(signal, "SIGKILL", signal.SIGTERM))
+        except OSError:
+            # The worker exited in the meantime
+            pass
+        self._reset_executor(job.executor)
+
+    def page_ranges(self, page_indexes: Sequence[int]) -> List[List[int]]:
+        """
+        Splits page indexes into contiguous ranges to parse in parallel.
+
+        Documents under two ranges' worth of pages stay in one job; larger ones get
+        up to two ranges per worker so a slow (e.g. scanned) range does not leave
+        the other workers idle.
+        """
+        page_indexes = list(page_indexes)
+        if self.workers < 2 or not self.min_pages_per_range or len(page_indexes) < 2 * self.min_pages_per_range:
+            return [page_indexes]
+        range_count = min(self.workers * 2, len(page_indexes) // self.min_pages_per_range)
+        size, remainder = divmod(len(page_indexes), range_count)
+        ranges, start = [], 0
+        for index in range(range_count):
+            end = start + size + (1 if index < remainder else 0)
+            ranges.append(page_indexes[start:end])
+            start = end
+        return ranges
+
+    def load(self, file_path: str, **loader_kwargs) -> List[Document]:
+        """
+        Parses a PDF with TieredPDFLoader in the pool.
+
+        Long documents are split into page ranges that are parsed in parallel and
+        reassembled in page order; the page metadata always refers to the original file.
+        """
+        started = time.monotonic()
+        file_path = os.path.abspath(file_path)
+        pages = loader_kwargs.pop("pages", None)
+        if pages is None:
+            pages = self._page_indexes(file_path)
+        ranges = self.page_ranges(pages) if pages is not None else [None]
+
+        jobs = []
+        try:
+            for page_range in ranges:
+                job = _ParseJob(next(self._job_ids), file_path, dict(loader_kwargs, pages=page_range))
+                jobs.append(job)
+                self._submit_job(job)
+            results = [self._wait(job) for job in jobs]
+        except PDFParsingTimeout:
+            metrics.increment("pdf_pool_timeouts_total")
+            raise
+        finally:
+            for job in jobs:
+                self._forget_job(job)
+                if job.future is not None:
+                    job.future.cancel()
+
+        documents = []
+        for range_documents, queue_wait in results:
+            metrics.observe("pdf_pool_queue_seconds", queue_wait)
+            documents.extend(range_documents)
+        metrics.observe("pdf_parse_seconds", time.monotonic() - started)
+        if len(ranges) > 1:
+            logger.info(
+                f"Parsed {len(pages)} pages of {os.path.basename(file_path)} in {len(ranges)} parallel ranges "
+                f"in {time.monotonic() - started:.1f}s"
+            )
+        return documents
+
+    @staticmethod
+    def _page_indexes(file_path: str) -> Optional[List[int]]:
+        """Returns all page indexes of the file, or None if they cannot be counted here."""
+        if not PYPDF_AVAILABLE:
+            return None
+        try:
+            return list(range(len(PdfReader(file_path).pages)))
+        except Exception as e:
+            # Let the worker report the error (or fall back to Unstructured) on the whole file
+            logger.warning(f"Could not count the pages of {os.path.basename(file_path)}: {e}")
+            return None
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pdf_pool() -> Optional[PDFParsingPool]:
+    """Returns the process-wide PDF parsing pool, or None if it is disabled."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            config = ConfigManager().get_pdf_pool_config()
+            if not config.get("enabled", True):
+                _pool = False
+            else:
+                _pool = PDFParsingPool(
+                    workers=config.get("workers"),
+                    max_tasks_per_child=config.get("max_tasks_per_child", 20),
+                    max_queue=config.get("max_queue"),
+                    timeout=config.get("timeout", DEFAULT_TIMEOUT),
+                    min_pages_per_range=config.get("min_pages_per_range", DEFAULT_MIN_PAGES_PER_RANGE),
+                )
+        return _pool or None
+
+
+def load_pdf(file_path: str, **loader_kwargs) -> List[Document]:
+    """
+    Loads a PDF into page Documents, in the parsing pool when it is enabled.
+
+    This is the entry point the assistants use instead of calling a loader inline.
+    """
+    pool = get_pdf_pool()
+    if pool is None:
+        return TieredPDFLoader(file_path, **loader_kwargs).load()
+    return pool.load(file_path, **loader_kwargs)
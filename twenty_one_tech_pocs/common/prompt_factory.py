@@ -1,10 +1,116 @@
-from langchain.prompts import PromptTemplate
+from langchain.prompts import ChatPromptTemplate, PromptTemplate
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.prompts import BasePromptTemplate
+
+# Static part of the asset entry chat prompt. It must not contain any variable so
+# that every call starts with a byte-identical prefix that providers can cache.
+ASSET_ENTRY_SYSTEM_INSTRUCTIONS = """You are a universal equipment pattern analyzer. Each request gives you a target field, its rules, optional Expected Values, the asset description, values already accepted for other fields and historical values of the target field from similar assets.
+IF a list of Expected Values is provided for the target field, your task is to select the MOST LIKELY value from THIS LIST ONLY.
+   - Use historical values and accepted field values as context to inform your choice *from the Expected Values list*.
+   - If historical patterns suggest a value NOT present in the Expected Values, you MUST disregard that pattern and select a value from the Expected Values list.
+   - Your output MUST be one of the values from the Expected Values list. Do NOT attempt to generate a new value based on historical patterns if Expected Values are available.
+OTHERWISE (if no Expected Values are provided), generate ONLY the next logical raw value for the target field following the exact format and pattern of historical values, considering any already accepted values for other fields.
+
+Pattern Analysis Guidelines (when generating a new value, or selecting from expected values if applicable):
+1. Identify value type(s) and pattern (numerical, categorical, codes, mixed)
+2. Detect progression rules (incremental, cyclical, status-based, etc.)
+3. Maintain exact format (including symbols, units, casing)
+4. Continue sequence logic without conversions
+5. For mixed formats: Preserve original value types
+6. Consider the context provided by already accepted field values.
+
+Output Rules:
+- Return ONLY the selected or generated raw value as it would appear in the database.
+- If Expected Values were provided, your output MUST be one of those values.
+- No explanations, formatting, or additional text.
+- Preserve original value style and structure.
+- Follow identified sequence logic exactly (especially when generating, or if it helps narrow down choices from expected values).
+- If the target field is a date field, the output MUST be in the format 'Day Mon DD YYYY HH:MM:SS GMT+ZZZZ (Time Zone Name)', for example: 'Mon Aug 05 2024 00:00:00 GMT+0300 (Eastern European Summer Time)'. Ensure the day of the week is correct for the given date. This applies whether selecting from expected values or generating a new one."""
+
+# Few-shot examples as (request, answer) pairs, laid out like the final request
+ASSET_ENTRY_EXAMPLES = [
+    (
+        """Target Field: state
+Field Rules/Description:
+No description available.
+Expected Values: ["CN complete", "CN in process", "CN pending", "Defective", "Good"]
+Asset Description: Centrifugal Pump
+Accepted Values:
+None provided.
+Historical Values: ["Good", "Good", "Defective", "Good"]""",
+        "Good",
+    ),
+    (
+        """Target Field: category_code
+Field Rules/Description:
+No description available.
+Expected Values: ["COMP-02-B", "COMP-03-A", "MISC-01-A"]
+Asset Description: Air Compressor
+Accepted Values:
+None provided.
+Historical Values: ["COMP-01-A", "COMP-01-B", "COMP-02-A"]""",
+        "COMP-02-B",
+    ),
+    (
+        """Target Field: next_inspection_date
+Field Rules/Description:
+No description available.
+Expected Values: ["Mon Aug 05 2024 00:00:00 GMT+0300 (Eastern European Summer Time)", "Tue Aug 06 2024 00:00:00 GMT+0300 (Eastern European Summer Time)"]
+Asset Description: Fire Extinguisher
+Accepted Values:
+None provided.
+Historical Values: ["Mon Jul 01 2024 00:00:00 GMT+0000 (Coordinated Universal Time)"]""",
+        "Mon Aug 05 2024 00:00:00 GMT+0300 (Eastern European Summer Time)",
+    ),
+    (
+        """Target Field: is_critical_spare
+Field Rules/Description:
+No description available.
+Expected Values: [true, false]
+Asset Description: Spare Gearbox
+Accepted Values:
+None provided.
+Historical Values: [false, false, true, false]""",
+        "false",
+    ),
+    (
+        """Target Field: soldscrapdate
+Field Rules/Description:
+Date when equipment was sold or scrapped. It must be after the commission date.
+Expected Values: None provided.
+Asset Description: Old Pump
+Accepted Values:
+- commissiondate: Mon Aug 05 2024 00:00:00 GMT+0300 (Eastern European Summer Time)
+- equipmentdesc: Old Pump
+Historical Values: ["Wed Sep 04 2024 00:00:00 GMT+0300 (Eastern European Summer Time)"]""",
+        "Thu Sep 05 2024 00:00:00 GMT+0300 (Eastern European Summer Time)",
+    ),
+]
+
+# The only templated message. All variables live here, at the end of the prompt.
+ASSET_ENTRY_REQUEST_TEMPLATE = """Target Field: {target_field}
+Field Rules/Description:
+{field_description}
+Expected Values: {expected_values}
+Asset Description: {asset_description}
+Accepted Values:
+{accepted_values}
+Historical Values: {historical_values}"""
 
 
 class PromptFactory:
     @staticmethod
-    def get_prompt(name: str) -> PromptTemplate:
-        # Currently only supporting "asset_entry_prompt"
+    def get_prompt(name: str) -> BasePromptTemplate:
+        if name == "asset_entry_chat_prompt":
+            # Same task as asset_entry_prompt, laid out for provider prompt caching:
+            # system instructions and examples are static messages (never formatted),
+            # so only the final human message differs between calls.
+            messages = [SystemMessage(content=ASSET_ENTRY_SYSTEM_INSTRUCTIONS)]
+            for request, answer in ASSET_ENTRY_EXAMPLES:
+                messages.append(HumanMessage(content=request))
+                messages.append(AIMessage(content=answer))
+            messages.append(("human", ASSET_ENTRY_REQUEST_TEMPLATE))
+            return ChatPromptTemplate.from_messages(messages)
         if name == "asset_entry_prompt":
             return PromptTemplate(
                 input_variables=[
@@ -0,0 +1,67 @@
+import contextvars
+import logging
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from .llm_metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+DOWNLOAD_STAGE = "download"
+PARSE_STAGE = "parse"
+EXTRACT_STAGE = "extract"
+EAM_COMMIT_STAGE = "eam_commit"
+
+_stage_listener: contextvars.ContextVar = contextvars.ContextVar("stage_listener", default=None)
+
+
+class StageListener:
+    """Receives the start and end of the processing stages run in its scope."""
+
+    def stage_started(self, name: str) -> None:
+        pass
+
+    def stage_finished(self, name: str, duration: float, error: Optional[str] = None) -> None:
+        pass
+
+
+@contextmanager
+def stage_listener(listener: StageListener):
+    """Reports the stages run inside the block (in this thread or its copied contexts) to the listener."""
+    token = _stage_listener.set(listener)
+    try:
+        yield listener
+    finally:
+        _stage_listener.reset(token)
+
+
+@contextmanager
+def stage(name: str, assistant: Optional[str] = None):
+    """
+    Times one document processing stage (download, parse, extract, eam_commit).
+
+    The duration is recorded in the document_stage_seconds histogram and passed
+    to the current StageListener, if any (e.g. a background job tracking its progress).
+    """
+    listener = _stage_listener.get()
+    if listener is not None:
+        listener.stage_started(name)
+    started = time.monotonic()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = str(e) or type(e).__name__
+        raise
+    finally:
+        duration = time.monotonic() - started
+        labels = {"stage": name}
+        if assistant:
+            labels["assistant"] = assistant
+        metrics.observe("document_stage_seconds", duration, labels)
+        if listener is not None:
+            try:
+                listener.stage_finished(name, duration, error)
+            except Exception as e:
+                logger.warning(f"Stage listener failed for stage {name}: {e}")
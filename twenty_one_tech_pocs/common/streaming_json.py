@@ -0,0 +1,122 @@
+import json
+import logging
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class JsonArrayStreamParser:
+    """
+    Incremental parser that yields the elements of one array of a streamed JSON object.
+
+    Feed it the model output chunk by chunk; every call returns the raw JSON text of the
+    elements of the top-level array `array_key` that were completed by that chunk. The
+    fields that appear before the array are available from `header` as soon as the
+    array starts. Anything before the first "{" (e.g. a markdown fence) is ignored.
+    """
+
+    def __init__(self, array_key: str):
+        self.array_key = array_key
+        self.header: Optional[dict] = None
+        # Unconsumed text; everything before the array or before the current element is dropped
+        self._text = ""
+        self._position = 0
+        # Container stack: "{" or "["
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escaped = False
+        self._string_start = None
+        self._last_string = None
+        self._top_level_key = None
+        self._array_depth = None
+        self._element_start = None
+        self._done = False
+
+    def feed(self, chunk: str) -> List[str]:
+        """Consumes a chunk of output and returns the array elements it completed."""
+        completed = []
+        if self._done or not chunk:
+            return completed
+        text = self._text = self._text + chunk
+
+        for index in range(self._position, len(text)):
+            char = text[index]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    self._last_string = text[self._string_start:index + 1]
+                continue
+
+            if char == '"':
+                if self._stack:
+                    self._in_string = True
+                    self._string_start = index
+            elif char == ":" and len(self._stack) == 1:
+                self._top_level_key = self._decode_key(self._last_string)
+            elif char in "{[":
+                if not self._stack and char != "{":
+                    continue
+                if (
+                    char == "["
+                    and len(self._stack) == 1
+                    and self._array_depth is None
+                    and self._top_level_key == self.array_key
+                ):
+                    self._array_depth = len(self._stack) + 1
+                    self.header = self._parse_header(text[:index])
+                elif self._array_depth is not None and len(self._stack) == self._array_depth:
+                    self._element_start = index
+                self._stack.append(char)
+            elif char in "}]":
+                if not self._stack:
+                    continue
+                self._stack.pop()
+                if self._element_start is not None and len(self._stack) == self._array_depth:
+                    completed.append(text[self._element_start:index + 1])
+                    self._element_start = None
+                elif self._array_depth is not None and len(self._stack) < self._array_depth:
+                    # The target array is closed; later fields are read from the full output
+                    self._done = True
+                    self._text = ""
+                    return completed
+        self._position = len(text)
+        self._discard_consumed()
+        return completed
+
+    def _discard_consumed(self) -> None:
+        if self._array_depth is None:
+            # The header is still being read
+            return
+        keep_from = self._element_start if self._element_start is not None else self._position
+        if self._in_string and self._string_start is not None:
+            keep_from = min(keep_from, self._string_start)
+        self._text = self._text[keep_from:]
+        self._position -= keep_from
+        if self._element_start is not None:
+            self._element_start -= keep_from
+        if self._string_start is not None:
+            self._string_start -= keep_from
+
+    @staticmethod
+    def _decode_key(raw_key: Optional[str]) -> Optional[str]:
+        if raw_key is None:
+            return None
+        try:
+            return json.loads(raw_key)
+        except ValueError:
+            return None
+
+    def _parse_header(self, prefix: str) -> dict:
+        """Parses the object fields before the array by closing the object right there."""
+        start = prefix.find("{")
+        # Drop the "key": of the array itself
+        head = prefix[start:prefix.rfind('"', 0, prefix.rfind('"'))].rstrip().rstrip(",")
+        try:
+            return json.loads(head + "}")
+        except ValueError:
+            logger.debug("Could not parse the fields before the streamed array")
+            return {}
@@ -0,0 +1,300 @@
+import json
+import logging
+import re
+import threading
+from typing import Callable, Generic, List, Optional, Type, TypeVar
+
+from langchain_core.documents import Document
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_openai import ChatOpenAI
+from pydantic import BaseModel, ValidationError
+
+from .llm_metrics import metrics
+from .streaming_json import JsonArrayStreamParser
+
+# Optional import for Ollama - only needed if using Ollama models
+try:
+    from langchain_ollama import ChatOllama
+    OLLAMA_AVAILABLE = True
+except ImportError:
+    OLLAMA_AVAILABLE = False
+    ChatOllama = None
+
+logger = logging.getLogger(__name__)
+
+SchemaT = TypeVar("SchemaT", bound=BaseModel)
+
+# Same separator the "stuff" documents chain used between pages
+DOCUMENT_SEPARATOR = "\n\n"
+
+_JSON_FENCE_PATTERN = re.compile(r"^\s*```(?:json)?\s*(.*?)\s*```\s*$", re.DOTALL)
+
+REPAIR_SYSTEM_PROMPT = """You fix JSON documents that failed validation against a JSON schema.
+Return ONLY the corrected JSON object. Keep every value that is already valid unchanged,
+fix only what the validation errors point at, and do not add commentary or markdown."""
+
+REPAIR_HUMAN_TEMPLATE = """JSON schema:
+{schema}
+
+Validation errors:
+{errors}
+
+JSON to fix:
+{output}"""
+
+
+class StructuredOutputError(ValueError):
+    """Raised when the model output cannot be validated, even after repair."""
+
+    def __init__(self, message: str, raw_output: str = ""):
+        super().__init__(message)
+        self.raw_output = raw_output
+
+
+class _ExtractionStats:
+    """Per-assistant counters of extractions, parse failures and repairs."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, assistant: str, event: str) -> None:
+        with self._lock:
+            counts = self._stats.setdefault(
+                assistant, {"extractions": 0, "parse_failures": 0, "repairs": 0, "repair_failures": 0}
+            )
+            counts[event] += 1
+        metrics.increment(f"structured_output_{event}_total", {"assistant": assistant})
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stats = {assistant: dict(counts) for assistant, counts in self._stats.items()}
+        for counts in stats.values():
+            extractions = counts["extractions"] or 1
+            failures = counts["parse_failures"] or 1
+            counts["parse_failure_rate"] = counts["parse_failures"] / extractions
+            counts["repair_success_rate"] = (
+                counts["repairs"] / failures if counts["parse_failures"] else 0.0
+            )
+        return stats
+
+
+extraction_stats = _ExtractionStats()
+
+
+def get_extraction_stats() -> dict:
+    """Returns parse-failure and repair rates per assistant."""
+    return extraction_stats.snapshot()
+
+
+def resolve_backend_model(llm: BaseChatModel) -> BaseChatModel:
+    """Unwraps the LLMFactory wrappers (scheduler, hedging), which forward bound arguments."""
+    backend = llm
+    while True:
+        inner = getattr(backend, "model", None)
+        if not isinstance(inner, BaseChatModel):
+            inner = getattr(backend, "primary", None)
+        if not isinstance(inner, BaseChatModel):
+            return backend
+        backend = inner
+
+
+def get_model_name(llm: BaseChatModel) -> Optional[str]:
+    """Returns the provider model name behind an LLMFactory model (e.g. "gpt-4o")."""
+    backend = resolve_backend_model(llm)
+    name = getattr(backend, "model_name", None) or getattr(backend, "model", None)
+    return name if isinstance(name, str) else None
+
+
+def documents_to_text(documents: List[Document]) -> str:
+    """Joins loaded document pages into the single text the extraction prompts expect."""
+    return DOCUMENT_SEPARATOR.join(document.page_content for document in documents)
+
+
+class StructuredExtractor(Generic[SchemaT]):
+    """
+    Extracts a Pydantic schema from a document with the provider's structured output mode.
+
+    OpenAI GPT models get a JSON-schema response format and Ollama models a format
+    schema, so the answer is valid JSON of the right shape in nearly every case; other
+    backends fall back to the JSON instructions in the prompt. Output that still fails
+    validation is sent back with the validation errors for a short repair call, which
+    does not resend the document, instead of failing the whole request.
+    """
+
+    def __init__(
+        self,
+        schema: Type[SchemaT],
+        assistant: str,
+        max_repair_attempts: int = 1,
+        repair_llm: Optional[BaseChatModel] = None,
+    ):
+        """
+        Args:
+            schema: The Pydantic model the output must validate against.
+            assistant: Name used to label the parse-failure and repair metrics.
+            max_repair_attempts: Repair calls allowed before giving up.
+            repair_llm: Optional cheaper model for repairs. Defaults to the extraction model.
+        """
+        self.schema = schema
+        self.assistant = assistant
+        self.max_repair_attempts = max_repair_attempts
+        self.repair_llm = repair_llm
+        self._json_schema = schema.model_json_schema()
+
+    def extract(
+        self, llm: BaseChatModel, prompt: ChatPromptTemplate, inputs: dict, prompt_name: str
+    ) -> SchemaT:
+        """
+        Runs the prompt and returns the validated schema instance.
+
+        Raises:
+            StructuredOutputError: If the output cannot be validated after the repair attempts.
+        """
+        extraction_stats.record(self.assistant, "extractions")
+        response = self.bind_structured_output(llm).invoke(
+            prompt.format_messages(**inputs), config={"metadata": {"prompt_name": prompt_name}}
+        )
+        return self._validate_or_repair(llm, str(response.content), prompt_name)
+
+    def extract_streaming(
+        self,
+        llm: BaseChatModel,
+        prompt: ChatPromptTemplate,
+        inputs: dict,
+        prompt_name: str,
+        array_key: str,
+        item_schema: Type[BaseModel],
+        on_item: Callable[[int, BaseModel], None],
+        on_header: Optional[Callable[[dict], None]] = None,
+    ) -> SchemaT:
+        """
+        Streams the extraction and hands over the items of one array as soon as they complete.
+
+        on_header receives the fields that precede the array (once), and on_item every
+        array element that validates against item_schema, while the model is still
+        generating. Elements that only validate after the final repair are handed over
+        at the end, so every element of the returned instance is delivered exactly once.
+        If on_header raises a ValidationError (e.g. the model put fields after the
+        array), it receives the fields of the final result instead.
+
+        Raises:
+            StructuredOutputError: If the output cannot be validated after the repair attempts.
+        """
+        extraction_stats.record(self.assistant, "extractions")
+        parser = JsonArrayStreamParser(array_key)
+        chunks = []
+        delivered = set()
+        item_count = 0
+        header_tried = False
+        header_sent = False
+
+        stream = self.bind_structured_output(llm).stream(
+            prompt.format_messages(**inputs), config={"metadata": {"prompt_name": prompt_name}}
+        )
+        for chunk in stream:
+            text = str(chunk.content)
+            chunks.append(text)
+            for raw_item in parser.feed(text):
+                if on_header and not header_tried and parser.header is not None:
+                    header_tried = True
+                    try:
+                        on_header(parser.header)
+                        header_sent = True
+                    except ValidationError as e:
+                        # Keys may come in any order: fields after the array are only in the full output
+                        logger.warning(f"{self.assistant}: streamed header is incomplete, deferring it: {e}")
+                index = item_count
+                item_count += 1
+                try:
+                    item = item_schema.model_validate_json(raw_item)
+                except ValidationError as e:
+                    logger.warning(f"{self.assistant}: streamed item {index} is invalid, deferring it: {e}")
+                    continue
+                delivered.add(index)
+                on_item(index, item)
+
+        parsed = self._validate_or_repair(llm, "".join(chunks), prompt_name)
+        if on_header and not header_sent:
+            on_header(parsed.model_dump(exclude={array_key}))
+        for index, item in enumerate(getattr(parsed, array_key)):
+            if index not in delivered:
+                on_item(index, item)
+        return parsed
+
+    def _validate_or_repair(self, llm: BaseChatModel, output_text: str, prompt_name: str) -> SchemaT:
+        parsed, errors = self.parse(output_text)
+        if parsed is not None:
+            return parsed
+
+        extraction_stats.record(self.assistant, "parse_failures")
+        logger.warning(f"{self.assistant}: output failed validation, attempting repair. Errors: {errors[:500]}")
+        for attempt in range(1, self.max_repair_attempts + 1):
+            output_text = self._repair(self.repair_llm or llm, output_text, errors, f"{prompt_name}_repair")
+            parsed, errors = self.parse(output_text)
+            if parsed is not None:
+                extraction_stats.record(self.assistant, "repairs")
+                logger.info(f"{self.assistant}: output repaired after {attempt} attempt(s)")
+                return parsed
+
+        extraction_stats.record(self.assistant, "repair_failures")
+        raise StructuredOutputError(
+            f"Output does not match {self.schema.__name__} after {self.max_repair_attempts} repair attempt(s): {errors}",
+            raw_output=output_text,
+        )
+
+    def parse(self, output_text: str):
+        """
+        Validates a raw model output against the schema.
+
+        Returns:
+            Tuple[Optional[SchemaT], str]: The parsed instance (or None) and the validation errors.
+        """
+        text = self.strip_json_fences(output_text)
+        if not text:
+            return None, "The output is empty."
+        try:
+            return self.schema.model_validate_json(text), ""
+        except ValidationError as e:
+            return None, str(e)
+
+    @staticmethod
+    def strip_json_fences(output_text: str) -> str:
+        match = _JSON_FENCE_PATTERN.match(output_text or "")
+        return (match.group(1) if match else output_text or "").strip()
+
+    def bind_structured_output(self, llm: BaseChatModel):
+        """Binds the provider-specific structured output option to the model, if it has one."""
+        backend = resolve_backend_model(llm)
+
+        if isinstance(backend, ChatOpenAI) and str(backend.model_name).startswith("gpt-"):
+            return llm.bind(
+                response_format={
+                    "type": "json_schema",
+                    "json_schema": {
+                        "name": self.schema.__name__,
+                        "schema": self._json_schema,
+                        # Strict mode rejects optional fields with defaults, which the schemas use
+                        "strict": False,
+                    },
+                }
+            )
+        if OLLAMA_AVAILABLE and isinstance(backend, ChatOllama):
+            return llm.bind(format=self._json_schema)
+        return llm
+
+    def _repair(self, llm: BaseChatModel, output_text: str, errors: str, prompt_name: str) -> str:
+        messages = [
+            SystemMessage(content=REPAIR_SYSTEM_PROMPT),
+            HumanMessage(
+                content=REPAIR_HUMAN_TEMPLATE.format(
+                    schema=json.dumps(self._json_schema), errors=errors, output=output_text
+                )
+            ),
+        ]
+        response = self.bind_structured_output(llm).invoke(
+            messages, config={"metadata": {"prompt_name": prompt_name}}
+        )
+        return str(response.content)
@@ -0,0 +1,113 @@
+import logging
+from functools import lru_cache
+from typing import Optional
+
+# Optional import for tiktoken - falls back to a character based estimate
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENCODING = "cl100k_base"
+# Rough characters-per-token ratio used when no tokenizer is available
+CHARS_PER_TOKEN = 4
+
+# Context window (input + output tokens) per model; unknown models get the smallest
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+    "deep-seek-cloud": 64000,
+    "llama3": 8192,
+    "gemma": 8192,
+    "tgi": 8192,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+
+
+@lru_cache(maxsize=16)
+def _get_encoding(model_name: Optional[str]):
+    """Returns the tiktoken encoding for a model, or None if unavailable."""
+    if not TIKTOKEN_AVAILABLE:
+        return None
+    try:
+        if model_name:
+            try:
+                return tiktoken.encoding_for_model(model_name)
+            except KeyError:
+                # Non-OpenAI models (llama3, gemma, tgi) - cl100k is a close enough proxy
+                pass
+        return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception as e:
+        logger.warning(f"Could not load tokenizer for '{model_name}': {e}. Using estimates.")
+        return None
+
+
+def get_context_window(model_name: Optional[str]) -> int:
+    """Returns the context window of a model in tokens."""
+    if not model_name:
+        return DEFAULT_CONTEXT_WINDOW
+    if model_name in MODEL_CONTEXT_WINDOWS:
+        return MODEL_CONTEXT_WINDOWS[model_name]
+    # Dated or tagged variants, e.g. "gpt-4o-2024-08-06" or "llama3:8b"
+    for known_name in sorted(MODEL_CONTEXT_WINDOWS, key=len, reverse=True):
+        if model_name.startswith(known_name):
+            return MODEL_CONTEXT_WINDOWS[known_name]
+    return DEFAULT_CONTEXT_WINDOW
+
+
+def count_tokens(text: str, model_name: Optional[str] = None) -> int:
+    """Counts the tokens in a text using the model's tokenizer."""
+    if not text:
+        return 0
+    encoding = _get_encoding(model_name)
+    if encoding is None:
+        return max(1, len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model_name: Optional[str] = None) -> str:
+    """Truncates a text so that it fits in max_tokens tokens."""
+    if max_tokens <= 0 or not text:
+        return ""
+    encoding = _get_encoding(model_name)
+    if encoding is None:
+        return text[: max_tokens * CHARS_PER_TOKEN]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+
+def get_token_usage(message) -> dict:
+    """
+    Extracts token usage from an LLM response message.
+
+    Args:
+        message: The AIMessage returned by a chat model.
+
+    Returns:
+        dict: input_tokens, output_tokens and cached_tokens (the part of the input
+              served from the provider's prompt cache). Values are None when the
+              provider did not report them.
+    """
+    usage = {"input_tokens": None, "output_tokens": None, "cached_tokens": None}
+
+    usage_metadata = getattr(message, "usage_metadata", None)
+    if usage_metadata:
+        usage["input_tokens"] = usage_metadata.get("input_tokens")
+        usage["output_tokens"] = usage_metadata.get("output_tokens")
+        usage["cached_tokens"] = (usage_metadata.get("input_token_details") or {}).get("cache_read")
+
+    # Older integrations only report usage in the raw response metadata
+    token_usage = (getattr(message, "response_metadata", None) or {}).get("token_usage") or {}
+    if usage["input_tokens"] is None:
+        usage["input_tokens"] = token_usage.get("prompt_tokens")
+    if usage["output_tokens"] is None:
+        usage["output_tokens"] = token_usage.get("completion_tokens")
+    if usage["cached_tokens"] is None:
+        usage["cached_tokens"] = (token_usage.get("prompt_tokens_details") or {}).get("cached_tokens")
+    return usage
@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import LLMMetricsView
+
+urlpatterns = [
+    path('llm/', LLMMetricsView.as_view(), name='llm-metrics'),
+]
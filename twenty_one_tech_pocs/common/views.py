@@ -0,0 +1,26 @@
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .llm_factory import LLMFactory
+from .llm_metrics import metrics
+from .structured_output import get_extraction_stats
+
+
+class LLMMetricsView(APIView):
+    """
+    Exposes the LLM call metrics (latency, tokens, cost, ...) of this process.
+
+    Returns JSON by default, or the Prometheus text format with ?output=prometheus.
+    """
+
+    def get(self, request):
+        if request.query_params.get("output") == "prometheus":
+            return HttpResponse(metrics.to_prometheus(), content_type="text/plain; version=0.0.4")
+
+        data = metrics.snapshot()
+        data["hedging"] = LLMFactory.get_hedge_stats()
+        data["scheduler"] = LLMFactory.get_scheduler_stats()
+        data["structured_output"] = get_extraction_stats()
+        return Response(data, status=status.HTTP_200_OK)
@@ -0,0 +1,28 @@
+from django.contrib import admin
+
+from .models import DocumentJob, EAMOutboxEntry, ExtractionDraft
+
+
+@admin.register(DocumentJob)
+class DocumentJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "assistant", "document_code", "upload_name", "status", "stage", "attempts", "created_at")
+    list_filter = ("assistant", "status")
+    search_fields = ("id", "document_code", "upload_name")
+    exclude = ("upload_content",)
+    readonly_fields = ("stages", "result", "error", "started_at", "finished_at", "heartbeat_at")
+
+
+@admin.register(ExtractionDraft)
+class ExtractionDraftAdmin(admin.ModelAdmin):
+    list_display = ("id", "assistant", "document_code", "document_name", "status", "updated_at")
+    list_filter = ("assistant", "status")
+    search_fields = ("id", "document_code", "document_name", "content_hash")
+    readonly_fields = ("content_hash", "commit_result", "commit_error", "committed_at")
+
+
+@admin.register(EAMOutboxEntry)
+class EAMOutboxEntryAdmin(admin.ModelAdmin):
+    list_display = ("key", "draft", "operation", "status", "attempts", "updated_at")
+    list_filter = ("status", "operation")
+    search_fields = ("key", "draft__id", "draft__document_code")
+    readonly_fields = ("response", "error", "attempts", "sent_at", "confirmed_at")
@@ -0,0 +1,6 @@
+from django.apps import AppConfig
+
+
+class DocumentProcessingConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'twenty_one_tech_pocs.document_processing'
@@ -0,0 +1,215 @@
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional
+
+from django.core.files.base import ContentFile
+from django.db import connections
+
+from .pipelines import get_pipeline
+from twenty_one_tech_pocs.common.config_manager import ConfigManager
+from twenty_one_tech_pocs.common.eam_api import EAMApiService
+from twenty_one_tech_pocs.common.llm_metrics import llm_call_context, metrics, track_llm_usage
+from twenty_one_tech_pocs.common.stages import (
+    DOWNLOAD_STAGE,
+    EAM_COMMIT_STAGE,
+    EXTRACT_STAGE,
+    PARSE_STAGE,
+    StageListener,
+    stage,
+    stage_listener,
+)
+
+logger = logging.getLogger(__name__)
+
+# Documents allowed in each stage at once. Downloads and EAM writes wait on the
+# network, parsing is CPU bound (and further bounded by the PDF pool), and the
+# extraction holds LLM capacity (also bounded by the scheduler's batch lane).
+DEFAULT_STAGE_LIMITS = {
+    DOWNLOAD_STAGE: 8,
+    PARSE_STAGE: 2,
+    EXTRACT_STAGE: 4,
+    EAM_COMMIT_STAGE: 4,
+}
+DEFAULT_MAX_DOCUMENTS = 500
+# Settings keys of the stage limits
+STAGE_LIMIT_SETTINGS = {
+    DOWNLOAD_STAGE: "download_concurrency",
+    PARSE_STAGE: "parse_concurrency",
+    EXTRACT_STAGE: "llm_concurrency",
+    EAM_COMMIT_STAGE: "eam_concurrency",
+}
+
+
+class StageLimiter:
+    """
+    Bounds the documents of a batch running each stage, and times them.
+
+    A document waits for a slot of a stage when the stage starts (before it is
+    timed) and releases it when the stage finishes, so a slow stage cannot pile up
+    work for the next: e.g. parsing continues while every LLM slot is busy, but at
+    most the parse limit of documents parse at once.
+    """
+
+    def __init__(self, limits: Dict[str, int]):
+        self.limits = dict(limits)
+        self._slots = {name: threading.BoundedSemaphore(limit) for name, limit in self.limits.items()}
+        self._lock = threading.Lock()
+        self.busy_seconds: Dict[str, float] = {name: 0.0 for name in self.limits}
+        self.wait_seconds: Dict[str, float] = {name: 0.0 for name in self.limits}
+
+    def for_document(self) -> "DocumentStageTimer":
+        return DocumentStageTimer(self)
+
+    def acquire(self, name: str) -> None:
+        slot = self._slots.get(name)
+        if slot is None:
+            return
+        started = time.monotonic()
+        slot.acquire()
+        with self._lock:
+            self.wait_seconds[name] += time.monotonic() - started
+
+    def release(self, name: str, duration: float) -> None:
+        slot = self._slots.get(name)
+        if slot is None:
+            return
+        slot.release()
+        with self._lock:
+            self.busy_seconds[name] += duration
+
+
+class DocumentStageTimer(StageListener):
+    """Stage listener of one batch document: takes the batch's stage slots and records its stage durations."""
+
+    def __init__(self, limiter: StageLimiter):
+        self.limiter = limiter
+        self.stages: Dict[str, float] = {}
+
+    def stage_started(self, name: str) -> None:
+        self.limiter.acquire(name)
+
+    def stage_finished(self, name: str, duration: float, error: Optional[str] = None) -> None:
+        self.limiter.release(name, duration)
+        self.stages[name] = round(self.stages.get(name, 0.0) + duration, 3)
+
+
+def get_batch_settings() -> dict:
+    """Stage limits and the maximum batch size, from the DOCUMENT_BATCH_* settings."""
+    config = ConfigManager().get_document_batch_config()
+    limits = {
+        name: max(1, config.get(setting, DEFAULT_STAGE_LIMITS[name]))
+        for name, setting in STAGE_LIMIT_SETTINGS.items()
+    }
+    return {"stage_limits": limits, "max_documents": config.get("max_documents", DEFAULT_MAX_DOCUMENTS)}
+
+
+def run_batch(
+    assistant: str,
+    document_codes: List[str],
+    create_in_eam: bool = False,
+    stage_limits: Optional[Dict[str, int]] = None,
+) -> Iterator[dict]:
+    """
+    Processes EAM documents with one assistant, with a concurrency limit per stage.
+
+    Yields one {"type": "document", ...} record per document as soon as it has
+    finished (in completion order, not submission order), then one
+    {"type": "report", ...} record with the throughput of the batch. A failed
+    document yields its error and does not stop the batch. Closing the generator
+    cancels the documents that have not started.
+
+    Args:
+        assistant: The assistant whose pipeline runs (e.g. "maintenance_assistant").
+        document_codes: EAM document codes; duplicates are processed once.
+        create_in_eam: Create the extracted records in EAM, as the single-document endpoint does.
+        stage_limits: Documents allowed in each stage at once; the settings by default.
+    """
+    limiter = StageLimiter(stage_limits or get_batch_settings()["stage_limits"])
+    codes = list(dict.fromkeys(code for code in document_codes if code))
+    # Enough documents in flight to keep every stage busy; the limiter does the rest
+    in_flight = max(1, sum(limiter.limits.values()))
+    started = time.monotonic()
+    totals = {"succeeded": 0, "failed": 0, "calls": 0, "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0}
+
+    executor = ThreadPoolExecutor(max_workers=min(in_flight, max(1, len(codes))), thread_name_prefix="document-batch")
+    try:
+        pending = {executor.submit(_process_document, assistant, code, create_in_eam, limiter) for code in codes}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                record = future.result()
+                totals["succeeded" if record["status"] == "succeeded" else "failed"] += 1
+                for key in ("calls", "input_tokens", "output_tokens", "cost_usd"):
+                    totals[key] += record["llm_usage"][key]
+                yield record
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    elapsed = time.monotonic() - started
+    minutes = elapsed / 60 if elapsed > 0 else None
+    tokens = totals["input_tokens"] + totals["output_tokens"]
+    processed = totals["succeeded"] + totals["failed"]
+    report = {
+        "type": "report",
+        "assistant": assistant,
+        "documents": len(codes),
+        "succeeded": totals["succeeded"],
+        "failed": totals["failed"],
+        "elapsed_seconds": round(elapsed, 3),
+        "documents_per_minute": round(processed / minutes, 3) if minutes else None,
+        "llm_calls": totals["calls"],
+        "input_tokens": totals["input_tokens"],
+        "output_tokens": totals["output_tokens"],
+        "tokens_per_minute": round(tokens / minutes, 1) if minutes else None,
+        "cost_usd": round(totals["cost_usd"], 6),
+        # busy: seconds spent in the stage summed over documents; wait: seconds spent waiting
+        # for a slot, which shows the stage limiting the batch
+        "stages": {
+            name: {
+                "limit": limiter.limits[name],
+                "busy_seconds": round(limiter.busy_seconds[name], 3),
+                "wait_seconds": round(limiter.wait_seconds[name], 3),
+            }
+            for name in limiter.limits
+        },
+    }
+    metrics.increment("document_batches_total", labels={"assistant": assistant})
+    logger.info(
+        f"Batch of {len(codes)} {assistant} documents finished in {elapsed:.1f}s "
+        f"({report['documents_per_minute']} documents/min, {report['tokens_per_minute']} tokens/min)"
+    )
+    yield report
+
+
+def _process_document(assistant: str, document_code: str, create_in_eam: bool, limiter: StageLimiter) -> dict:
+    timer = limiter.for_document()
+    started = time.monotonic()
+    record = {"type": "document", "document_code": document_code}
+    try:
+        with llm_call_context(endpoint=f"document-batch:{assistant}"), stage_listener(timer), \
+                track_llm_usage() as usage:
+            try:
+                pipeline = get_pipeline(assistant)
+                with stage(DOWNLOAD_STAGE, assistant=assistant):
+                    content = EAMApiService().fetch_document_attachment(document_code)
+                document = ContentFile(content, name=pipeline.document_name(document_code))
+                result = pipeline.run_document_pipeline(
+                    document, create_in_eam=create_in_eam, document_code=document_code
+                )
+                record.update(status="succeeded", result=result)
+            except Exception as e:
+                logger.warning(f"Batch document {document_code} ({assistant}) failed: {e}")
+                record.update(status="failed", error=str(e) or type(e).__name__)
+    finally:
+        # The batch threads are not request threads: nothing else closes their database connections
+        connections.close_all()
+
+    metrics.increment("document_batch_documents_total", labels={"assistant": assistant, "status": record["status"]})
+    record.update(
+        seconds=round(time.monotonic() - started, 3),
+        stages=timer.stages,
+        llm_usage={**usage, "cost_usd": round(usage["cost_usd"], 6)},
+    )
+    return record
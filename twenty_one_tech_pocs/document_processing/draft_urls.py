@@ -0,0 +1,10 @@
+from django.urls import path
+from .views import ExtractionDraftListView, ExtractionDraftDetailView, ExtractionDraftCommitView
+
+app_name = 'extraction_drafts'
+
+urlpatterns = [
+    path('', ExtractionDraftListView.as_view(), name='extraction_drafts'),
+    path('<uuid:draft_id>/', ExtractionDraftDetailView.as_view(), name='extraction_draft'),
+    path('<uuid:draft_id>/commit/', ExtractionDraftCommitView.as_view(), name='extraction_draft_commit'),
+]
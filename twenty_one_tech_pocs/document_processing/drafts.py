@@ -0,0 +1,144 @@
+import hashlib
+import logging
+from typing import Callable, Optional, Tuple
+
+from django.core.files.uploadedfile import UploadedFile
+from django.db import IntegrityError
+from django.utils import timezone
+
+from .models import ExtractionDraft
+from .outbox import plan_outbox, record_completed_writes, run_outbox
+from .pipelines import get_pipeline
+from twenty_one_tech_pocs.common.eam_writes import WriteResults
+from twenty_one_tech_pocs.common.llm_metrics import metrics
+from twenty_one_tech_pocs.common.stages import EAM_COMMIT_STAGE, stage
+
+logger = logging.getLogger(__name__)
+
+# extract(document, create_in_eam) -> (extraction fields, optional callable finishing the inline EAM
+# writes and returning their responses by write key)
+ExtractFunction = Callable[[UploadedFile, bool], Tuple[dict, Optional[Callable[[], WriteResults]]]]
+
+
+def compute_content_hash(document: UploadedFile) -> str:
+    """SHA-256 of the file content; the file is rewound for the next reader."""
+    digest = hashlib.sha256()
+    for chunk in document.chunks():
+        digest.update(chunk)
+    document.seek(0)
+    return digest.hexdigest()
+
+
+def run_with_draft(
+    assistant: str,
+    document: UploadedFile,
+    document_code: str,
+    create_in_eam: bool,
+    extract: ExtractFunction,
+) -> dict:
+    """
+    Runs an assistant's extraction at most once per document content.
+
+    If a draft exists for the assistant, document code and content hash, its stored
+    extraction is returned (and committed to EAM if requested) without parsing or
+    calling the LLM. Otherwise the document is extracted and stored as a draft
+    before any EAM result is awaited, so a failed EAM write never loses the
+    extraction. EAM writes go through the draft's outbox (see commit_draft).
+
+    Returns:
+        dict: The assistant's response fields, plus "draft" with the draft id, its
+              status and whether it was reused.
+    """
+    document_code = document_code or ""
+    content_hash = compute_content_hash(document)
+    draft = ExtractionDraft.objects.filter(
+        assistant=assistant, document_code=document_code, content_hash=content_hash
+    ).first()
+
+    commit_result = None
+    if draft is not None:
+        reused = True
+        metrics.increment("extraction_drafts_reused_total", labels={"assistant": assistant})
+        logger.info(f"Reusing {assistant} draft {draft.id} for {document_code or document.name}")
+        if create_in_eam:
+            commit_result = commit_draft(draft)
+    else:
+        reused = False
+        extraction, finish_commit = extract(document, create_in_eam)
+        draft = _save_draft(assistant, document_code, content_hash, document.name, extraction)
+        if create_in_eam:
+            # Streaming assistants already started their EAM writes during the extraction
+            completed_writes = finish_commit() if finish_commit else None
+            commit_result = commit_draft(draft, completed_writes=completed_writes)
+
+    response_data = dict(draft.extracted_data)
+    if commit_result:
+        response_data.update(commit_result)
+    response_data["draft"] = {"id": str(draft.id), "status": draft.status, "reused": reused}
+    return response_data
+
+
+def commit_draft(
+    draft: ExtractionDraft,
+    force: bool = False,
+    completed_writes: Optional[WriteResults] = None,
+    resend_unknown: bool = False,
+) -> dict:
+    """
+    Creates the records of a draft in EAM through its outbox and stores the result on the draft.
+
+    The assistant pipeline plans the writes (plan_eam_writes), which are recorded in
+    the outbox; only the writes not confirmed by an earlier attempt are sent, so
+    retrying a partially failed commit costs only the failed writes. A committed
+    draft returns its stored result unless force is set.
+
+    Args:
+        draft: The draft to commit.
+        force: Deliver every write again that can be checked in EAM first or is idempotent.
+        completed_writes: Responses of writes already done inline during the extraction, by write key.
+        resend_unknown: Resend the writes that cannot be checked in EAM and whose
+                        earlier attempt has no recorded outcome (see run_outbox).
+
+    Raises:
+        Exception: The EAM error (OutboxIncompleteError if some writes failed), after it
+                   has been recorded in draft.commit_error.
+    """
+    if draft.status == ExtractionDraft.Status.COMMITTED and not force:
+        return draft.commit_result or {}
+
+    pipeline = get_pipeline(draft.assistant)
+    try:
+        with stage(EAM_COMMIT_STAGE, assistant=draft.assistant):
+            plan_outbox(draft, pipeline.plan_eam_writes(draft.extracted_data))
+            if completed_writes:
+                record_completed_writes(draft, completed_writes)
+            results = run_outbox(draft, force=force, resend_unknown=resend_unknown)
+            result = pipeline.summarize_eam_writes(draft.extracted_data, results)
+    except Exception as e:
+        draft.commit_error = str(e) or type(e).__name__
+        draft.save(update_fields=["commit_error", "updated_at"])
+        raise
+
+    draft.status = ExtractionDraft.Status.COMMITTED
+    draft.commit_result = result
+    draft.commit_error = ""
+    draft.committed_at = timezone.now()
+    draft.save(update_fields=["status", "commit_result", "commit_error", "committed_at", "updated_at"])
+    metrics.increment("extraction_drafts_committed_total", labels={"assistant": draft.assistant})
+    return result
+
+
+def _save_draft(assistant: str, document_code: str, content_hash: str, document_name: str, extraction: dict):
+    try:
+        return ExtractionDraft.objects.create(
+            assistant=assistant,
+            document_code=document_code,
+            content_hash=content_hash,
+            document_name=document_name or "",
+            extracted_data=extraction,
+        )
+    except IntegrityError:
+        # The same document was extracted concurrently; keep the first draft
+        return ExtractionDraft.objects.get(
+            assistant=assistant, document_code=document_code, content_hash=content_hash
+        )
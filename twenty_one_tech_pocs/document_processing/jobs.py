@@ -0,0 +1,217 @@
+import logging
+import os
+import threading
+import time
+from datetime import timedelta
+from typing import Optional
+
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+
+from .models import DocumentJob
+from .pipelines import get_pipeline
+from twenty_one_tech_pocs.common.eam_api import EAMApiService
+from twenty_one_tech_pocs.common.llm_metrics import llm_call_context, metrics
+from twenty_one_tech_pocs.common.stages import DOWNLOAD_STAGE, StageListener, stage, stage_listener
+
+logger = logging.getLogger(__name__)
+
+# Seconds between two heartbeats of a running job, also while a stage runs
+HEARTBEAT_INTERVAL = 60
+
+
+def _claimed(job: DocumentJob):
+    """The job's row while it is still this worker's claim (not recovered and claimed again)."""
+    return DocumentJob.objects.filter(
+        pk=job.pk, status=DocumentJob.Status.RUNNING, worker=job.worker, attempts=job.attempts
+    )
+
+
+class JobHeartbeat:
+    """
+    Refreshes the heartbeat of a running job from a timer thread, every interval seconds.
+
+    Keeps a job with a long stage from being recovered as stale while its worker is alive.
+    """
+
+    def __init__(self, job: DocumentJob, interval: float = HEARTBEAT_INTERVAL):
+        self.job = job
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"document-job-heartbeat-{job.pk}", daemon=True)
+
+    def __enter__(self) -> "JobHeartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        try:
+            while not self._stop.wait(self.interval):
+                try:
+                    if not _claimed(self.job).update(heartbeat_at=timezone.now()):
+                        logger.warning(f"Document job {self.job.id} was recovered by another worker")
+                        return
+                except Exception as e:
+                    logger.warning(f"Failed to refresh the heartbeat of document job {self.job.id}: {e}")
+        finally:
+            connection.close()
+
+
+class JobStageRecorder(StageListener):
+    """Stores the progress and timing of every stage on the job row (and refreshes its heartbeat)."""
+
+    def __init__(self, job: DocumentJob):
+        self.job = job
+
+    def stage_started(self, name: str) -> None:
+        self.job.stage = name
+        self.job.stages = list(self.job.stages) + [
+            {"name": name, "status": "running", "started_at": timezone.now().isoformat()}
+        ]
+        self._save()
+
+    def stage_finished(self, name: str, duration: float, error: Optional[str] = None) -> None:
+        for entry in reversed(self.job.stages):
+            if entry["name"] == name and entry["status"] == "running":
+                entry.update(
+                    status="failed" if error else "succeeded",
+                    finished_at=timezone.now().isoformat(),
+                    duration=round(duration, 3),
+                )
+                if error:
+                    entry["error"] = error
+                break
+        self._save()
+
+    def _save(self) -> None:
+        self.job.heartbeat_at = timezone.now()
+        _claimed(self.job).update(stage=self.job.stage, stages=self.job.stages, heartbeat_at=self.job.heartbeat_at)
+
+
+def enqueue_job(
+    assistant: str,
+    document_code: str = "",
+    upload_name: str = "",
+    upload_content: Optional[bytes] = None,
+    create_in_eam: bool = False,
+) -> DocumentJob:
+    """Creates a queued job; a worker picks it up in creation order."""
+    job = DocumentJob.objects.create(
+        assistant=assistant,
+        document_code=document_code or "",
+        upload_name=upload_name or "",
+        upload_content=upload_content,
+        create_in_eam=create_in_eam,
+    )
+    metrics.increment("document_jobs_enqueued_total", labels={"assistant": assistant})
+    return job
+
+
+def claim_next_job(worker: str) -> Optional[DocumentJob]:
+    """
+    Claims the oldest queued job for this worker, or returns None if there is none.
+
+    The claim is a conditional UPDATE on the status, so concurrent workers (threads
+    or processes sharing the database) never run the same job.
+    """
+    candidates = (
+        DocumentJob.objects.filter(status=DocumentJob.Status.QUEUED)
+        .order_by("created_at")
+        .values_list("pk", flat=True)[:5]
+    )
+    for job_id in list(candidates):
+        now = timezone.now()
+        claimed = DocumentJob.objects.filter(pk=job_id, status=DocumentJob.Status.QUEUED).update(
+            status=DocumentJob.Status.RUNNING,
+            worker=worker,
+            started_at=now,
+            heartbeat_at=now,
+            finished_at=None,
+            attempts=F("attempts") + 1,
+            stage="",
+            stages=[],
+            error="",
+        )
+        if claimed:
+            return DocumentJob.objects.get(pk=job_id)
+    return None
+
+
+def requeue_stale_jobs(stale_after: int, max_attempts: int) -> int:
+    """
+    Recovers jobs whose worker stopped (process restart, crash) while running them.
+
+    Running jobs without a heartbeat for stale_after seconds are queued again, or
+    failed once they have used max_attempts attempts. A live worker refreshes the
+    heartbeat every HEARTBEAT_INTERVAL seconds (see JobHeartbeat).
+    """
+    cutoff = timezone.now() - timedelta(seconds=stale_after)
+    stale = DocumentJob.objects.filter(status=DocumentJob.Status.RUNNING, heartbeat_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=max_attempts).update(
+        status=DocumentJob.Status.FAILED,
+        error="The worker stopped while processing the job.",
+        finished_at=timezone.now(),
+    )
+    requeued = stale.filter(attempts__lt=max_attempts).update(status=DocumentJob.Status.QUEUED, stage="")
+    if failed or requeued:
+        logger.warning(f"Recovered stale document jobs: {requeued} requeued, {failed} failed")
+    return requeued + failed
+
+
+def run_job(job: DocumentJob) -> None:
+    """
+    Runs a claimed job to completion and stores its result or error.
+
+    The result is only stored while the job is still this worker's claim; if the
+    job was recovered as stale in the meantime, the attempt that runs now owns it.
+    """
+    started = time.monotonic()
+    try:
+        with JobHeartbeat(job):
+            result = execute_job(job)
+    except Exception as e:
+        logger.exception(f"Document job {job.id} ({job.assistant}) failed")
+        job.status = DocumentJob.Status.FAILED
+        job.error = str(e) or type(e).__name__
+    else:
+        job.status = DocumentJob.Status.SUCCEEDED
+        job.result = result
+    job.stage = ""
+    job.finished_at = timezone.now()
+    saved = _claimed(job).update(
+        status=job.status, result=job.result, error=job.error, stage=job.stage, finished_at=job.finished_at
+    )
+    if not saved:
+        logger.warning(
+            f"Document job {job.id} ({job.assistant}) was recovered by another worker; discarding this attempt's "
+            f"{job.status} outcome"
+        )
+        metrics.increment("document_jobs_discarded_total", labels={"assistant": job.assistant})
+        return
+
+    labels = {"assistant": job.assistant}
+    metrics.increment("document_jobs_total", labels={**labels, "status": job.status})
+    metrics.observe("document_job_seconds", time.monotonic() - started, labels)
+    logger.info(f"Document job {job.id} ({job.assistant}) {job.status} in {time.monotonic() - started:.1f}s")
+
+
+def execute_job(job: DocumentJob) -> dict:
+    """Downloads (or reads) the job's document and runs the assistant's pipeline on it."""
+    pipeline = get_pipeline(job.assistant)
+    with llm_call_context(endpoint=f"document-job:{job.assistant}"), stage_listener(JobStageRecorder(job)):
+        if job.document_code:
+            with stage(DOWNLOAD_STAGE, assistant=job.assistant):
+                content = EAMApiService().fetch_document_attachment(job.document_code)
+            name = pipeline.document_name(job.document_code)
+        else:
+            content, name = bytes(job.upload_content or b""), job.upload_name
+        document = ContentFile(content, name=os.path.basename(name))
+        return pipeline.run_document_pipeline(
+            document, create_in_eam=job.create_in_eam, document_code=job.document_code
+        )
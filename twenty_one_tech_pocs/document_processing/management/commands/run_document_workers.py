@@ -0,0 +1,39 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from twenty_one_tech_pocs.document_processing.worker import DocumentJobWorkerPool, get_worker_pool
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs background document job workers in this process until interrupted. "
+        "Set DOCUMENT_JOBS_IN_PROCESS=false on the web processes when using it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, help="Concurrent jobs (default: DOCUMENT_JOBS_WORKERS or 2)")
+
+    def handle(self, *args, **options):
+        configured = get_worker_pool()
+        pool = configured
+        if options.get("workers"):
+            pool = DocumentJobWorkerPool(
+                workers=options["workers"],
+                poll_interval=configured.poll_interval,
+                stale_after=configured.stale_after,
+                max_attempts=configured.max_attempts,
+            )
+
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+        pool.start()
+        self.stdout.write(f"Running {pool.workers} document job workers (Ctrl+C to stop)")
+        try:
+            while not stop.wait(1.0):
+                pass
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write("Stopping after the current jobs...")
+        pool.stop()
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:21
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('assistant', models.CharField(choices=[('maintenance_assistant', 'Maintenance Assistant'), ('service_manuals_assistant', 'Service Manuals Assistant'), ('safety_procedure_assistant', 'Safety Procedure Assistant'), ('training_manuals_assistant', 'Training Manuals Assistant')], max_length=64)),
+                ('document_code', models.CharField(blank=True, max_length=128)),
+                ('upload_name', models.CharField(blank=True, max_length=255)),
+                ('upload_content', models.BinaryField(blank=True, null=True)),
+                ('create_in_eam', models.BooleanField(default=False)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='queued', max_length=16)),
+                ('stage', models.CharField(blank=True, max_length=32)),
+                ('stages', models.JSONField(blank=True, default=list)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('worker', models.CharField(blank=True, max_length=128)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='document_pr_status_d8c2c3_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:24
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('document_processing', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExtractionDraft',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('assistant', models.CharField(choices=[('maintenance_assistant', 'Maintenance Assistant'), ('service_manuals_assistant', 'Service Manuals Assistant'), ('safety_procedure_assistant', 'Safety Procedure Assistant'), ('training_manuals_assistant', 'Training Manuals Assistant')], max_length=64)),
+                ('document_code', models.CharField(blank=True, max_length=128)),
+                ('content_hash', models.CharField(max_length=64)),
+                ('document_name', models.CharField(blank=True, max_length=255)),
+                ('extracted_data', models.JSONField()),
+                ('status', models.CharField(choices=[('draft', 'Draft'), ('committed', 'Committed')], default='draft', max_length=16)),
+                ('commit_result', models.JSONField(blank=True, null=True)),
+                ('commit_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('committed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-updated_at'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='extractiondraft',
+            constraint=models.UniqueConstraint(fields=('assistant', 'document_code', 'content_hash'), name='unique_extraction_draft'),
+        ),
+    ]
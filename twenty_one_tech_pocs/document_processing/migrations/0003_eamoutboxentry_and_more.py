@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('document_processing', '0002_extractiondraft_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EAMOutboxEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255)),
+                ('sequence', models.PositiveIntegerField()),
+                ('operation', models.CharField(max_length=64)),
+                ('payload', models.JSONField(default=dict)),
+                ('depends_on', models.JSONField(blank=True, default=list)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('confirmed', 'Confirmed'), ('failed', 'Failed')], db_index=True, default='pending', max_length=16)),
+                ('response', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('confirmed_at', models.DateTimeField(blank=True, null=True)),
+                ('draft', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='outbox_entries', to='document_processing.extractiondraft')),
+            ],
+            options={
+                'verbose_name': 'EAM outbox entry',
+                'verbose_name_plural': 'EAM outbox entries',
+                'ordering': ['draft', 'sequence'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='eamoutboxentry',
+            constraint=models.UniqueConstraint(fields=('draft', 'key'), name='unique_outbox_entry_key'),
+        ),
+    ]
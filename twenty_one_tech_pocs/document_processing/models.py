@@ -0,0 +1,174 @@
+import uuid
+
+from django.db import models
+
+from twenty_one_tech_pocs.common.eam_writes import EAMWrite
+from twenty_one_tech_pocs.common.stages import DOWNLOAD_STAGE, EAM_COMMIT_STAGE, EXTRACT_STAGE, PARSE_STAGE
+
+
+class DocumentJob(models.Model):
+    """
+    A document processed in the background by one of the assistants.
+
+    The job row is the queue: workers claim queued jobs with a conditional update,
+    record the progress of every stage in `stages`, and store the same response
+    data the synchronous endpoint returns in `result`.
+    """
+
+    class Assistant(models.TextChoices):
+        MAINTENANCE = "maintenance_assistant", "Maintenance Assistant"
+        SERVICE_MANUALS = "service_manuals_assistant", "Service Manuals Assistant"
+        SAFETY_PROCEDURE = "safety_procedure_assistant", "Safety Procedure Assistant"
+        TRAINING_MANUALS = "training_manuals_assistant", "Training Manuals Assistant"
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", "Queued"
+        RUNNING = "running", "Running"
+        SUCCEEDED = "succeeded", "Succeeded"
+        FAILED = "failed", "Failed"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    assistant = models.CharField(max_length=64, choices=Assistant.choices)
+    document_code = models.CharField(max_length=128, blank=True)
+    # Directly uploaded files are kept in the database so any worker process can read them
+    upload_name = models.CharField(max_length=255, blank=True)
+    upload_content = models.BinaryField(null=True, blank=True)
+    create_in_eam = models.BooleanField(default=False)
+
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.QUEUED)
+    stage = models.CharField(max_length=32, blank=True)
+    # One entry per stage: name, status, started_at, finished_at, duration and error
+    stages = models.JSONField(default=list, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    worker = models.CharField(max_length=128, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [models.Index(fields=["status", "created_at"])]
+
+    def __str__(self):
+        return f"{self.assistant} job {self.id} ({self.status})"
+
+    @property
+    def expected_stages(self) -> list:
+        """The stages this job goes through, in order."""
+        stages = [PARSE_STAGE, EXTRACT_STAGE]
+        if self.document_code:
+            stages.insert(0, DOWNLOAD_STAGE)
+        if self.create_in_eam:
+            stages.append(EAM_COMMIT_STAGE)
+        return stages
+
+    @property
+    def progress(self) -> float:
+        """Share of the expected stages that have finished (1.0 once the job has succeeded)."""
+        if self.status == self.Status.SUCCEEDED:
+            return 1.0
+        finished = {entry["name"] for entry in self.stages if entry.get("status") == "succeeded"}
+        expected = self.expected_stages
+        return round(len(finished.intersection(expected)) / len(expected), 2)
+
+    @property
+    def queue_seconds(self):
+        if not self.started_at:
+            return None
+        return round((self.started_at - self.created_at).total_seconds(), 3)
+
+    @property
+    def run_seconds(self):
+        if not self.started_at or not self.finished_at:
+            return None
+        return round((self.finished_at - self.started_at).total_seconds(), 3)
+
+
+class ExtractionDraft(models.Model):
+    """
+    The stored extraction result of one document content, per assistant.
+
+    Drafts are keyed by assistant, document code and the SHA-256 of the file, so
+    resubmitting the same document reuses the extraction instead of calling the
+    LLM again, and a reviewed draft can be pushed to EAM on its own.
+    """
+
+    class Status(models.TextChoices):
+        DRAFT = "draft", "Draft"
+        COMMITTED = "committed", "Committed"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    assistant = models.CharField(max_length=64, choices=DocumentJob.Assistant.choices)
+    document_code = models.CharField(max_length=128, blank=True)
+    content_hash = models.CharField(max_length=64)
+    document_name = models.CharField(max_length=255, blank=True)
+    # The extraction part of the assistant's response, e.g. {"extracted_data": {...}}
+    extracted_data = models.JSONField()
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.DRAFT)
+    # The EAM part of the response of the last successful commit
+    commit_result = models.JSONField(null=True, blank=True)
+    commit_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    committed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-updated_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["assistant", "document_code", "content_hash"], name="unique_extraction_draft"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.assistant} draft {self.document_code or self.document_name} ({self.status})"
+
+
+class EAMOutboxEntry(models.Model):
+    """
+    One planned EAM write of a draft commit and its delivery state.
+
+    A commit first records every write it plans (pending). A write is marked sent
+    before the request and confirmed or failed after it, so a retried commit only
+    replays what is not confirmed, and knows which writes may already exist in EAM.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        SENT = "sent", "Sent"
+        CONFIRMED = "confirmed", "Confirmed"
+        FAILED = "failed", "Failed"
+
+    draft = models.ForeignKey(ExtractionDraft, on_delete=models.CASCADE, related_name="outbox_entries")
+    # Stable idempotency key within the draft, e.g. "checklist:TP-001:30"
+    key = models.CharField(max_length=255)
+    sequence = models.PositiveIntegerField()
+    operation = models.CharField(max_length=64)
+    payload = models.JSONField(default=dict)
+    depends_on = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING, db_index=True)
+    response = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    confirmed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["draft", "sequence"]
+        verbose_name = "EAM outbox entry"
+        verbose_name_plural = "EAM outbox entries"
+        constraints = [models.UniqueConstraint(fields=["draft", "key"], name="unique_outbox_entry_key")]
+
+    def __str__(self):
+        return f"{self.key} ({self.status})"
+
+    def as_write(self) -> EAMWrite:
+        return EAMWrite(
+            key=self.key, operation=self.operation, payload=self.payload, depends_on=tuple(self.depends_on)
+        )
@@ -0,0 +1,213 @@
+import logging
+from typing import List, Optional
+
+from django.db.models import F
+from django.utils import timezone
+
+from .models import EAMOutboxEntry, ExtractionDraft
+from twenty_one_tech_pocs.common.eam_api import EAMApiService
+from twenty_one_tech_pocs.common.eam_writes import (
+    EAMWrite,
+    WriteResults,
+    apply_write,
+    can_find,
+    find_write,
+    is_idempotent,
+)
+from twenty_one_tech_pocs.common.llm_metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxIncompleteError(ValueError):
+    """Raised when writes of a commit failed or could not run; the confirmed ones are kept."""
+
+    def __init__(self, failed: int, blocked: int, first_error: str):
+        self.failed = failed
+        self.blocked = blocked
+        super().__init__(
+            f"{failed} EAM writes failed and {blocked} are waiting on them; commit again to retry only "
+            f"those. First error: {first_error}"
+        )
+
+
+def plan_outbox(draft: ExtractionDraft, writes: List[EAMWrite]) -> int:
+    """
+    Records the planned writes of a draft as pending.
+
+    Writes already in the outbox (same key) keep their state, so planning again
+    before a retry is harmless. Returns the number of new entries.
+    """
+    existing = set(draft.outbox_entries.values_list("key", flat=True))
+    planned = set()
+    entries = []
+    for sequence, write in enumerate(writes):
+        if write.key in existing or write.key in planned:
+            continue
+        planned.add(write.key)
+        entries.append(
+            EAMOutboxEntry(
+                draft=draft,
+                key=write.key,
+                sequence=sequence,
+                operation=write.operation,
+                payload=write.payload,
+                depends_on=list(write.depends_on),
+            )
+        )
+    EAMOutboxEntry.objects.bulk_create(entries, ignore_conflicts=True)
+    return len(entries)
+
+
+def record_completed_writes(draft: ExtractionDraft, results: WriteResults) -> None:
+    """Confirms writes already done outside the outbox (inline while the extraction streamed in)."""
+    now = timezone.now()
+    entries = list(
+        draft.outbox_entries.filter(key__in=list(results)).exclude(status=EAMOutboxEntry.Status.CONFIRMED)
+    )
+    for entry in entries:
+        entry.status = EAMOutboxEntry.Status.CONFIRMED
+        entry.response = results[entry.key]
+        entry.error = ""
+        entry.attempts += 1
+        entry.sent_at = entry.sent_at or now
+        entry.confirmed_at = now
+        # bulk_update does not apply auto_now
+        entry.updated_at = now
+    EAMOutboxEntry.objects.bulk_update(
+        entries, ["status", "response", "error", "attempts", "sent_at", "confirmed_at", "updated_at"]
+    )
+
+
+def run_outbox(
+    draft: ExtractionDraft,
+    eam_api: Optional[EAMApiService] = None,
+    force: bool = False,
+    resend_unknown: bool = False,
+) -> WriteResults:
+    """
+    Sends the outbox writes of a draft that are not confirmed yet, in plan order.
+
+    A write whose earlier attempt was sent or failed is first looked up in EAM when
+    the record has a natural key (task plans, schedules, qualifications), so it is
+    not created twice. Status updates are resent as they are idempotent. Other
+    writes (checklists, hazards, precautions, safety matrix records) cannot be
+    checked: a sent one whose outcome was not recorded is held back until the
+    caller has checked EAM and asks for it with resend_unknown, and a confirmed
+    one is never resent. A write whose dependencies are not confirmed waits for
+    the next run.
+
+    Args:
+        draft: The draft whose outbox is run.
+        eam_api: The EAM client; a new EAMApiService by default.
+        force: Deliver every write that can be checked in EAM or is idempotent again,
+               checking EAM first where possible.
+        resend_unknown: Resend the writes that cannot be checked and whose earlier
+                        attempt has no recorded outcome.
+
+    Returns:
+        The EAM responses of all writes, by write key.
+
+    Raises:
+        OutboxIncompleteError: If writes failed or were blocked by failed writes.
+    """
+    eam_api = eam_api or EAMApiService()
+    entries = list(draft.outbox_entries.order_by("sequence"))
+    results: WriteResults = {
+        entry.key: entry.response
+        for entry in entries
+        if entry.status == EAMOutboxEntry.Status.CONFIRMED and not (force and _can_replay(entry.as_write()))
+    }
+    failed = blocked = 0
+    first_error = ""
+
+    for entry in entries:
+        if entry.key in results:
+            continue
+        write = entry.as_write()
+        if any(dependency not in results for dependency in write.depends_on):
+            blocked += 1
+            continue
+        try:
+            response, outcome = _deliver(eam_api, entry, write, results, verify=force, resend_unknown=resend_unknown)
+        except _AlreadyClaimed:
+            blocked += 1
+            continue
+        except _OutcomeUnknown as e:
+            entry.error = str(e)
+            entry.save(update_fields=["error", "updated_at"])
+            logger.warning(f"EAM write {entry.key} of draft {draft.id} held back: {entry.error}")
+            failed += 1
+            first_error = first_error or entry.error
+            continue
+        except Exception as e:
+            entry.status = EAMOutboxEntry.Status.FAILED
+            entry.error = str(e) or type(e).__name__
+            entry.response = getattr(e, "response", None)
+            entry.save(update_fields=["status", "error", "response", "updated_at"])
+            metrics.increment("eam_outbox_writes_total", labels={"assistant": draft.assistant, "outcome": "failed"})
+            logger.warning(f"EAM write {entry.key} of draft {draft.id} failed: {entry.error}")
+            failed += 1
+            first_error = first_error or entry.error
+            continue
+
+        entry.status = EAMOutboxEntry.Status.CONFIRMED
+        entry.response = response
+        entry.error = ""
+        entry.confirmed_at = timezone.now()
+        entry.save(update_fields=["status", "response", "error", "confirmed_at", "updated_at"])
+        metrics.increment("eam_outbox_writes_total", labels={"assistant": draft.assistant, "outcome": outcome})
+        results[entry.key] = response
+
+    if failed or blocked:
+        raise OutboxIncompleteError(failed, blocked, first_error or "waiting on writes of another commit")
+    return results
+
+
+class _AlreadyClaimed(Exception):
+    pass
+
+
+class _OutcomeUnknown(Exception):
+    pass
+
+
+def _can_replay(write: EAMWrite) -> bool:
+    """Whether sending the write again cannot create a duplicate: EAM can be checked first, or it is idempotent."""
+    return can_find(write) or is_idempotent(write)
+
+
+def _deliver(
+    eam_api: EAMApiService,
+    entry: EAMOutboxEntry,
+    write: EAMWrite,
+    results: WriteResults,
+    verify: bool,
+    resend_unknown: bool,
+):
+    previous_status = entry.status
+    if (verify or previous_status != EAMOutboxEntry.Status.PENDING) and can_find(write):
+        # The earlier attempt may have created the record before failing or being interrupted
+        existing = find_write(eam_api, write, results)
+        if existing is not None:
+            logger.info(f"EAM write {entry.key} of draft {entry.draft_id} already done, not resending it")
+            return existing, "found"
+    elif previous_status == EAMOutboxEntry.Status.SENT and not _can_replay(write):
+        if not resend_unknown:
+            raise _OutcomeUnknown(
+                "The earlier attempt has no recorded outcome and the record cannot be looked up in EAM; "
+                "check EAM, then commit with resend_unknown=true to send it again"
+            )
+        logger.warning(f"Resending EAM write {entry.key} of draft {entry.draft_id} with an unknown earlier outcome")
+
+    # Conditional update, as for job claims: a concurrent commit of the same draft skips this write
+    now = timezone.now()
+    claimed = EAMOutboxEntry.objects.filter(pk=entry.pk, status=previous_status, attempts=entry.attempts).update(
+        status=EAMOutboxEntry.Status.SENT, attempts=F("attempts") + 1, sent_at=now, updated_at=now
+    )
+    if not claimed:
+        raise _AlreadyClaimed()
+    entry.status = EAMOutboxEntry.Status.SENT
+    entry.attempts += 1
+    entry.sent_at = now
+    return apply_write(eam_api, write, results), "confirmed"
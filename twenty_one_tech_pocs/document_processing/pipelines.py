@@ -0,0 +1,17 @@
+from importlib import import_module
+
+from .models import DocumentJob
+
+# Modules providing the assistant pipelines: run_document_pipeline(document, create_in_eam, document_code),
+# plan_eam_writes(extraction), summarize_eam_writes(extraction, results) and document_name(document_code)
+PIPELINES = {
+    DocumentJob.Assistant.MAINTENANCE: "twenty_one_tech_pocs.maintenance_assistant.pipeline",
+    DocumentJob.Assistant.SERVICE_MANUALS: "twenty_one_tech_pocs.service_manuals_assistant.pipeline",
+    DocumentJob.Assistant.SAFETY_PROCEDURE: "twenty_one_tech_pocs.safety_procedure_assistant.pipeline",
+    DocumentJob.Assistant.TRAINING_MANUALS: "twenty_one_tech_pocs.training_manuals_assistant.pipeline",
+}
+
+
+def get_pipeline(assistant: str):
+    """Imports the pipeline module of an assistant (lazily, the assistants pull in LangChain)."""
+    return import_module(PIPELINES[assistant])
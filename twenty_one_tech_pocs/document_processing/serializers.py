@@ -0,0 +1,80 @@
+from rest_framework import serializers
+
+from .models import DocumentJob, EAMOutboxEntry, ExtractionDraft
+
+
+class DocumentJobSerializer(serializers.ModelSerializer):
+    """Status of a job: current stage, per-stage progress and timings (without the result)."""
+
+    job_id = serializers.UUIDField(source="id", read_only=True)
+    expected_stages = serializers.ListField(child=serializers.CharField(), read_only=True)
+    progress = serializers.FloatField(read_only=True)
+    queue_seconds = serializers.FloatField(read_only=True, allow_null=True)
+    run_seconds = serializers.FloatField(read_only=True, allow_null=True)
+
+    class Meta:
+        model = DocumentJob
+        fields = [
+            "job_id",
+            "assistant",
+            "document_code",
+            "upload_name",
+            "create_in_eam",
+            "status",
+            "stage",
+            "expected_stages",
+            "stages",
+            "progress",
+            "error",
+            "attempts",
+            "created_at",
+            "started_at",
+            "finished_at",
+            "queue_seconds",
+            "run_seconds",
+        ]
+        read_only_fields = fields
+
+
+class ExtractionDraftSerializer(serializers.ModelSerializer):
+    """A stored extraction; the list endpoint leaves out the extracted data."""
+
+    draft_id = serializers.UUIDField(source="id", read_only=True)
+
+    class Meta:
+        model = ExtractionDraft
+        fields = [
+            "draft_id",
+            "assistant",
+            "document_code",
+            "document_name",
+            "content_hash",
+            "status",
+            "extracted_data",
+            "commit_result",
+            "commit_error",
+            "created_at",
+            "updated_at",
+            "committed_at",
+        ]
+        read_only_fields = fields
+
+
+class EAMOutboxEntrySerializer(serializers.ModelSerializer):
+    """One planned EAM write of a draft and its delivery state."""
+
+    class Meta:
+        model = EAMOutboxEntry
+        fields = [
+            "key",
+            "sequence",
+            "operation",
+            "depends_on",
+            "status",
+            "attempts",
+            "error",
+            "response",
+            "sent_at",
+            "confirmed_at",
+        ]
+        read_only_fields = fields
@@ -0,0 +1,10 @@
+from django.urls import path
+from .views import DocumentJobListView, DocumentJobDetailView, DocumentJobResultView
+
+app_name = 'document_processing'
+
+urlpatterns = [
+    path('', DocumentJobListView.as_view(), name='document_jobs'),
+    path('<uuid:job_id>/', DocumentJobDetailView.as_view(), name='document_job_status'),
+    path('<uuid:job_id>/result/', DocumentJobResultView.as_view(), name='document_job_result'),
+]
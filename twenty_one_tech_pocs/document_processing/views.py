@@ -0,0 +1,245 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .batch import STAGE_LIMIT_SETTINGS, get_batch_settings, run_batch
+from .drafts import commit_draft
+from .jobs import enqueue_job
+from .models import DocumentJob, ExtractionDraft
+from .serializers import DocumentJobSerializer, EAMOutboxEntrySerializer, ExtractionDraftSerializer
+from .worker import ensure_in_process_workers
+
+
+def _as_bool(value) -> bool:
+    # Form posts send "true"/"false" strings, JSON bodies send booleans
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
+
+class DocumentBatchView(APIView):
+    """
+    Processes a list of EAM documents with one assistant and streams the results.
+
+    POST fields: document_codes (a list of DOCUMENTCODEs), create_in_eam, and an
+    optional concurrency object overriding the per-stage limits ("download",
+    "parse", "llm", "eam"). The response is NDJSON: one line per document as it
+    finishes, then a report line with documents/min and tokens/min.
+
+    Mounted by each assistant's urls with as_view(assistant=...).
+    """
+
+    assistant = None
+
+    def post(self, request):
+        document_codes = request.data.get("document_codes")
+        if isinstance(document_codes, str):
+            document_codes = [code.strip() for code in document_codes.split(",")]
+        if not document_codes or not isinstance(document_codes, list):
+            return Response(
+                {"error": "document_codes must be a non-empty list of EAM document codes"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        settings = get_batch_settings()
+        if len(document_codes) > settings["max_documents"]:
+            return Response(
+                {"error": f"A batch is limited to {settings['max_documents']} documents"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        stage_limits = dict(settings["stage_limits"])
+        concurrency = request.data.get("concurrency") or {}
+        if not isinstance(concurrency, dict):
+            return Response(
+                {"error": "concurrency must be an object of per-stage limits, e.g. {\"llm\": 2}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        for stage_name, setting in STAGE_LIMIT_SETTINGS.items():
+            # "llm_concurrency" -> "llm"
+            value = concurrency.get(setting.replace("_concurrency", ""))
+            if value is None:
+                continue
+            try:
+                stage_limits[stage_name] = max(1, int(value))
+            except (TypeError, ValueError):
+                return Response(
+                    {"error": f"concurrency.{setting.replace('_concurrency', '')} must be an integer"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        records = run_batch(
+            self.assistant,
+            [str(code) for code in document_codes],
+            create_in_eam=_as_bool(request.data.get("create_in_eam", False)),
+            stage_limits=stage_limits,
+        )
+        response = StreamingHttpResponse(
+            (json.dumps(record, cls=DjangoJSONEncoder) + "\n" for record in records),
+            content_type="application/x-ndjson",
+        )
+        # Let proxies pass every line through as soon as it is written
+        response["X-Accel-Buffering"] = "no"
+        response["Cache-Control"] = "no-cache"
+        return response
+
+
+class DocumentJobListView(APIView):
+    """
+    Enqueues a document for background processing by one of the assistants.
+
+    POST fields: assistant (e.g. "maintenance_assistant"), document_code or a
+    `file` upload, and create_in_eam. Returns 202 with the job id and the URLs of
+    the status and result endpoints.
+    """
+
+    def post(self, request):
+        try:
+            assistant = request.data.get("assistant")
+            if assistant not in DocumentJob.Assistant.values:
+                return Response(
+                    {"error": f"assistant must be one of: {', '.join(DocumentJob.Assistant.values)}"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            document_code = request.data.get("document_code")
+            uploaded_file = request.FILES.get("file")
+            if not document_code and not uploaded_file:
+                return Response(
+                    {"error": "No document_code or file provided"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            job = enqueue_job(
+                assistant=assistant,
+                document_code=document_code or "",
+                upload_name=uploaded_file.name if uploaded_file and not document_code else "",
+                upload_content=uploaded_file.read() if uploaded_file and not document_code else None,
+                create_in_eam=_as_bool(request.data.get("create_in_eam", False)),
+            )
+            ensure_in_process_workers()
+
+            return Response(
+                {
+                    "job_id": str(job.id),
+                    "status": job.status,
+                    "status_url": request.build_absolute_uri(
+                        reverse("document_processing:document_job_status", args=[job.id])
+                    ),
+                    "result_url": request.build_absolute_uri(
+                        reverse("document_processing:document_job_result", args=[job.id])
+                    ),
+                },
+                status=status.HTTP_202_ACCEPTED,
+            )
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class DocumentJobDetailView(APIView):
+    """Returns the status of a job with per-stage progress and timings."""
+
+    def get(self, request, job_id):
+        job = get_object_or_404(DocumentJob, pk=job_id)
+        return Response(DocumentJobSerializer(job).data, status=status.HTTP_200_OK)
+
+
+class DocumentJobResultView(APIView):
+    """
+    Returns the result of a finished job: the same data as the synchronous endpoint.
+
+    Responds 202 with the status while the job is queued or running, and 500 with
+    the error if it failed.
+    """
+
+    def get(self, request, job_id):
+        job = get_object_or_404(DocumentJob, pk=job_id)
+        if job.status == DocumentJob.Status.SUCCEEDED:
+            return Response({"job_id": str(job.id), "result": job.result}, status=status.HTTP_200_OK)
+        if job.status == DocumentJob.Status.FAILED:
+            return Response(
+                {"job_id": str(job.id), "error": job.error}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        return Response(
+            {"job_id": str(job.id), "status": job.status, "stage": job.stage, "progress": job.progress},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class ExtractionDraftListView(APIView):
+    """
+    Lists stored extractions, most recently updated first.
+
+    Query parameters: assistant, document_code and status filter the list; limit
+    (default 50) bounds it.
+    """
+
+    def get(self, request):
+        drafts = ExtractionDraft.objects.defer("extracted_data", "commit_result")
+        for field in ("assistant", "document_code", "status"):
+            value = request.query_params.get(field)
+            if value:
+                drafts = drafts.filter(**{field: value})
+        try:
+            limit = min(int(request.query_params.get("limit", 50)), 500)
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = [
+            {
+                key: value
+                for key, value in ExtractionDraftSerializer(draft).data.items()
+                if key not in ("extracted_data", "commit_result")
+            }
+            for draft in drafts[:limit]
+        ]
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class ExtractionDraftDetailView(APIView):
+    """Returns a stored extraction with its data, last EAM commit result and EAM outbox."""
+
+    def get(self, request, draft_id):
+        draft = get_object_or_404(ExtractionDraft, pk=draft_id)
+        data = ExtractionDraftSerializer(draft).data
+        data["outbox"] = EAMOutboxEntrySerializer(draft.outbox_entries.order_by("sequence"), many=True).data
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class ExtractionDraftCommitView(APIView):
+    """
+    Creates the records of a stored extraction in EAM, without parsing or calling the LLM.
+
+    Only the EAM writes not confirmed by an earlier attempt are sent, so retrying a
+    partially failed commit replays just the failed writes. A committed draft returns
+    its stored result; send force=true to deliver again every write that can be
+    checked in EAM or is idempotent, and resend_unknown=true to resend the writes
+    that cannot be checked after an interrupted attempt.
+    """
+
+    def post(self, request, draft_id):
+        draft = get_object_or_404(ExtractionDraft, pk=draft_id)
+        already_committed = draft.status == ExtractionDraft.Status.COMMITTED
+        force = _as_bool(request.data.get("force", False))
+        resend_unknown = _as_bool(request.data.get("resend_unknown", False))
+        try:
+            commit_result = commit_draft(draft, force=force, resend_unknown=resend_unknown)
+        except Exception as e:
+            return Response(
+                {"draft_id": str(draft.id), "error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        return Response(
+            {
+                "draft_id": str(draft.id),
+                "status": draft.status,
+                "already_committed": already_committed and not force,
+                **commit_result,
+            },
+            status=status.HTTP_200_OK,
+        )
@@ -0,0 +1,154 @@
+import logging
+import os
+import socket
+import threading
+import time
+from typing import List, Optional
+
+from django.db import close_old_connections
+
+from .jobs import claim_next_job, requeue_stale_jobs, run_job
+from twenty_one_tech_pocs.common.config_manager import ConfigManager
+from twenty_one_tech_pocs.common.llm_metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 2
+DEFAULT_POLL_INTERVAL = 2.0
+# Running jobs refresh their heartbeat every jobs.HEARTBEAT_INTERVAL seconds, even
+# during a long stage, so a job is stale only once its worker has stopped
+DEFAULT_STALE_AFTER = 300
+DEFAULT_MAX_ATTEMPTS = 2
+# How often an idle worker looks for jobs abandoned by a stopped process
+RECOVERY_INTERVAL = 60.0
+
+
+class DocumentJobWorkerPool:
+    """
+    Threads that run queued DocumentJobs, using the Django database as the queue.
+
+    Several pools (e.g. one per web process plus a dedicated worker process) can
+    share the same database: jobs are claimed atomically and run exactly once.
+    Idle workers poll every poll_interval seconds; notify() wakes them right away
+    after an enqueue in the same process.
+    """
+
+    def __init__(
+        self,
+        workers: int = DEFAULT_WORKERS,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        stale_after: int = DEFAULT_STALE_AFTER,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    ):
+        """
+        Args:
+            workers: Jobs run concurrently by this pool.
+            poll_interval: Seconds an idle worker waits before looking for jobs again.
+            stale_after: Seconds without a heartbeat after which a running job is recovered.
+            max_attempts: Attempts before a recovered job is marked as failed.
+        """
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._running_jobs = 0
+        self._last_recovery = 0.0
+
+    @property
+    def started(self) -> bool:
+        return bool(self._threads)
+
+    def start(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            prefix = f"{socket.gethostname()}:{os.getpid()}"
+            for index in range(self.workers):
+                thread = threading.Thread(
+                    target=self._run, args=(f"{prefix}:{index}",), name=f"document-job-{index}", daemon=True
+                )
+                self._threads.append(thread)
+                thread.start()
+        logger.info(f"Started {self.workers} document job workers")
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stops the workers after their current job."""
+        self._stopping.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def notify(self) -> None:
+        """Wakes idle workers (called after a job is enqueued)."""
+        self._wake.set()
+
+    def _run(self, worker: str) -> None:
+        while not self._stopping.is_set():
+            try:
+                self._recover_stale_jobs()
+                job = claim_next_job(worker)
+                if job is None:
+                    self._wake.wait(self.poll_interval)
+                    self._wake.clear()
+                    continue
+                self._track(1)
+                try:
+                    run_job(job)
+                finally:
+                    self._track(-1)
+            except Exception as e:
+                # Database errors (e.g. a locked SQLite file) must not kill the worker
+                logger.error(f"Document job worker {worker} error: {e}")
+                time.sleep(self.poll_interval)
+            finally:
+                close_old_connections()
+
+    def _recover_stale_jobs(self) -> None:
+        with self._lock:
+            if time.monotonic() - self._last_recovery < RECOVERY_INTERVAL:
+                return
+            self._last_recovery = time.monotonic()
+        requeue_stale_jobs(self.stale_after, self.max_attempts)
+
+    def _track(self, delta: int) -> None:
+        with self._lock:
+            self._running_jobs += delta
+            running = self._running_jobs
+        metrics.set_gauge("document_jobs_running", running)
+
+
+_pool: Optional[DocumentJobWorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_worker_pool() -> DocumentJobWorkerPool:
+    """Returns the process-wide worker pool configured by the DOCUMENT_JOBS_* variables."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            config = ConfigManager().get_document_jobs_config()
+            _pool = DocumentJobWorkerPool(
+                workers=config.get("workers", DEFAULT_WORKERS),
+                poll_interval=config.get("poll_interval", DEFAULT_POLL_INTERVAL),
+                stale_after=config.get("stale_after", DEFAULT_STALE_AFTER),
+                max_attempts=config.get("max_attempts", DEFAULT_MAX_ATTEMPTS),
+            )
+        return _pool
+
+
+def ensure_in_process_workers() -> None:
+    """
+    Starts this process's workers unless DOCUMENT_JOBS_IN_PROCESS is false.
+
+    Set it to false when jobs are run by a dedicated `manage.py run_document_workers` process.
+    """
+    if not ConfigManager().get_document_jobs_config().get("in_process", True):
+        return
+    pool = get_worker_pool()
+    if not pool.started:
+        pool.start()
+    pool.notify()
@@ -3,4 +3,4 @@ from django.apps import AppConfig
 
 class EquipmentEntryAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'equipment_entry_app'
+    name = 'twenty_one_tech_pocs.equipment_entry_app'
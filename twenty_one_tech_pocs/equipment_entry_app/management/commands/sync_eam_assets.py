@@ -0,0 +1,50 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+
+from twenty_one_tech_pocs.common.config_manager import ConfigManager
+from twenty_one_tech_pocs.equipment_entry_app.sync import DEFAULT_INTERVAL, AssetSync, parse_eam_datetime
+from twenty_one_tech_pocs.equipment_entry_app.vector_store.equipment_entry import DEFAULT_INDEX_NAME
+
+
+class Command(BaseCommand):
+    help = (
+        "Indexes the equipment changed in EAM since the last sync into the assets index. "
+        "Runs once, or every --interval seconds with --loop until interrupted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--index", default=DEFAULT_INDEX_NAME, help="Index or alias to sync")
+        parser.add_argument("--loop", action="store_true", help="Keep syncing until interrupted")
+        parser.add_argument(
+            "--interval", type=float, help="Seconds between runs with --loop (default: ASSET_SYNC_INTERVAL or 300)"
+        )
+        parser.add_argument("--since", help="Sync the records updated since this EAM date instead of the watermark")
+
+    def handle(self, *args, **options):
+        since = None
+        if options.get("since"):
+            since = parse_eam_datetime(options["since"])
+            if since is None:
+                raise CommandError(f"Unrecognized date for --since: {options['since']}")
+        interval = options.get("interval") or ConfigManager().get_asset_sync_config().get("interval", DEFAULT_INTERVAL)
+
+        sync = AssetSync.from_env(index_name=options["index"])
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+        try:
+            while True:
+                result = sync.run(since=since)
+                since = None
+                self.stdout.write(
+                    f"{result['status']}: {result['fetched']} fetched, {result['changed']} changed, "
+                    f"{result['skipped']} skipped, {result['failed']} failed ({result['given_up']} given up); "
+                    f"watermark {result['watermark']}"
+                )
+                if not options["loop"] or stop.wait(interval):
+                    break
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sync.close()
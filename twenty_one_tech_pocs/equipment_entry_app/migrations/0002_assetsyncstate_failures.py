@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment_entry_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assetsyncstate',
+            name='failures',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 20:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment_entry_app', '0002_assetsyncstate_failures'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assetsyncstate',
+            name='serving_index',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import models
+
+
+class AssetSyncState(models.Model):
+    """
+    Progress of the incremental EAM asset sync into one index (see sync.py).
+
+    The watermark is the last-updated time of the newest EAM record the sync has
+    indexed; the next run asks EAM for the records updated since. It is kept as EAM
+    returns it, without time zone conversion.
+    """
+
+    index_name = models.CharField(max_length=255, unique=True)
+    watermark = models.DateTimeField(null=True, blank=True)
+    last_run_at = models.DateTimeField(null=True, blank=True)
+    # fetched, changed, skipped, failed and given-up record counts and the duration of the last run
+    last_run = models.JSONField(default=dict, blank=True)
+    # Records that failed to sync, by "code#organization": their last-updated time
+    # as EAM listed it and the number of runs that failed on that version
+    failures = models.JSONField(default=dict, blank=True)
+    # The concrete indices the alias served at the last run; when the loader swaps in a
+    # new one, the watermark goes back to the export it was loaded from
+    serving_index = models.CharField(max_length=255, blank=True, default="")
+
+    def __str__(self):
+        return f"Asset sync of {self.index_name} (watermark {self.watermark})"
@@ -0,0 +1,87 @@
+import logging
+import os
+from typing import List, Optional
+
+from .profiles import next_in_sequence
+
+logger = logging.getLogger(__name__)
+
+# A value must be seen on at least this many similar assets...
+DEFAULT_MIN_COUNT = 5
+# ...and make up at least this share of the counted values to be predicted without the LLM
+DEFAULT_MIN_SHARE = 0.9
+
+
+class HistoryPredictor:
+    """
+    Predicts a field from the historical value statistics alone when they are decisive.
+
+    When one value dominates the field among similar assets (enough assets, a large
+    enough share) the LLM would only echo it, so the value is returned directly. With
+    expected values the prediction must be one of them. Without a dominant value, an
+    identifier field whose profile shows a numbered sequence (e.g. PUMP-0042) gets
+    the next number.
+    """
+
+    def __init__(self, min_count: int = DEFAULT_MIN_COUNT, min_share: float = DEFAULT_MIN_SHARE):
+        self.min_count = min_count
+        self.min_share = min_share
+
+    @classmethod
+    def from_env(cls) -> "HistoryPredictor":
+        """Reads the thresholds from ASSET_HISTORY_MIN_COUNT and ASSET_HISTORY_MIN_SHARE."""
+        try:
+            min_count = int(os.getenv("ASSET_HISTORY_MIN_COUNT", DEFAULT_MIN_COUNT))
+        except ValueError:
+            min_count = DEFAULT_MIN_COUNT
+        try:
+            min_share = float(os.getenv("ASSET_HISTORY_MIN_SHARE", DEFAULT_MIN_SHARE))
+        except ValueError:
+            min_share = DEFAULT_MIN_SHARE
+        return cls(min_count=min_count, min_share=min_share)
+
+    def predict(
+        self, value_stats: List[dict], expected_values: Optional[list] = None, profile: Optional[dict] = None
+    ) -> Optional[str]:
+        """
+        Returns the dominant historical value, or None when the LLM should decide.
+
+        Args:
+            value_stats: {"value", "count", "total", ...} dicts by descending count
+                         (see EquipmentEntryElasticSearch.historical_value_stats); the
+                         share of a value is taken of total, which includes the values
+                         not listed, when it is given.
+            expected_values: Optional list of allowed values for the field.
+            profile: The field profile value_stats come from, if any (see profiles.py).
+        """
+        value = self._dominant_value(value_stats, expected_values)
+        if value is not None:
+            return value
+
+        sequence_value = self._allowed(next_in_sequence(profile), expected_values)
+        if sequence_value is not None:
+            logger.info(f"Predicted '{sequence_value}' as the next value of the {profile['group']} sequence")
+        return sequence_value
+
+    def _dominant_value(self, value_stats: List[dict], expected_values: Optional[list]) -> Optional[str]:
+        stats = [item for item in value_stats if item.get("value") not in (None, "")]
+        if not stats:
+            return None
+        top = stats[0]
+        total = max(top.get("total") or 0, sum(item["count"] for item in stats))
+        if top["count"] < self.min_count or top["count"] < self.min_share * total:
+            return None
+
+        value = self._allowed(str(top["value"]), expected_values)
+        if value is None:
+            return None
+        logger.info(f"Predicted '{value}' from history ({top['count']} of {total} similar assets)")
+        return value
+
+    @staticmethod
+    def _allowed(value: Optional[str], expected_values: Optional[list]) -> Optional[str]:
+        if value is None or not expected_values:
+            return value
+        # Return the caller's spelling of the value
+        allowed = {str(expected).strip().lower(): str(expected) for expected in expected_values}
+        return allowed.get(value.strip().lower())
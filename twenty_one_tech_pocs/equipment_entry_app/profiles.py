@@ -0,0 +1,140 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Written by data/build_field_profiles.py after each load of the assets index
+DEFAULT_PROFILES_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data", "field_profiles.sqlite3"
+)
+# Grouping label keys, most specific first: a prediction uses the first one the user has filled in
+PROFILE_DIMENSIONS = ("class", "eqtype", "category")
+# Profiles with fewer assets are not trusted over a search of similar assets
+DEFAULT_MIN_ASSETS = 20
+# Bytes of the file SQLite reads through a memory map instead of read() calls
+MMAP_SIZE = 256 * 1024 * 1024
+
+PROFILES_SCHEMA = """
+CREATE TABLE field_profiles (
+    dimension TEXT NOT NULL,
+    group_value TEXT NOT NULL,
+    field TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    profile TEXT NOT NULL,
+    PRIMARY KEY (dimension, group_value, field)
+) WITHOUT ROWID;
+CREATE TABLE profile_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class FieldProfileStore:
+    """
+    Read access to the precomputed field-value profiles.
+
+    A profile is the value distribution of one field among the assets of one class,
+    equipment type or category: {"total", "values": [[value, count, last_seen], ...],
+    "recent": [...], "pattern": {"prefix", "width", "max", "share"} or {}}, where a
+    pattern's max is the highest number of that prefix among all assets of the index.
+    The file is opened read-only and memory-mapped, and reopened when the builder
+    replaces it.
+    """
+
+    def __init__(self, path: Optional[str] = None, min_assets: Optional[int] = None):
+        self.path = path or os.getenv("ASSET_FIELD_PROFILES_PATH", DEFAULT_PROFILES_PATH)
+        if min_assets is None:
+            try:
+                min_assets = int(os.getenv("ASSET_PROFILE_MIN_ASSETS", DEFAULT_MIN_ASSETS))
+            except ValueError:
+                min_assets = DEFAULT_MIN_ASSETS
+        self.min_assets = min_assets
+        self._connection: Optional[sqlite3.Connection] = None
+        self._mtime: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def get(self, dimension: str, group_value: str, label_key: str) -> Optional[dict]:
+        """The profile of a field within one group, or None if there is none."""
+        with self._lock:
+            connection = self._connect()
+            if connection is None:
+                return None
+            row = connection.execute(
+                "SELECT profile FROM field_profiles WHERE dimension = ? AND group_value = ? AND field = ?",
+                (dimension, str(group_value), label_key),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def lookup(self, accepted_values: Optional[dict], label_key: str) -> Optional[dict]:
+        """
+        The profile of a field for the most specific group the accepted values name.
+
+        Returns None without accepted grouping values or when the group has fewer
+        than min_assets assets with the field set.
+        """
+        for dimension in PROFILE_DIMENSIONS:
+            group_value = (accepted_values or {}).get(dimension)
+            if group_value in (None, "") or dimension == label_key:
+                continue
+            profile = self.get(dimension, group_value, label_key)
+            if profile and profile["total"] >= self.min_assets:
+                return {**profile, "dimension": dimension, "group": group_value}
+        return None
+
+    def meta(self) -> dict:
+        """The index, index generation, build time and asset count of the profiles."""
+        with self._lock:
+            connection = self._connect()
+            if connection is None:
+                return {}
+            return dict(connection.execute("SELECT key, value FROM profile_meta").fetchall())
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return None
+        if self._connection is None or mtime != self._mtime:
+            if self._connection is not None:
+                self._connection.close()
+            # Read-only: the builder writes a new file and renames it over this one
+            self._connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            self._connection.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+            self._mtime = mtime
+            logger.info(f"Opened field profiles {self.path}")
+        return self._connection
+
+
+def profile_value_stats(profile: dict) -> List[dict]:
+    """A profile's values in the format of EquipmentEntryElasticSearch.historical_value_stats."""
+    return [
+        {"value": value, "count": count, "last_seen": last_seen, "total": profile["total"]}
+        for value, count, last_seen in profile["values"]
+    ]
+
+
+def next_in_sequence(profile: Optional[dict]) -> Optional[str]:
+    """The value following the highest one of a sequence field (e.g. PUMP-0042 -> PUMP-0043), if any."""
+    pattern = (profile or {}).get("pattern")
+    if not pattern:
+        return None
+    return f"{pattern['prefix']}{pattern['max'] + 1:0{pattern['width']}d}"
+
+
+_store: Optional[FieldProfileStore] = None
+_store_lock = threading.Lock()
+
+
+def get_profile_store() -> FieldProfileStore:
+    """The process-wide profile store."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = FieldProfileStore()
+    return _store
@@ -0,0 +1,241 @@
+import json
+import logging
+import re
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Any, Iterable, List, Optional, Tuple
+
+from langchain_core.prompts import BasePromptTemplate
+
+from twenty_one_tech_pocs.common.tokens import count_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOKEN_BUDGET = 3000
+NONE_PROVIDED = "None provided."
+NO_DESCRIPTION = "No description available."
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def _tokenize(text: str) -> set:
+    return set(_TOKEN_PATTERN.findall(str(text).lower()))
+
+
+class AssetEntryPromptBuilder:
+    """
+    Builds the inputs of the asset entry prompt within a fixed token budget.
+
+    Historical values are deduplicated and ranked by frequency, expected values are
+    ranked by relevance to the history and the field description, and every variable
+    section is trimmed until the rendered prompt fits in token_budget tokens.
+    """
+
+    def __init__(
+        self,
+        prompt: BasePromptTemplate,
+        model_name: str,
+        token_budget: int = DEFAULT_TOKEN_BUDGET,
+        max_historical_values: int = 25,
+        max_expected_values: int = 50,
+        max_value_chars: int = 200,
+    ):
+        self.prompt = prompt
+        self.model_name = model_name
+        self.token_budget = token_budget
+        self.max_historical_values = max_historical_values
+        self.max_expected_values = max_expected_values
+        self.max_value_chars = max_value_chars
+
+    def build(
+        self,
+        asset_description: str,
+        target_field: str,
+        field_description: Optional[str],
+        historical_values: Iterable,
+        accepted_values: Optional[dict] = None,
+        expected_values: Optional[list] = None,
+    ) -> Tuple[dict, int]:
+        """
+        Builds the prompt inputs for one field prediction.
+
+        Args:
+            asset_description: Description of the asset being created.
+            target_field: The Elasticsearch path of the field to predict.
+            field_description: Plain-language rules for the field.
+            historical_values: Either raw values (duplicates allowed) or (value, count) tuples.
+            accepted_values: Values the user already accepted for other fields.
+            expected_values: Optional list of allowed values for the field.
+
+        Returns:
+            Tuple[dict, int]: The prompt inputs and the token count of the rendered prompt.
+        """
+        ranked_history = self.rank_historical_values(historical_values)
+        ranked_expected = self.rank_expected_values(
+            expected_values or [], ranked_history, field_description, asset_description
+        )
+
+        inputs = {
+            "asset_description": self._truncate_value(asset_description),
+            "target_field": target_field,
+            "field_description": NO_DESCRIPTION,
+            "accepted_values": NONE_PROVIDED,
+            "historical_values": "[]",
+            "expected_values": NONE_PROVIDED,
+        }
+        # Tokens of everything that is not trimmed (instructions, examples, field name)
+        fixed_tokens = self._count_prompt_tokens(inputs)
+        remaining = max(self.token_budget - fixed_tokens, 0)
+
+        # Give each section a fair share; whatever a section does not use rolls over
+        description_text = truncate_to_tokens(
+            field_description or NO_DESCRIPTION, remaining // 4, self.model_name
+        )
+        inputs["field_description"] = description_text or NO_DESCRIPTION
+        remaining -= count_tokens(description_text, self.model_name)
+
+        accepted_lines = self._take_within_budget(
+            self.format_accepted_values(accepted_values or {}), remaining // 3
+        )
+        if accepted_lines:
+            inputs["accepted_values"] = "\n".join(accepted_lines)
+            remaining -= count_tokens(inputs["accepted_values"], self.model_name)
+
+        history_items = self._take_within_budget(
+            [self._to_json(value) for value, _ in ranked_history[: self.max_historical_values]],
+            remaining // 2 if ranked_expected else remaining,
+        )
+        inputs["historical_values"] = "[" + ", ".join(history_items) + "]"
+        remaining -= count_tokens(inputs["historical_values"], self.model_name)
+
+        expected_items = []
+        if ranked_expected:
+            expected_items = self._take_within_budget(
+                [self._to_json(value) for value in ranked_expected[: self.max_expected_values]],
+                remaining,
+            )
+            if expected_items:
+                inputs["expected_values"] = "[" + ", ".join(expected_items) + "]"
+
+        prompt_tokens = self._fit_to_budget(inputs, history_items, expected_items)
+        if len(ranked_expected) > self.max_expected_values or len(ranked_history) > self.max_historical_values:
+            logger.debug(
+                f"Trimmed prompt for '{target_field}': {len(ranked_history)} historical and "
+                f"{len(ranked_expected)} expected values available"
+            )
+        return inputs, prompt_tokens
+
+    @staticmethod
+    def rank_historical_values(historical_values: Iterable) -> List[Tuple[Any, int]]:
+        """Deduplicates historical values and orders them by descending frequency."""
+        counts = Counter()
+        for item in historical_values or []:
+            if isinstance(item, tuple) and len(item) == 2 and isinstance(item[1], int):
+                value, count = item
+            else:
+                value, count = item, 1
+            if value is None or value == "":
+                continue
+            try:
+                counts[value] += count
+            except TypeError:
+                # Unhashable values (lists/dicts) are compared by their JSON form
+                counts[json.dumps(value, sort_keys=True, default=str)] += count
+        # most_common is stable, so ties keep first-seen order
+        return counts.most_common()
+
+    @staticmethod
+    def rank_expected_values(
+        expected_values: list,
+        ranked_history: List[Tuple[Any, int]],
+        field_description: Optional[str] = None,
+        asset_description: Optional[str] = None,
+    ) -> list:
+        """
+        Orders the expected values by relevance.
+
+        Values seen in the history come first (weighted by frequency), then values that
+        resemble the most frequent historical values, then values sharing words with the
+        field or asset description. Ties keep the caller's original order.
+        """
+        if not expected_values:
+            return []
+
+        total = sum(count for _, count in ranked_history) or 1
+        history_share = {}
+        for value, count in ranked_history:
+            history_share[str(value).strip().lower()] = count / total
+        top_history = [str(value).lower() for value, _ in ranked_history[:5]]
+        context_tokens = _tokenize(field_description or "") | _tokenize(asset_description or "")
+
+        scored = []
+        for position, value in enumerate(expected_values):
+            text = str(value).strip().lower()
+            score = 10.0 * history_share.get(text, 0.0)
+            if top_history:
+                score += max(SequenceMatcher(None, text, seen).ratio() for seen in top_history)
+            value_tokens = _tokenize(text)
+            if value_tokens and context_tokens:
+                score += 0.5 * len(value_tokens & context_tokens) / len(value_tokens)
+            scored.append((-score, position, value))
+        scored.sort(key=lambda item: (item[0], item[1]))
+        return [value for _, _, value in scored]
+
+    def format_accepted_values(self, accepted_values: dict) -> List[str]:
+        """Formats the accepted values as '- key: value' lines with bounded value length."""
+        return [
+            f"- {key}: {self._truncate_value(value)}"
+            for key, value in accepted_values.items()
+        ]
+
+    def _truncate_value(self, value) -> str:
+        text = str(value)
+        if len(text) > self.max_value_chars:
+            return text[: self.max_value_chars] + "..."
+        return text
+
+    @staticmethod
+    def _to_json(value) -> str:
+        if isinstance(value, str):
+            return json.dumps(value, ensure_ascii=False)
+        return json.dumps(value, ensure_ascii=False, default=str)
+
+    def _take_within_budget(self, items: List[str], budget: int) -> List[str]:
+        """Keeps the leading items whose combined size fits in budget tokens."""
+        taken = []
+        used = 0
+        for item in items:
+            # +1 for the separator between items
+            item_tokens = count_tokens(item, self.model_name) + 1
+            if used + item_tokens > budget:
+                break
+            taken.append(item)
+            used += item_tokens
+        return taken
+
+    def _count_prompt_tokens(self, inputs: dict) -> int:
+        return count_tokens(self._render(inputs), self.model_name)
+
+    def _render(self, inputs: dict) -> str:
+        prompt_value = self.prompt.format_prompt(**inputs)
+        return "\n".join(str(message.content) for message in prompt_value.to_messages())
+
+    def _fit_to_budget(self, inputs: dict, history_items: List[str], expected_items: List[str]) -> int:
+        """Drops trailing values until the rendered prompt is within the budget."""
+        prompt_tokens = self._count_prompt_tokens(inputs)
+        while prompt_tokens > self.token_budget:
+            # Per-item estimates can drift slightly; drop the least relevant values first
+            if len(expected_items) > 1:
+                expected_items.pop()
+                inputs["expected_values"] = "[" + ", ".join(expected_items) + "]"
+            elif len(history_items) > 1:
+                history_items.pop()
+                inputs["historical_values"] = "[" + ", ".join(history_items) + "]"
+            else:
+                logger.warning(
+                    f"Prompt for '{inputs['target_field']}' uses {prompt_tokens} tokens, "
+                    f"above the budget of {self.token_budget}"
+                )
+                break
+            prompt_tokens = self._count_prompt_tokens(inputs)
+        return prompt_tokens
@@ -0,0 +1,446 @@
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from typing import List, Optional
+from urllib.parse import quote
+
+import requests
+from django.utils import timezone
+from elasticsearch import Elasticsearch
+from elasticsearch.helpers import bulk
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from twenty_one_tech_pocs.common.config_manager import ConfigManager
+from twenty_one_tech_pocs.common.eam_api import EAMApiService
+from twenty_one_tech_pocs.common.llm_metrics import metrics
+
+from .models import AssetSyncState
+from .vector_store.asset_documents import (
+    embed_descriptions,
+    prepare_asset_action,
+    read_export_times,
+    stamp_index_generation,
+)
+from .vector_store.elasticsearch_vector_store import get_client_options
+from .vector_store.embeddings import SENTENCE_TRANSFORMERS_AVAILABLE
+from .vector_store.equipment_entry import DEFAULT_ES_HOST, DEFAULT_INDEX_NAME
+
+logger = logging.getLogger(__name__)
+
+# Changed equipment rows listed per grid call, and records fetched from EAM at a time
+DEFAULT_PAGE_SIZE = 500
+DEFAULT_FETCH_CONCURRENCY = 8
+# Runs that may fail on a record before the sync gives up on it and moves past it
+DEFAULT_MAX_ATTEMPTS = 5
+# How far before a loaded index's export the sync starts again once the index serves;
+# EAM times carry no time zone, and the margin covers the offset of its clock from UTC
+EXPORT_RESYNC_MARGIN = timedelta(hours=24)
+# Seconds between runs of `manage.py sync_eam_assets --loop`
+DEFAULT_INTERVAL = 300.0
+# The EAM equipment list grid and the aliases of its columns the sync reads; the
+# grid must have the last-updated column, which the sync filters and sorts on
+DEFAULT_GRID_NAME = "OSOBJA"
+DEFAULT_UPDATED_FIELD = "lastsaved"
+CODE_FIELD = "equipmentno"
+ORGANIZATION_FIELD = "organization"
+# Dates are sent to EAM in the first format; values EAM returns may be in any of them
+EAM_DATETIME_FORMATS = ("%m/%d/%Y %H:%M:%S", "%m/%d/%Y %H:%M", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S")
+REQUEST_TIMEOUT = 60  # Seconds
+BULK_REQUEST_TIMEOUT = 60  # Seconds
+
+
+def parse_eam_datetime(value) -> Optional[datetime]:
+    """
+    A date EAM returned (epoch milliseconds or a date string), or None.
+
+    EAM dates carry no time zone; they are labelled UTC so they can be stored and
+    compared, and sent back to EAM as they came.
+    """
+    if value in (None, ""):
+        return None
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value / 1000, tz=dt_timezone.utc)
+    value = str(value).strip()
+    if value.isdigit():
+        return datetime.fromtimestamp(int(value) / 1000, tz=dt_timezone.utc)
+    for date_format in EAM_DATETIME_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).replace(tzinfo=dt_timezone.utc)
+        except ValueError:
+            continue
+    return None
+
+
+def format_eam_datetime(value: datetime) -> str:
+    return value.strftime(EAM_DATETIME_FORMATS[0])
+
+
+class EAMAssetSource:
+    """
+    Reads changed equipment records from the EAM REST API.
+
+    The list grid gives the code, organization and last-updated time of the
+    equipment changed since a watermark, oldest first; each record is then fetched
+    in full, as the assets data file holds it. All calls share one session whose
+    connection pool is sized for the concurrent record fetches, and retry on
+    throttling and gateway errors.
+    """
+
+    def __init__(
+        self,
+        api: Optional[EAMApiService] = None,
+        grid_name: str = DEFAULT_GRID_NAME,
+        updated_field: str = DEFAULT_UPDATED_FIELD,
+        fetch_concurrency: int = DEFAULT_FETCH_CONCURRENCY,
+    ):
+        self.api = api or EAMApiService()
+        self.grid_name = grid_name
+        self.updated_field = updated_field
+        self.fetch_concurrency = fetch_concurrency
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_maxsize=fetch_concurrency,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.5,
+                status_forcelist=(429, 502, 503, 504),
+                allowed_methods=("GET", "POST"),
+            ),
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(self.api.headers)
+        self.session.headers["Authorization"] = self.api._get_auth()
+        self.session.headers["accept"] = "application/json"
+
+    def changed_rows(self, since: Optional[datetime], cursor: int, page_size: int) -> List[dict]:
+        """
+        One page of the grid rows updated at or after since (all rows without it), oldest first.
+
+        Raises:
+            ValueError: If the request fails.
+        """
+        payload = {
+            "GRID": {
+                "GRID_NAME": self.grid_name,
+                "NUMBER_OF_ROWS_FIRST_RETURNED": page_size,
+                "CURSOR_POSITION": cursor,
+            },
+            "GRID_TYPE": {"TYPE": "LIST"},
+            "REQUEST_TYPE": "LIST.HEAD_DATA.STORED",
+            "ADDON_SORT": {"ALIAS_NAME": self.updated_field, "TYPE": "ASC"},
+        }
+        if since is not None:
+            payload["ADDON_FILTER"] = {
+                "ALIAS_NAME": self.updated_field,
+                "OPERATOR": "GREATER_THAN_EQUALS",
+                "VALUE": format_eam_datetime(since),
+            }
+        try:
+            response = self.session.post(f"{self.api.base_url}/grids", json=payload, timeout=REQUEST_TIMEOUT)
+            response.raise_for_status()
+            data = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            raise ValueError(f"Failed to list changed equipment from grid {self.grid_name}: {str(e)}")
+        grid = (data.get("Result", {}).get("ResultData") or {}).get("GRID") or {}
+        return grid.get("DATA") or []
+
+    def fetch_record(self, row: dict) -> Optional[dict]:
+        """
+        The full equipment record of a grid row, or None if EAM answers 404.
+
+        Raises:
+            ValueError: If the request fails for another reason.
+        """
+        code = quote(str(row.get(CODE_FIELD)), safe="")
+        organization = row.get(ORGANIZATION_FIELD) or "*"
+        path = f"assets/{code}%23{quote(str(organization), safe='')}"
+        try:
+            response = self.session.get(
+                f"{self.api.base_url}/{path}",
+                headers={"organization": organization},
+                timeout=REQUEST_TIMEOUT,
+            )
+            if response.status_code == 404:
+                return None
+            response.raise_for_status()
+            return response.json().get("Result", {}).get("ResultData")
+        except (requests.exceptions.RequestException, ValueError) as e:
+            raise ValueError(f"Failed to look up {path}: {str(e)}")
+
+    def close(self):
+        self.session.close()
+
+
+class AssetSync:
+    """
+    Incrementally syncs the assets index with the equipment changed in EAM.
+
+    Each run pages through the records updated since the stored watermark (see
+    AssetSyncState), transforms them as the file loader does, and indexes only the
+    documents that differ from the indexed ones. The watermark advances after every
+    page, so an interrupted run resumes where it stopped. A record that could not be
+    fetched or indexed does not stop the run, but holds the watermark back to its
+    last-updated time so the next run tries it again; after max_attempts failed
+    runs the sync gives up on it (it stays in AssetSyncState.failures) and lets the
+    watermark move past. Records deleted in EAM stay in the index until the next
+    full load. While the loader builds a new index the sync writes to the old one,
+    so once the alias serves the new index the watermark goes back to its export.
+    """
+
+    def __init__(
+        self,
+        source: EAMAssetSource,
+        client: Elasticsearch,
+        index_name: str = DEFAULT_INDEX_NAME,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        embed: Optional[bool] = None,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    ):
+        self.source = source
+        self.client = client
+        # The alias the loader swaps; writes go to the index it serves
+        self.index_name = index_name
+        self.page_size = page_size
+        self.max_attempts = max_attempts
+        if embed is None:
+            embed = os.getenv("EMBED_DESCRIPTIONS", "true").lower() == "true"
+        self.embed = embed and SENTENCE_TRANSFORMERS_AVAILABLE
+
+    @classmethod
+    def from_env(cls, index_name: str = DEFAULT_INDEX_NAME) -> "AssetSync":
+        """Reads the EAM grid, paging, concurrency and retry settings from the ASSET_SYNC_* variables."""
+        config = ConfigManager().get_asset_sync_config()
+        source = EAMAssetSource(
+            grid_name=config.get("grid_name", DEFAULT_GRID_NAME),
+            updated_field=config.get("updated_field", DEFAULT_UPDATED_FIELD),
+            fetch_concurrency=config.get("fetch_concurrency", DEFAULT_FETCH_CONCURRENCY),
+        )
+        client = Elasticsearch(os.getenv("ES_HOST", DEFAULT_ES_HOST), **get_client_options())
+        return cls(
+            source,
+            client,
+            index_name=index_name,
+            page_size=config.get("page_size", DEFAULT_PAGE_SIZE),
+            max_attempts=config.get("max_attempts", DEFAULT_MAX_ATTEMPTS),
+        )
+
+    def run(self, since: Optional[datetime] = None) -> dict:
+        """
+        Syncs the changes since the stored watermark (or since, if given) and records the run.
+
+        Returns:
+            dict: fetched, changed, skipped, failed and given-up record counts,
+                  the new watermark and the duration of the run.
+        """
+        started = time.monotonic()
+        state, _ = AssetSyncState.objects.get_or_create(index_name=self.index_name)
+        self._follow_index_swap(state)
+        watermark = since or state.watermark
+        counts = {"fetched": 0, "changed": 0, "skipped": 0, "failed": 0, "given_up": 0}
+        logger.info(f"Syncing '{self.index_name}' with the EAM equipment updated since {watermark or 'ever'}")
+
+        status = "succeeded"
+        try:
+            watermark = self._sync_pages(state, watermark, counts)
+            if counts["failed"]:
+                status = "failed"
+        except Exception as e:
+            logger.error(f"Asset sync of '{self.index_name}' stopped: {e}")
+            status = "failed"
+        if counts["changed"]:
+            stamp_index_generation(self.client, self.index_name)
+
+        seconds = time.monotonic() - started
+        result = {**counts, "watermark": watermark.isoformat() if watermark else None, "seconds": round(seconds, 3)}
+        state.last_run_at = timezone.now()
+        state.last_run = {**result, "status": status}
+        state.save(update_fields=["last_run_at", "last_run"])
+
+        for name, count in counts.items():
+            metrics.increment("asset_sync_records_total", labels={"result": name}, amount=count)
+        metrics.increment("asset_sync_runs_total", labels={"status": status})
+        metrics.observe("asset_sync_run_seconds", seconds)
+        logger.info(
+            f"Asset sync of '{self.index_name}' {status}: {counts['fetched']} fetched, {counts['changed']} changed, "
+            f"{counts['skipped']} skipped, {counts['failed']} failed ({counts['given_up']} given up) in {seconds:.1f}s"
+        )
+        return {**result, "status": status}
+
+    def _follow_index_swap(self, state: AssetSyncState) -> None:
+        # Changes synced while the serving index was rebuilt went to the index the alias
+        # pointed to then; they are synced again from the export the new index holds
+        try:
+            export_times = read_export_times(self.client, self.index_name)
+        except Exception as e:
+            logger.warning(f"Could not read the indices behind '{self.index_name}': {e}")
+            return
+        serving = ",".join(sorted(export_times))
+        if not serving or serving == state.serving_index:
+            return
+        exported = [value for value in export_times.values() if value is not None]
+        if not exported:
+            logger.warning(
+                f"'{self.index_name}' now serves {serving}, which has no export time; "
+                f"changes synced while it was loaded may be missing until the next load"
+            )
+        elif state.watermark is not None and min(exported) - EXPORT_RESYNC_MARGIN < state.watermark:
+            state.watermark = min(exported) - EXPORT_RESYNC_MARGIN
+            metrics.increment("asset_sync_index_swaps_total")
+            logger.info(
+                f"'{self.index_name}' now serves {serving}, exported at {min(exported).isoformat()}; "
+                f"syncing again from {state.watermark.isoformat()}"
+            )
+        state.serving_index = serving
+        state.save(update_fields=["watermark", "serving_index"])
+
+    def _sync_pages(self, state: AssetSyncState, watermark: Optional[datetime], counts: dict) -> Optional[datetime]:
+        # Rows updated at the watermark are listed again by the next page; the ones
+        # already synced are left out. A page entirely at the watermark moves the cursor.
+        # Paging moves past failed records; the saved watermark stays at the oldest
+        # one that will be retried.
+        cursor = 0
+        seen = set()
+        oldest_failure = None
+        with ThreadPoolExecutor(max_workers=self.source.fetch_concurrency) as executor:
+            while True:
+                rows = self.source.changed_rows(watermark, cursor, self.page_size)
+                new_rows = [row for row in rows if self._row_key(row) not in seen]
+                failed = self._sync_rows(executor, new_rows, counts)
+                retried = self._record_failures(state, new_rows, failed, watermark, counts)
+                if retried is not None and (oldest_failure is None or retried < oldest_failure):
+                    oldest_failure = retried
+
+                updated = [parse_eam_datetime(row.get(self.source.updated_field)) for row in rows]
+                page_watermark = max((value for value in updated if value is not None), default=watermark)
+                if page_watermark is not None and (watermark is None or page_watermark > watermark):
+                    watermark = page_watermark
+                    cursor = 0
+                    seen = set()
+                else:
+                    cursor += len(rows)
+                seen.update(self._row_key(row) for row, value in zip(rows, updated) if value == watermark)
+                resume_from = watermark
+                if oldest_failure is not None and (watermark is None or oldest_failure < watermark):
+                    resume_from = oldest_failure
+                self._save_watermark(state, resume_from)
+                if len(rows) < self.page_size:
+                    return resume_from
+
+    def _record_failures(
+        self, state: AssetSyncState, rows: List[dict], failed: List[dict], since: Optional[datetime], counts: dict
+    ) -> Optional[datetime]:
+        """
+        Counts a failed attempt for each failed row and forgets the rows that synced.
+
+        Returns the oldest last-updated time of the failed rows to retry (since for
+        a row without one), or None. A row that failed max_attempts times on the
+        same version is given up, and does not hold the watermark back.
+        """
+        failed_keys = {self._failure_key(row) for row in failed}
+        changed = False
+        for row in rows:
+            key = self._failure_key(row)
+            if key not in failed_keys and key in state.failures:
+                del state.failures[key]
+                changed = True
+
+        oldest = None
+        for row in failed:
+            key = self._failure_key(row)
+            updated = str(row.get(self.source.updated_field))
+            failure = state.failures.get(key)
+            if failure is None or failure.get("updated") != updated:
+                # A new version in EAM starts the count again
+                failure = {"updated": updated, "attempts": 0}
+            failure["attempts"] += 1
+            state.failures[key] = failure
+            changed = True
+            if failure["attempts"] >= self.max_attempts:
+                logger.error(f"Giving up on asset {key} after {failure['attempts']} failed attempts")
+                counts["given_up"] += 1
+                continue
+            retry_from = parse_eam_datetime(row.get(self.source.updated_field)) or since
+            if retry_from is not None and (oldest is None or retry_from < oldest):
+                oldest = retry_from
+        if changed:
+            state.save(update_fields=["failures"])
+        return oldest
+
+    def _sync_rows(self, executor: ThreadPoolExecutor, rows: List[dict], counts: dict) -> List[dict]:
+        """Indexes the changed records of the rows; returns the rows that could not be fetched or indexed."""
+        failed = []
+        actions = []
+        updated_by_id = {}
+        for row, record in zip(rows, executor.map(self._fetch, rows)):
+            if isinstance(record, Exception):
+                logger.warning(str(record))
+                failed.append(row)
+                continue
+            if record is None:
+                counts["skipped"] += 1
+                continue
+            counts["fetched"] += 1
+            action = prepare_asset_action(record, self.index_name)
+            if action is None:
+                counts["skipped"] += 1
+                continue
+            updated_by_id[action["_id"]] = row
+            actions.append(action)
+
+        changed = self._changed_actions(actions)
+        counts["skipped"] += len(actions) - len(changed)
+        if changed:
+            if self.embed:
+                changed = list(embed_descriptions(changed))
+            _, errors = bulk(
+                self.client.options(request_timeout=BULK_REQUEST_TIMEOUT), changed, raise_on_error=False
+            )
+            failed_ids = set()
+            for error in errors:
+                item = next(iter(error.values()))
+                logger.warning(f"Failed to index asset '{item.get('_id')}': {item.get('error')}")
+                failed_ids.add(item.get("_id"))
+            failed.extend(updated_by_id[doc_id] for doc_id in failed_ids if doc_id in updated_by_id)
+            counts["changed"] += len(changed) - len(failed_ids)
+        counts["failed"] += len(failed)
+        return failed
+
+    def _fetch(self, row: dict):
+        try:
+            return self.source.fetch_record(row)
+        except ValueError as e:
+            return e
+
+    def _changed_actions(self, actions: List[dict]) -> List[dict]:
+        """The actions whose document is not indexed yet or differs from the indexed one."""
+        if not actions:
+            return []
+        response = self.client.mget(
+            index=self.index_name, ids=[action["_id"] for action in actions], source_excludes=["embedding"]
+        )
+        indexed = {doc["_id"]: doc.get("_source") for doc in response["docs"] if doc.get("found")}
+        return [action for action in actions if indexed.get(action["_id"]) != action["_source"]]
+
+    @staticmethod
+    def _row_key(row: dict) -> tuple:
+        return row.get(CODE_FIELD), row.get(ORGANIZATION_FIELD)
+
+    @staticmethod
+    def _failure_key(row: dict) -> str:
+        code, organization = AssetSync._row_key(row)
+        return f"{code}#{organization}"
+
+    @staticmethod
+    def _save_watermark(state: AssetSyncState, watermark: Optional[datetime]) -> None:
+        if watermark is not None and watermark != state.watermark:
+            state.watermark = watermark
+            state.save(update_fields=["watermark"])
+
+    def close(self):
+        self.source.close()
+        self.client.close()
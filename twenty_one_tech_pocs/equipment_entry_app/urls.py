@@ -1,9 +1,15 @@
 from django.urls import path
-from twenty_one_tech_pocs.equipment_entry_app.views import GenerateAssetView, GenerateBulkAssetView
+from twenty_one_tech_pocs.equipment_entry_app.views import (
+    GenerateAssetView,
+    GenerateBulkAssetView,
+    HistoricalValuesView,
+)
 
 urlpatterns = [
     path('generate/<str:asset_description>/',
          GenerateAssetView.as_view(), name="generate_asset"),
     path('generate-bulk/<str:asset_description>/',
          GenerateBulkAssetView.as_view(), name="generate_bulk_asset"),
+    path('historical-values/',
+         HistoricalValuesView.as_view(), name="historical_values"),
 ]
@@ -0,0 +1,112 @@
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from .embeddings import get_embedder
+
+logger = logging.getLogger(__name__)
+
+# Descriptions embedded per model call
+EMBEDDING_BATCH_SIZE = 256
+
+
+def prepare_asset_action(doc, index_name: str) -> Optional[dict]:
+    """
+    The bulk index action of one EAM equipment record, or None if it cannot be indexed.
+
+    The document ID is ASSETID.EQUIPMENTCODE, so indexing a record again replaces
+    it. Used by the file loader (data/load_asset_data_to_es.py) and the EAM sync
+    (equipment_entry_app/sync.py), so both index the same documents.
+    """
+    if not isinstance(doc, dict):
+        logger.warning(f"Skipping record that is not a JSON object: {str(doc)[:100]}")
+        return None
+    # Use ASSETID.EQUIPMENTCODE as the document ID for idempotency
+    # Handle potential missing keys gracefully
+    asset_id_data = doc.get("ASSETID")
+    if not asset_id_data or not isinstance(asset_id_data, dict):
+        logger.warning(f"Skipping record due to missing or invalid 'ASSETID': {doc.get('recordid', 'N/A')}")
+        return None
+
+    equipment_code = asset_id_data.get("EQUIPMENTCODE")
+    if not equipment_code:
+        logger.warning(f"Skipping record due to missing 'ASSETID.EQUIPMENTCODE': {doc.get('recordid', 'N/A')}")
+        return None
+
+    # Clean up potential problematic fields before indexing if needed
+    # For example, H3 requires specific date formats if mapped as date
+    # Convert epoch millis in COMMISSIONDATE if present and mapping expects it
+    if 'COMMISSIONDATE' in doc and isinstance(doc['COMMISSIONDATE'], dict) and 'YEAR' in doc['COMMISSIONDATE']:
+        if isinstance(doc['COMMISSIONDATE']['YEAR'], (int, float)):
+            # Assuming 'YEAR' field actually holds epoch millis
+            doc['COMMISSIONDATE'] = int(doc['COMMISSIONDATE']['YEAR'])
+        else:
+            # Handle cases where the date isn't epoch millis as expected
+            logger.warning(f"Unexpected format for COMMISSIONDATE in doc id {equipment_code}, removing.")
+            del doc['COMMISSIONDATE']  # Or transform differently
+
+    return {
+        "_index": index_name,
+        "_id": equipment_code,  # Use equipment code as ID
+        "_source": doc
+    }
+
+
+def embed_descriptions(actions, batch_size: int = EMBEDDING_BATCH_SIZE):
+    """Adds the embedding of ASSETID.DESCRIPTION to the actions, embedding batch_size descriptions at a time."""
+    embedder = get_embedder()
+    batch = []
+    for action in actions:
+        batch.append(action)
+        if len(batch) >= batch_size:
+            yield from _embed_batch(embedder, batch)
+            batch = []
+    if batch:
+        yield from _embed_batch(embedder, batch)
+
+
+def _embed_batch(embedder, batch):
+    described = [
+        action for action in batch
+        if isinstance(action["_source"].get("ASSETID"), dict) and action["_source"]["ASSETID"].get("DESCRIPTION")
+    ]
+    if described:
+        vectors = embedder.embed_documents([action["_source"]["ASSETID"]["DESCRIPTION"] for action in described])
+        for action, vector in zip(described, vectors):
+            action["_source"]["embedding"] = vector
+    return batch
+
+
+def stamp_index_generation(client, index: str, exported_at: Optional[datetime] = None) -> str:
+    """
+    Records a new generation in the index mapping's _meta after its documents change.
+
+    The Django process caches historical values per index generation and clears
+    its cache when it reads a new one (equipment_entry_app/vector_store/cache.py).
+    The loader also records exported_at, the time of the data file it loaded; the
+    EAM sync replays the changes since then once the index serves (see sync.py).
+    """
+    generation = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}-{uuid.uuid4().hex[:8]}"
+    if exported_at is None:
+        # put_mapping replaces the whole _meta; a stamp after a sync keeps the export time
+        exported_at = min(
+            (value for value in read_export_times(client, index).values() if value is not None), default=None
+        )
+    meta = {"generation": generation}
+    if exported_at is not None:
+        meta["exported_at"] = exported_at.isoformat()
+    client.indices.put_mapping(index=index, meta=meta)
+    logger.info(f"Index '{index}' stamped with generation {generation}.")
+    return generation
+
+
+def read_export_times(client, index: str) -> Dict[str, Optional[datetime]]:
+    """{concrete index name: export time of the data file loaded into it} of an index or alias."""
+    response = client.indices.get_mapping(index=index, filter_path=["*.mappings._meta.exported_at"])
+    # Indices without an export time are left out of the filtered response
+    exported = {name: response[name]["mappings"]["_meta"]["exported_at"] for name in response or {}}
+    return {
+        name: datetime.fromisoformat(exported[name]) if name in exported else None
+        for name in client.indices.get_alias(index=index)
+    }
@@ -0,0 +1,136 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+from twenty_one_tech_pocs.common.llm_metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 10000
+# Seconds between checks of the index generation
+DEFAULT_CHECK_INTERVAL = 30.0
+
+
+class HistoricalValueCache:
+    """
+    LRU cache of historical value lookups, keyed by (normalized description, label key, filters).
+
+    The values only change when the assets index is reloaded, so the cache holds the
+    index generation the loader stamps in the index mapping (see
+    data/load_asset_data_to_es.py) and is cleared when it changes. The stores read
+    the generation at most every check_interval seconds.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, check_interval: float = DEFAULT_CHECK_INTERVAL):
+        self.max_entries = max_entries
+        self.check_interval = check_interval
+        self.generation: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "HistoricalValueCache":
+        """Reads the bounds from ASSET_HISTORY_CACHE_SIZE and ASSET_HISTORY_CACHE_CHECK_INTERVAL."""
+        try:
+            max_entries = int(os.getenv("ASSET_HISTORY_CACHE_SIZE", DEFAULT_MAX_ENTRIES))
+        except ValueError:
+            max_entries = DEFAULT_MAX_ENTRIES
+        try:
+            check_interval = float(os.getenv("ASSET_HISTORY_CACHE_CHECK_INTERVAL", DEFAULT_CHECK_INTERVAL))
+        except ValueError:
+            check_interval = DEFAULT_CHECK_INTERVAL
+        return cls(max_entries=max_entries, check_interval=check_interval)
+
+    @staticmethod
+    def key(description: str, label_key: str, filters: tuple = ()) -> tuple:
+        # Case and spacing do not change the search results
+        return " ".join(description.lower().split()), label_key, filters
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """Returns (True, value) on a hit and (False, None) on a miss."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                found, value = True, self._entries[key]
+            else:
+                self.misses += 1
+                found, value = False, None
+            hit_rate = self.hits / (self.hits + self.misses)
+        metrics.increment("asset_history_cache_requests_total", labels={"result": "hit" if found else "miss"})
+        metrics.set_gauge("asset_history_cache_hit_rate", round(hit_rate, 4))
+        return found, value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        evicted = 0
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            size = len(self._entries)
+        if evicted:
+            metrics.increment("asset_history_cache_evictions_total", amount=evicted)
+        metrics.set_gauge("asset_history_cache_entries", size)
+
+    def generation_due(self) -> bool:
+        """Whether the index generation should be read again."""
+        return self._checked_at is None or time.monotonic() - self._checked_at >= self.check_interval
+
+    def update_generation(self, generation: Optional[str]) -> bool:
+        """
+        Records the current index generation; returns True (and empties the cache) if it changed.
+
+        Pass None when the generation could not be read: the entries are kept and
+        the check is retried after check_interval.
+        """
+        with self._lock:
+            self._checked_at = time.monotonic()
+            if generation is None or generation == self.generation:
+                return False
+            changed = self.generation is not None
+            self.generation = generation
+            if changed:
+                self._entries.clear()
+        if changed:
+            metrics.increment("asset_history_cache_invalidations_total")
+            metrics.set_gauge("asset_history_cache_entries", 0)
+            logger.info(f"Assets index generation changed to {generation}; historical value cache cleared")
+        return changed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "generation": self.generation,
+            }
+
+
+_cache: Optional[HistoricalValueCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_history_cache() -> Optional[HistoricalValueCache]:
+    """The process-wide cache shared by the stores, or None if ASSET_HISTORY_CACHE_SIZE is 0."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = HistoricalValueCache.from_env()
+    return _cache if _cache.max_entries > 0 else None
@@ -1,10 +1,86 @@
-from elasticsearch import Elasticsearch
+from typing import List
+
+from elasticsearch import AsyncElasticsearch, Elasticsearch
+
+from twenty_one_tech_pocs.common.config_manager import ConfigManager
+
+# Client settings unless overridden by ELASTICSEARCH_* environment variables. The
+# pool is sized for the concurrent searches of a bulk form, and searches are short:
+# a timed-out search is retried on another connection rather than waited on.
+DEFAULT_CLIENT_OPTIONS = {
+    "connections_per_node": 25,
+    "request_timeout": 10.0,
+    "max_retries": 2,
+    "retry_on_timeout": True,
+    "http_compress": True,
+}
+
+
+def get_client_options() -> dict:
+    """Connection pool, timeout, retry and compression settings of the Elasticsearch clients."""
+    return {**DEFAULT_CLIENT_OPTIONS, **ConfigManager().get_elasticsearch_config()}
+
+
+def _search_params(query: dict) -> dict:
+    # The client takes the body keys as keyword arguments, with "_source" spelled "source"
+    params = dict(query)
+    if "_source" in params:
+        params["source"] = params.pop("_source")
+    return params
+
+
+def _msearch_lines(queries: List[dict]) -> list:
+    searches = []
+    for query in queries:
+        searches.extend([{}, query])
+    return searches
 
 
 class ElasticSearchVectorStore:
     def __init__(self, es_host: str, index_name: str):
-        self.es = Elasticsearch(es_host)
+        self.es = Elasticsearch(es_host, **get_client_options())
         self.index_name = index_name
 
-    def search(self, query: dict) -> dict:
-        return self.es.search(index=self.index_name, body=query)
+    def search(self, query: dict, **params) -> dict:
+        return self.es.search(index=self.index_name, **_search_params(query), **params)
+
+    def multi_search(self, queries: List[dict]) -> List[dict]:
+        """Runs several searches on the index in one _msearch round trip; responses keep the query order."""
+        if not queries:
+            return []
+        response = self.es.msearch(index=self.index_name, searches=_msearch_lines(queries))
+        return response["responses"]
+
+
+class AsyncElasticSearchVectorStore:
+    """
+    The asyncio counterpart of ElasticSearchVectorStore, backed by AsyncElasticsearch.
+
+    Many searches can be awaited concurrently from one event loop, sharing the
+    client's connection pool. The client belongs to the event loop it is first used
+    in: use the store within one loop and close it (or use it as an async context
+    manager) when the loop is done with it.
+    """
+
+    def __init__(self, es_host: str, index_name: str):
+        self.es = AsyncElasticsearch(es_host, **get_client_options())
+        self.index_name = index_name
+
+    async def search(self, query: dict, **params) -> dict:
+        return await self.es.search(index=self.index_name, **_search_params(query), **params)
+
+    async def multi_search(self, queries: List[dict]) -> List[dict]:
+        """Runs several searches on the index in one _msearch round trip; responses keep the query order."""
+        if not queries:
+            return []
+        response = await self.es.msearch(index=self.index_name, searches=_msearch_lines(queries))
+        return response["responses"]
+
+    async def close(self) -> None:
+        await self.es.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        await self.close()
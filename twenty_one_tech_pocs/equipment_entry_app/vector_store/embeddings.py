@@ -0,0 +1,80 @@
+import logging
+import os
+import threading
+from functools import lru_cache
+from typing import List, Optional, Sequence
+
+# Optional import for sentence-transformers - without it asset retrieval stays fuzzy BM25 only
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Small CPU model; its vectors must match the dims of the index's embedding field
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_DIMS = 384
+DEFAULT_BATCH_SIZE = 64
+QUERY_CACHE_SIZE = 2048
+
+
+class DescriptionEmbedder:
+    """
+    Embeds asset descriptions with a local sentence-embedding model on the CPU.
+
+    Documents are embedded in batches (at index time, by the loader); query
+    embeddings are cached, since the same description is searched for every field
+    of an asset form. Vectors are normalized, as the index uses cosine similarity.
+    """
+
+    def __init__(self, model_name: Optional[str] = None, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.model_name = model_name or os.getenv("ASSET_EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL)
+        self.batch_size = batch_size
+        self._model = None
+        self._lock = threading.Lock()
+        self._embed_query_cached = lru_cache(maxsize=QUERY_CACHE_SIZE)(self._embed_query)
+
+    @property
+    def model(self):
+        if self._model is None:
+            if not SENTENCE_TRANSFORMERS_AVAILABLE:
+                raise ImportError("sentence-transformers is required for description embeddings")
+            with self._lock:
+                if self._model is None:
+                    logger.info(f"Loading embedding model {self.model_name}")
+                    self._model = SentenceTransformer(self.model_name, device="cpu")
+        return self._model
+
+    def embed_documents(self, texts: Sequence[str]) -> List[List[float]]:
+        """Embeds texts in batches of batch_size."""
+        vectors = self.model.encode(
+            [text or "" for text in texts],
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        return [vector.tolist() for vector in vectors]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embeds a search description; repeated descriptions come from the cache."""
+        return list(self._embed_query_cached(" ".join(text.lower().split())))
+
+    def _embed_query(self, text: str) -> tuple:
+        # Tuples, so cached vectors cannot be modified by callers
+        return tuple(self.embed_documents([text])[0])
+
+
+_embedder: Optional[DescriptionEmbedder] = None
+_embedder_lock = threading.Lock()
+
+
+def get_embedder() -> DescriptionEmbedder:
+    """The process-wide embedder, so the model is loaded once."""
+    global _embedder
+    if _embedder is None:
+        with _embedder_lock:
+            if _embedder is None:
+                _embedder = DescriptionEmbedder()
+    return _embedder
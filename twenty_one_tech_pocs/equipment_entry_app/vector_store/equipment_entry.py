@@ -1,7 +1,68 @@
-from .elasticsearch_vector_store import ElasticSearchVectorStore
+import asyncio
+import os
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
 
+from .cache import HistoricalValueCache, get_history_cache
+from .elasticsearch_vector_store import AsyncElasticSearchVectorStore, ElasticSearchVectorStore
+from .embeddings import EMBEDDING_DIMS, SENTENCE_TRANSFORMERS_AVAILABLE, get_embedder
+
+
+# Best-matching assets (per shard) whose values the aggregation statistics count
+DEFAULT_SAMPLE_SIZE = 100
+# Similar assets whose values historical_value_counts counts
+DEFAULT_HITS = 10
+# Reciprocal rank fusion constant: larger values flatten the advantage of the top ranks
+RRF_RANK_CONSTANT = 60
+
+FUZZY_RETRIEVAL = "fuzzy"
+HYBRID_RETRIEVAL = "hybrid"
+
+# The aggregation statistics response keeps only the buckets
+STATS_FILTER_PATH = [
+    "aggregations.top_matches.*.buckets.key",
+    "aggregations.top_matches.*.buckets.key_as_string",
+    "aggregations.top_matches.*.buckets.doc_count",
+    "aggregations.top_matches.*.buckets.last_seen.value",
+    "aggregations.top_matches.*.sum_other_doc_count",
+]
+
+# Where the loader stamps the index generation that invalidates the historical value cache
+GENERATION_FILTER_PATH = ["*.mappings._meta.generation", "*.settings.index.uuid"]
+COUNTS_LOOKUP = "counts"
+STATS_LOOKUP = "stats"
+
+DEFAULT_ES_HOST = "http://localhost:9201"
+DEFAULT_INDEX_NAME = "assets_index"
+
+# Field capabilities by (index, generation, configured retrieval mode): the aggregatable
+# fields and the retrieval mode they allow. Shared by every store of the process, so a
+# store created per request does not read them again.
+_field_caps_by_generation: Dict[Tuple[str, str, str], Tuple[frozenset, str]] = {}
+_field_caps_lock = threading.Lock()
+
+
+def format_epoch_millis(millis) -> Optional[str]:
+    """Epoch milliseconds as Elasticsearch's strict_date_optional_time output, e.g. 2024-05-01T00:00:00.000Z."""
+    if millis is None:
+        return None
+    return datetime.fromtimestamp(millis / 1000, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+class EquipmentEntryIndex:
+    """
+    Fields of the assets index, and the searches and response parsing of the asset
+    lookups, shared by the sync and async equipment entry stores.
+    """
+
+    # Date field whose latest value is reported as the last time a value was seen
+    last_seen_field = "COMMISSIONDATE"
+    # Description embeddings written by the loader (data/load_asset_data_to_es.py)
+    embedding_field = "embedding"
+    embedding_dims = EMBEDDING_DIMS
 
-class EquipmentEntryElasticSearch(ElasticSearchVectorStore):
     # Include label mappings - Updated to include all fields from descriptions.js
     label_mapping = {
         # Existing Standard Fields
@@ -538,22 +599,342 @@ class EquipmentEntryElasticSearch(ElasticSearchVectorStore):
             }
         }
 
-    def __init__(
-        self, es_host: str = "http://localhost:9201", index_name: str = "assets_index"
-    ):
-        super().__init__(es_host, index_name)
+    def _init_search_state(self, cache: Optional[HistoricalValueCache] = None):
+        # Aggregatable field names of the index, read from _field_caps on first use
+        self._aggregatable_fields: Optional[set] = None
+        # Shared by every store of the process unless one is given
+        self.cache = cache if cache is not None else get_history_cache()
+        # "hybrid" (BM25 + kNN on the description embeddings) or "fuzzy" (per-term fuzzy BM25);
+        # hybrid by default when the embedding model can be loaded
+        default_mode = HYBRID_RETRIEVAL if SENTENCE_TRANSFORMERS_AVAILABLE else FUZZY_RETRIEVAL
+        self.retrieval_mode = os.getenv("ASSET_RETRIEVAL_MODE", default_mode).lower()
+        if self.retrieval_mode == HYBRID_RETRIEVAL and not SENTENCE_TRANSFORMERS_AVAILABLE:
+            print("Warning: sentence-transformers is not installed; asset retrieval falls back to fuzzy search.")
+            self.retrieval_mode = FUZZY_RETRIEVAL
+        # Hybrid retrieval also needs the embeddings in the index: it is suspended while the
+        # index has no dense_vector embedding field or no document with a vector
+        # (see _apply_field_caps and _apply_embeddings_count)
+        self._configured_retrieval_mode = self.retrieval_mode
+        # The index generation this store's field caps and retrieval mode belong to
+        self._seen_generation = self.cache.generation if self.cache is not None else None
 
-    def fuzzy_search(self, user_input: str, label_key: str):
-        # Get the Elasticsearch attribute for the provided label key
-        attribute = self.label_mapping.get(label_key)
-        if attribute is None:
-            print(f"Warning: Invalid label_key '{label_key}' provided.")
+    def _cached_lookups(
+        self, kind: str, filters: tuple, requests: List[Tuple[str, List[str]]]
+    ) -> Tuple[List[dict], List[Tuple[int, str, List[str]]]]:
+        """
+        Splits lookups into the cached values and the ones still to search.
+
+        Returns:
+            tuple: The values found per request, and (request position, user_input,
+                   label_keys) for the label keys of each request that missed.
+        """
+        results = [{} for _ in requests]
+        missing = []
+        for position, (user_input, label_keys) in enumerate(requests):
+            missing_keys = []
+            for label_key in dict.fromkeys(label_keys):
+                if self.cache is not None:
+                    found, value = self.cache.get(self._cache_key(kind, filters, user_input, label_key))
+                    if found:
+                        results[position][label_key] = value
+                        continue
+                missing_keys.append(label_key)
+            if missing_keys:
+                missing.append((position, user_input, missing_keys))
+        return results, missing
+
+    def _store_lookups(
+        self,
+        kind: str,
+        filters: tuple,
+        requests: List[Tuple[str, List[str]]],
+        results: List[dict],
+        missing: List[Tuple[int, str, List[str]]],
+        fetched: List[dict],
+        uncacheable: frozenset = frozenset(),
+    ) -> List[dict]:
+        """Adds the searched values to the results and the cache; returns the results in request order."""
+        for (position, user_input, label_keys), values in zip(missing, fetched):
+            results[position].update(values)
+            if self.cache is None or user_input in uncacheable:
+                continue
+            for label_key in label_keys:
+                self.cache.put(self._cache_key(kind, filters, user_input, label_key), values[label_key])
+        return [
+            {label_key: values[label_key] for label_key in label_keys}
+            for values, (_, label_keys) in zip(results, requests)
+        ]
+
+    def _cache_key(self, kind: str, filters: tuple, user_input: str, label_key: str) -> tuple:
+        return HistoricalValueCache.key(user_input, label_key, (kind, self.retrieval_mode) + filters)
+
+    def _generation_params(self) -> dict:
+        return {"index": self.index_name, "filter_path": GENERATION_FILTER_PATH}
+
+    @staticmethod
+    def _generation_from_response(response: dict) -> Optional[str]:
+        # Keyed by the concrete index names (several when the name is an alias)
+        generations = []
+        for name in sorted(response or {}):
+            index = response[name]
+            generation = index.get("mappings", {}).get("_meta", {}).get("generation")
+            # Indices loaded without a generation stamp are told apart by their uuid
+            generations.append(generation or index.get("settings", {}).get("index", {}).get("uuid") or name)
+        return ",".join(generations) or None
+
+    def _on_generation(self, generation: Optional[str]) -> None:
+        self.cache.update_generation(generation)
+        self._sync_generation()
+
+    def _sync_generation(self) -> None:
+        # The shared cache learns of a new generation from whichever store reads it first;
+        # every store compares it with the last one it saw
+        generation = self.cache.generation
+        if generation != self._seen_generation:
+            self._seen_generation = generation
+            # A reloaded index may have a different mapping
+            self._aggregatable_fields = None
+            self.retrieval_mode = self._configured_retrieval_mode
+
+    def _plan_value_counts(self, requests: List[Tuple[str, List[str]]]) -> Dict[str, List[dict]]:
+        """The retrieval searches of each distinct description of the requests."""
+        attributes_by_input: Dict[str, Dict[str, None]] = {}
+        for user_input, label_keys in requests:
+            attributes = attributes_by_input.setdefault(user_input, {})
+            for label_key in label_keys:
+                attribute = self.label_mapping.get(label_key)
+                if attribute is None:
+                    print(f"Warning: Invalid label_key '{label_key}' provided.")
+                    continue
+                attributes[attribute] = None
+
+        # Descriptions without terms or valid fields have nothing to search for
+        searches_by_input = {}
+        for user_input, attributes in attributes_by_input.items():
+            if attributes:
+                searches = self._retrieval_searches(user_input, list(attributes), DEFAULT_HITS)
+                if searches:
+                    searches_by_input[user_input] = searches
+        return searches_by_input
+
+    @staticmethod
+    def _failed_inputs(searches_by_input: Dict[str, List[dict]], responses: List[dict]) -> frozenset:
+        """The descriptions with a failed search, whose (empty) results must not be cached."""
+        failed = set()
+        position = 0
+        for user_input, searches in searches_by_input.items():
+            if any("error" in (response or {}) for response in responses[position:position + len(searches)]):
+                failed.add(user_input)
+            position += len(searches)
+        return frozenset(failed)
+
+    def _value_counts_from_responses(
+        self,
+        requests: List[Tuple[str, List[str]]],
+        searches_by_input: Dict[str, List[dict]],
+        responses: List[dict],
+    ) -> List[Dict[str, list]]:
+        hits_by_input = {}
+        position = 0
+        for user_input, searches in searches_by_input.items():
+            hits_by_input[user_input] = self._fuse_hits(responses[position:position + len(searches)], DEFAULT_HITS)
+            position += len(searches)
+
+        return [
+            {
+                label_key: self._count_values(hits_by_input.get(user_input, []), self.label_mapping.get(label_key))
+                for label_key in label_keys
+            }
+            for user_input, label_keys in requests
+        ]
+
+    def _plan_value_stats(
+        self, user_input: str, label_keys: List[str], top_n: int, sample_size: int
+    ) -> Optional[dict]:
+        """The aggregation search of historical_value_stats_multi, or None if there is nothing to search for."""
+        if self.retrieval_mode == HYBRID_RETRIEVAL:
+            # The kNN matches are added to the BM25 matches (scores summed) before sampling
+            query = self._match_query(user_input)
+            knn = self._knn_clause(user_input, sample_size)
+            if query is not None and knn is not None:
+                query["knn"] = knn
+        else:
+            query = self._description_query(user_input)
+        if query is None:
+            return None
+
+        value_aggregations = {}
+        for position, label_key in enumerate(label_keys):
+            attribute = self.label_mapping.get(label_key)
+            if attribute is None:
+                print(f"Warning: Invalid label_key '{label_key}' provided.")
+                continue
+            aggregation = {"terms": {"field": self._aggregation_field(attribute), "size": top_n}}
+            if self.last_seen_field:
+                aggregation["aggs"] = {"last_seen": {"max": {"field": self.last_seen_field}}}
+            # Positional names: label keys are not guaranteed to be valid aggregation names
+            value_aggregations[f"field_{position}"] = aggregation
+        if not value_aggregations:
+            return None
+
+        query.update(
+            size=0,
+            aggs={"top_matches": {"sampler": {"shard_size": sample_size}, "aggs": value_aggregations}},
+        )
+        return query
+
+    @staticmethod
+    def _value_stats_from_response(label_keys: List[str], response: Optional[dict]) -> Dict[str, List[dict]]:
+        # filter_path drops empty objects, so a search without matches has no "aggregations"
+        top_matches = (response or {}).get("aggregations", {}).get("top_matches", {})
+        stats = {}
+        for position, label_key in enumerate(label_keys):
+            aggregation = top_matches.get(f"field_{position}", {})
+            buckets = aggregation.get("buckets", [])
+            # The values past top_n still count towards the share of the top ones
+            total = sum(bucket.get("doc_count", 0) for bucket in buckets) + aggregation.get("sum_other_doc_count", 0)
+            stats[label_key] = [
+                {
+                    # Booleans and dates come back as numbers with a readable key_as_string
+                    "value": bucket.get("key_as_string", bucket.get("key")),
+                    "count": bucket.get("doc_count", 0),
+                    # Epoch millis whether COMMISSIONDATE is mapped as a date or, in older indices, a long
+                    "last_seen": format_epoch_millis(bucket.get("last_seen", {}).get("value")),
+                    "total": total,
+                }
+                for bucket in buckets
+            ]
+        return stats
+
+    def _field_caps_params(self) -> dict:
+        return {"index": self.index_name, "fields": "*", "filter_path": ["fields.*.*.aggregatable", "fields.*.*.type"]}
+
+    def _apply_field_caps(self, response: dict) -> None:
+        """Reads the aggregatable fields, and falls back to fuzzy retrieval if the index has no embeddings."""
+        fields = response.get("fields", {})
+        self._aggregatable_fields = {
+            field
+            for field, capabilities in fields.items()
+            if any(capability.get("aggregatable") for capability in capabilities.values())
+        }
+        # Indices loaded before the embedding field existed, or with EMBED_DESCRIPTIONS=false
+        if self.retrieval_mode == HYBRID_RETRIEVAL and "dense_vector" not in fields.get(self.embedding_field, {}):
+            print(
+                f"Warning: '{self.index_name}' has no dense_vector '{self.embedding_field}' field; "
+                "asset retrieval falls back to fuzzy search until it is reloaded with embeddings."
+            )
+            self.retrieval_mode = FUZZY_RETRIEVAL
+
+    def _field_caps_key(self) -> Optional[Tuple[str, str, str]]:
+        if self._seen_generation is None:
+            return None
+        return self.index_name, self._seen_generation, self._configured_retrieval_mode
+
+    def _restore_field_caps(self) -> bool:
+        """Applies the field capabilities another store read for this generation; False if there are none."""
+        key = self._field_caps_key()
+        with _field_caps_lock:
+            cached = _field_caps_by_generation.get(key) if key is not None else None
+        if cached is None:
+            return False
+        self._aggregatable_fields, self.retrieval_mode = set(cached[0]), cached[1]
+        return True
+
+    def _remember_field_caps(self) -> None:
+        key = self._field_caps_key()
+        if key is None:
+            return
+        with _field_caps_lock:
+            # Older generations of the index are not read again
+            for stale in [cached for cached in _field_caps_by_generation if cached[0] == key[0]]:
+                del _field_caps_by_generation[stale]
+            _field_caps_by_generation[key] = (frozenset(self._aggregatable_fields), self.retrieval_mode)
+
+    def _embeddings_count_params(self) -> dict:
+        # field_caps lists mapped fields even when no document has a value
+        return {"index": self.index_name, "query": {"exists": {"field": self.embedding_field}}, "terminate_after": 1}
+
+    def _apply_embeddings_count(self, response) -> None:
+        """Falls back to fuzzy retrieval if no document has an embedding (e.g. loaded with EMBED_DESCRIPTIONS=false)."""
+        if response["count"] == 0:
+            print(
+                f"Warning: '{self.index_name}' has no '{self.embedding_field}' vectors; "
+                "asset retrieval falls back to fuzzy search until it is reloaded with embeddings."
+            )
+            self.retrieval_mode = FUZZY_RETRIEVAL
+
+    def _aggregation_field(self, attribute: str) -> str:
+        """The field a terms aggregation on attribute uses: its keyword subfield for text fields."""
+        if self._aggregatable_fields is None:
+            # Dynamic mappings index strings as text with a .keyword subfield
+            return f"{attribute}.keyword"
+        if f"{attribute}.keyword" in self._aggregatable_fields or attribute not in self._aggregatable_fields:
+            return f"{attribute}.keyword"
+        return attribute
+
+    def _retrieval_searches(
+        self, user_input: str, source: List[str], size: int, mode: Optional[str] = None
+    ) -> List[dict]:
+        """The search bodies retrieving similar assets: one fuzzy search, or a BM25 and a kNN search."""
+        if (mode or self.retrieval_mode) != HYBRID_RETRIEVAL:
+            query = self._description_query(user_input)
+            if query is None:
+                return []
+            query.update(_source=source, size=size)  # Request only the needed attributes
+            return [query]
+
+        query = self._match_query(user_input)
+        if query is None:
             return []
+        searches = [{**query, "_source": source, "size": size}]
+        knn = self._knn_clause(user_input, size)
+        if knn is not None:
+            searches.append({"knn": knn, "_source": source, "size": size})
+        return searches
+
+    def _match_query(self, user_input: str) -> Optional[dict]:
+        """The BM25 leg of hybrid retrieval: one match on the whole description, without per-term fuzziness."""
+        if not user_input.split():
+            return None
+        return {"query": {"match": {"ASSETID.DESCRIPTION": {"query": user_input, "operator": "or"}}}}
+
+    def _knn_clause(self, user_input: str, k: int) -> Optional[dict]:
+        """The kNN search on the description embeddings, or None if user_input cannot be embedded."""
+        try:
+            query_vector = get_embedder().embed_query(user_input)
+        except Exception as e:
+            print(f"Error embedding '{user_input}', using BM25 only: {e}")
+            return None
+        return {
+            "field": self.embedding_field,
+            "query_vector": query_vector,
+            "k": k,
+            "num_candidates": max(100, 10 * k),
+        }
+
+    @classmethod
+    def _fuse_hits(cls, responses: List[dict], size: int) -> List[dict]:
+        """Merges ranked hit lists with reciprocal rank fusion; a single list is returned as is."""
+        ranked_lists = [cls._response_hits(response) for response in responses]
+        if len(ranked_lists) == 1:
+            return ranked_lists[0]
+
+        scores: Dict[str, float] = {}
+        hits: Dict[str, dict] = {}
+        for ranked in ranked_lists:
+            for rank, hit in enumerate(ranked, start=1):
+                hit_id = hit.get("_id")
+                scores[hit_id] = scores.get(hit_id, 0.0) + 1.0 / (RRF_RANK_CONSTANT + rank)
+                hits.setdefault(hit_id, hit)
+        # sorted is stable: ties keep the BM25 order
+        return [hits[hit_id] for hit_id in sorted(scores, key=scores.get, reverse=True)[:size]]
 
+    def _description_query(self, user_input: str) -> Optional[dict]:
+        """The fuzzy match of assets on their description, or None if user_input has no terms."""
         # Split the user input into terms
         search_terms = user_input.split()
         if not search_terms:
-            return []
+            return None
 
         # Build the boolean query with should clauses for each term
         should_clauses = []
@@ -570,41 +951,333 @@ class EquipmentEntryElasticSearch(ElasticSearchVectorStore):
                 }
             )
 
-        query = {
+        return {
             "query": {
                 "bool": {
                     "should": should_clauses,
                     "minimum_should_match": 1,  # Match documents containing at least one term
                 }
             },
-            "_source": [attribute],  # Request only the target attribute
         }
 
-        # print(f"Executing ES Query: {query}")  # Optional: for debugging
-        response = self.search(query)
+    @staticmethod
+    def _response_hits(response: dict) -> list:
+        if response and "hits" in response and "hits" in response["hits"]:
+            return response["hits"]["hits"]
+        if response and "error" in response:
+            # A failed search of an _msearch comes back as an error item, not an exception
+            print(f"Error in search response: {response['error']}")
+        return []
 
-        # Use a set to store unique results
-        unique_results = set()
+    @staticmethod
+    def _count_values(hits: list, attribute: Optional[str]) -> list:
+        if attribute is None:
+            return []
 
-        if response and "hits" in response and "hits" in response["hits"]:
-            for hit in response["hits"]["hits"]:
-                source = hit.get("_source", {})
-                # Navigate nested structure if attribute contains dots
-                attr_parts = attribute.split(".")
-                value = source
-                try:
-                    for part in attr_parts:
-                        if isinstance(value, dict) and part in value:
-                            value = value[part]
-                        else:
-                            value = None  # Attribute path not found in this hit
-                            break
-                    if value is not None:
-                        # Add the found value to the set
-                        unique_results.add(value)
-                except Exception as e:
-                    # Log errors during processing
-                    print(f"Error processing hit: {hit}, Error: {e}")
-
-        # Convert the set back to a list before returning
-        return list(unique_results)
+        # Count occurrences so callers can rank values by frequency
+        value_counts = Counter()
+        attr_parts = attribute.split(".")
+        for hit in hits:
+            source = hit.get("_source", {})
+            # Navigate nested structure if attribute contains dots
+            value = source
+            try:
+                for part in attr_parts:
+                    if isinstance(value, dict) and part in value:
+                        value = value[part]
+                    else:
+                        value = None  # Attribute path not found in this hit
+                        break
+                if value is not None:
+                    value_counts[value] += 1
+            except Exception as e:
+                # Log errors during processing
+                print(f"Error processing hit: {hit}, Error: {e}")
+
+        return value_counts.most_common()
+
+
+class EquipmentEntryElasticSearch(EquipmentEntryIndex, ElasticSearchVectorStore):
+    def __init__(
+        self,
+        es_host: str = DEFAULT_ES_HOST,
+        index_name: str = DEFAULT_INDEX_NAME,
+        cache: Optional[HistoricalValueCache] = None,
+    ):
+        super().__init__(es_host, index_name)
+        self._init_search_state(cache)
+
+    def fuzzy_search(self, user_input: str, label_key: str):
+        """Returns the distinct historical values for a field, most frequent first."""
+        return [value for value, _ in self.historical_value_counts(user_input, label_key)]
+
+    def fuzzy_search_multi(self, user_input: str, label_keys: List[str]) -> Dict[str, list]:
+        """Returns the distinct historical values of several fields, most frequent first, from one search."""
+        return {
+            label_key: [value for value, _ in value_counts]
+            for label_key, value_counts in self.historical_value_counts_multi(user_input, label_keys).items()
+        }
+
+    def historical_value_counts(self, user_input: str, label_key: str):
+        """
+        Returns the historical values of a field for assets similar to user_input.
+
+        Args:
+            user_input (str): The asset description to match against.
+            label_key (str): The label key of the field (see label_mapping).
+
+        Returns:
+            list: (value, count) tuples ordered by descending frequency. Ties keep
+                  the order in which the values were first seen in the hits.
+        """
+        return self.historical_value_counts_multi(user_input, [label_key])[label_key]
+
+    def historical_value_counts_multi(self, user_input: str, label_keys: List[str]) -> Dict[str, list]:
+        """
+        Returns the historical values of several fields for assets similar to user_input.
+
+        The fuzzy match does not depend on the field, so it runs once with the
+        source paths of every field and each field's values are counted from the
+        same hits, as historical_value_counts would return them.
+
+        Args:
+            user_input (str): The asset description to match against.
+            label_keys (list): The label keys of the fields (see label_mapping).
+
+        Returns:
+            dict: (value, count) tuples by label key; invalid label keys get an empty list.
+        """
+        return self.historical_value_counts_batch([(user_input, label_keys)])[0]
+
+    def historical_value_counts_batch(self, requests: List[Tuple[str, List[str]]]) -> List[Dict[str, list]]:
+        """
+        Returns the historical values for several (user_input, label_keys) requests.
+
+        Requests for the same description share one retrieval; the searches of all
+        descriptions (two each in hybrid mode) are sent together through _msearch,
+        so the whole batch is a single Elasticsearch round trip. Fields found in the
+        historical value cache are not searched again.
+
+        Returns:
+            list: One dict per request, as historical_value_counts_multi returns it.
+        """
+        self._refresh_cache_generation()
+        filters = (DEFAULT_HITS,)
+        results, missing = self._cached_lookups(COUNTS_LOOKUP, filters, requests)
+        if not missing:
+            return self._store_lookups(COUNTS_LOOKUP, filters, requests, results, [], [])
+
+        missing_requests = [(user_input, label_keys) for _, user_input, label_keys in missing]
+        self._load_field_caps()
+        searches_by_input = self._plan_value_counts(missing_requests)
+        queries = [query for searches in searches_by_input.values() for query in searches]
+        responses = [self.search(queries[0])] if len(queries) == 1 else self.multi_search(queries)
+        fetched = self._value_counts_from_responses(missing_requests, searches_by_input, responses)
+        return self._store_lookups(
+            COUNTS_LOOKUP, filters, requests, results, missing, fetched,
+            uncacheable=self._failed_inputs(searches_by_input, responses),
+        )
+
+    def similar_assets(
+        self, user_input: str, source: List[str], size: int = DEFAULT_HITS, mode: Optional[str] = None
+    ) -> List[dict]:
+        """
+        Returns the hits of the assets most similar to user_input.
+
+        Args:
+            user_input (str): The asset description to match against.
+            source (list): The _source paths to return.
+            size (int): The number of hits.
+            mode (str): "hybrid" or "fuzzy"; the store's retrieval_mode by default.
+        """
+        self._load_field_caps()
+        searches = self._retrieval_searches(user_input, source, size, mode)
+        if not searches:
+            return []
+        responses = [self.search(searches[0])] if len(searches) == 1 else self.multi_search(searches)
+        return self._fuse_hits(responses, size)
+
+    def historical_value_stats(
+        self, user_input: str, label_key: str, top_n: int = 25, sample_size: int = DEFAULT_SAMPLE_SIZE
+    ) -> List[dict]:
+        """
+        Returns the most frequent values of a field among assets similar to user_input.
+
+        Unlike historical_value_counts, the values are counted by Elasticsearch with a
+        terms aggregation over the sample_size best matches (sampler aggregation), so
+        no documents are returned and the counts are not limited to the top 10 hits.
+
+        Returns:
+            list: {"value", "count", "last_seen", "total"} dicts by descending count,
+                  where last_seen is the latest COMMISSIONDATE of the assets with the
+                  value and total the number of matches with the field set, including
+                  the values past top_n.
+        """
+        return self.historical_value_stats_multi(user_input, [label_key], top_n, sample_size)[label_key]
+
+    def historical_value_stats_multi(
+        self, user_input: str, label_keys: List[str], top_n: int = 25, sample_size: int = DEFAULT_SAMPLE_SIZE
+    ) -> Dict[str, List[dict]]:
+        """
+        Returns historical_value_stats for several fields from one search.
+
+        Each field gets its own terms aggregation under the same sampler. The search
+        has size 0 and a filter_path, so the response holds only the buckets.
+
+        Returns:
+            dict: The value statistics by label key; invalid label keys get an empty list.
+        """
+        self._refresh_cache_generation()
+        filters = (top_n, sample_size)
+        requests = [(user_input, label_keys)]
+        results, missing = self._cached_lookups(STATS_LOOKUP, filters, requests)
+        fetched = []
+        if missing:
+            missing_keys = missing[0][2]
+            self._load_field_caps()
+            query = self._plan_value_stats(user_input, missing_keys, top_n, sample_size)
+            if query is None:
+                fetched = [{label_key: [] for label_key in missing_keys}]
+            else:
+                response = self.search(query, filter_path=STATS_FILTER_PATH)
+                fetched = [self._value_stats_from_response(missing_keys, response)]
+        return self._store_lookups(STATS_LOOKUP, filters, requests, results, missing, fetched)[0]
+
+    def _load_field_caps(self) -> None:
+        if self._aggregatable_fields is not None or self._restore_field_caps():
+            return
+        try:
+            self._apply_field_caps(self.es.field_caps(**self._field_caps_params()))
+            if self.retrieval_mode == HYBRID_RETRIEVAL:
+                self._apply_embeddings_count(self.es.count(**self._embeddings_count_params()))
+        except Exception as e:
+            print(f"Error reading field capabilities of '{self.index_name}': {e}")
+            return
+        self._remember_field_caps()
+
+    def _refresh_cache_generation(self) -> None:
+        if self.cache is None:
+            return
+        if not self.cache.generation_due():
+            self._sync_generation()
+            return
+        try:
+            generation = self._generation_from_response(self.es.indices.get(**self._generation_params()))
+        except Exception as e:
+            print(f"Error reading the generation of '{self.index_name}': {e}")
+            generation = None
+        self._on_generation(generation)
+
+
+class AsyncEquipmentEntryElasticSearch(EquipmentEntryIndex, AsyncElasticSearchVectorStore):
+    """
+    The equipment entry lookups as coroutines, for issuing many searches concurrently
+    from one event loop (e.g. with asyncio.gather) over one connection pool.
+
+    Query embeddings are computed in a worker thread so the model does not block the loop.
+    """
+
+    def __init__(
+        self,
+        es_host: str = DEFAULT_ES_HOST,
+        index_name: str = DEFAULT_INDEX_NAME,
+        cache: Optional[HistoricalValueCache] = None,
+    ):
+        super().__init__(es_host, index_name)
+        self._init_search_state(cache)
+
+    async def historical_value_counts_multi(self, user_input: str, label_keys: List[str]) -> Dict[str, list]:
+        """See EquipmentEntryElasticSearch.historical_value_counts_multi."""
+        return (await self.historical_value_counts_batch([(user_input, label_keys)]))[0]
+
+    async def historical_value_counts_batch(
+        self, requests: List[Tuple[str, List[str]]]
+    ) -> List[Dict[str, list]]:
+        """See EquipmentEntryElasticSearch.historical_value_counts_batch."""
+        await self._refresh_cache_generation()
+        filters = (DEFAULT_HITS,)
+        results, missing = self._cached_lookups(COUNTS_LOOKUP, filters, requests)
+        if not missing:
+            return self._store_lookups(COUNTS_LOOKUP, filters, requests, results, [], [])
+
+        missing_requests = [(user_input, label_keys) for _, user_input, label_keys in missing]
+        await self._load_field_caps()
+        await self._embed_queries([user_input for user_input, _ in missing_requests])
+        searches_by_input = self._plan_value_counts(missing_requests)
+        queries = [query for searches in searches_by_input.values() for query in searches]
+        responses = [await self.search(queries[0])] if len(queries) == 1 else await self.multi_search(queries)
+        fetched = self._value_counts_from_responses(missing_requests, searches_by_input, responses)
+        return self._store_lookups(
+            COUNTS_LOOKUP, filters, requests, results, missing, fetched,
+            uncacheable=self._failed_inputs(searches_by_input, responses),
+        )
+
+    async def similar_assets(
+        self, user_input: str, source: List[str], size: int = DEFAULT_HITS, mode: Optional[str] = None
+    ) -> List[dict]:
+        """See EquipmentEntryElasticSearch.similar_assets."""
+        await self._load_field_caps()
+        await self._embed_queries([user_input], mode)
+        searches = self._retrieval_searches(user_input, source, size, mode)
+        if not searches:
+            return []
+        responses = [await self.search(searches[0])] if len(searches) == 1 else await self.multi_search(searches)
+        return self._fuse_hits(responses, size)
+
+    async def historical_value_stats_multi(
+        self, user_input: str, label_keys: List[str], top_n: int = 25, sample_size: int = DEFAULT_SAMPLE_SIZE
+    ) -> Dict[str, List[dict]]:
+        """See EquipmentEntryElasticSearch.historical_value_stats_multi."""
+        await self._refresh_cache_generation()
+        filters = (top_n, sample_size)
+        requests = [(user_input, label_keys)]
+        results, missing = self._cached_lookups(STATS_LOOKUP, filters, requests)
+        fetched = []
+        if missing:
+            missing_keys = missing[0][2]
+            await self._load_field_caps()
+            await self._embed_queries([user_input])
+            query = self._plan_value_stats(user_input, missing_keys, top_n, sample_size)
+            if query is None:
+                fetched = [{label_key: [] for label_key in missing_keys}]
+            else:
+                response = await self.search(query, filter_path=STATS_FILTER_PATH)
+                fetched = [self._value_stats_from_response(missing_keys, response)]
+        return self._store_lookups(STATS_LOOKUP, filters, requests, results, missing, fetched)[0]
+
+    async def _load_field_caps(self) -> None:
+        if self._aggregatable_fields is not None or self._restore_field_caps():
+            return
+        try:
+            self._apply_field_caps(await self.es.field_caps(**self._field_caps_params()))
+            if self.retrieval_mode == HYBRID_RETRIEVAL:
+                self._apply_embeddings_count(await self.es.count(**self._embeddings_count_params()))
+        except Exception as e:
+            print(f"Error reading field capabilities of '{self.index_name}': {e}")
+            return
+        self._remember_field_caps()
+
+    async def _refresh_cache_generation(self) -> None:
+        if self.cache is None:
+            return
+        if not self.cache.generation_due():
+            self._sync_generation()
+            return
+        try:
+            generation = self._generation_from_response(await self.es.indices.get(**self._generation_params()))
+        except Exception as e:
+            print(f"Error reading the generation of '{self.index_name}': {e}")
+            generation = None
+        self._on_generation(generation)
+
+    async def _embed_queries(self, user_inputs: List[str], mode: Optional[str] = None) -> None:
+        # Fills the embedder's query cache off the loop; the searches are then planned from the cache
+        if (mode or self.retrieval_mode) != HYBRID_RETRIEVAL:
+            return
+        embedder = get_embedder()
+        texts = [text for text in dict.fromkeys(user_inputs) if text.split()]
+        try:
+            await asyncio.to_thread(lambda: [embedder.embed_query(text) for text in texts])
+        except Exception:
+            # _knn_clause reports the error and falls back to BM25
+            pass
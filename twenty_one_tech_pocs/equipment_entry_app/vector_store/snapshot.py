@@ -0,0 +1,521 @@
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .equipment_entry import (
+    DEFAULT_HITS,
+    DEFAULT_SAMPLE_SIZE,
+    FUZZY_RETRIEVAL,
+    EquipmentEntryIndex,
+    format_epoch_millis,
+)
+
+try:
+    from rapidfuzz import process as fuzzy_process
+    from rapidfuzz.distance import OSA
+
+    RAPIDFUZZ_AVAILABLE = True
+except ImportError:
+    RAPIDFUZZ_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Written by data/build_asset_snapshot.py; one subdirectory per build, the current one named in CURRENT
+DEFAULT_SNAPSHOT_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    "data",
+    "asset_snapshot",
+)
+CURRENT_FILE = "CURRENT"
+SNAPSHOT_FORMAT = 1
+# Fuzzy expansions per query term, as the max_expansions default of Elasticsearch's match query
+MAX_EXPANSIONS = 50
+# Query terms whose fuzzy expansions are kept per process
+EXPANSION_CACHE_SIZE = 10000
+# Queries matching more than 1/8 of the documents are scored in dense per-document arrays
+DENSE_SCORING_RATIO = 8
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Code of a missing value in a column
+MISSING = -1
+NO_DATE = np.iinfo(np.int64).min
+
+# Roughly the standard analyzer of ASSETID.DESCRIPTION: lowercase alphanumeric runs
+_TOKEN = re.compile(r"\w+")
+
+
+def snapshot_root() -> str:
+    return os.getenv("ASSET_SNAPSHOT_PATH", DEFAULT_SNAPSHOT_PATH)
+
+
+def snapshot_available(root: Optional[str] = None) -> bool:
+    return os.path.exists(os.path.join(root or snapshot_root(), CURRENT_FILE))
+
+
+def _tokenize(text) -> List[str]:
+    return _TOKEN.findall(str(text).lower()) if text else []
+
+
+def _max_edits(term: str) -> int:
+    # fuzziness AUTO
+    return 0 if len(term) < 3 else 1 if len(term) < 6 else 2
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance with adjacent transpositions (as Lucene's fuzzy query), capped at limit + 1."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            distance = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+            if before is not None and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                distance = min(distance, before[j - 2] + 1)
+            current.append(distance)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+def _value_at(source: dict, path: str):
+    value = source
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _epoch_millis(value) -> int:
+    """A date as epoch millis (the loader stores COMMISSIONDATE that way), or NO_DATE."""
+    if isinstance(value, bool):
+        return NO_DATE
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str) and value:
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return NO_DATE
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return int(parsed.timestamp() * 1000)
+    return NO_DATE
+
+
+def _format_date(millis: int) -> Optional[str]:
+    if millis == NO_DATE:
+        return None
+    return format_epoch_millis(millis)
+
+
+def _save_strings(directory: str, name: str, strings: List[str]) -> None:
+    """Variable-width strings as one UTF-8 byte array and an offsets array, both memory-mappable."""
+    encoded = [string.encode("utf-8") for string in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(item) for item in encoded], out=offsets[1:])
+    np.save(os.path.join(directory, f"{name}.offsets.npy"), offsets)
+    np.save(os.path.join(directory, f"{name}.bytes.npy"), np.frombuffer(b"".join(encoded), dtype=np.uint8))
+
+
+class _StringArray:
+    def __init__(self, directory: str, name: str):
+        self.offsets = np.asarray(np.load(os.path.join(directory, f"{name}.offsets.npy"), mmap_mode="r"))
+        self.data = np.asarray(np.load(os.path.join(directory, f"{name}.bytes.npy"), mmap_mode="r"))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, position: int) -> str:
+        return self.data[self.offsets[position]:self.offsets[position + 1]].tobytes().decode("utf-8")
+
+
+def build_snapshot(
+    documents: Iterable[Tuple[str, dict]], root: Optional[str] = None, generation: Optional[str] = None
+) -> str:
+    """
+    Writes a snapshot of the (document id, _source) pairs and makes it the current one.
+
+    Every label_mapping field becomes a column of int32 codes into a dictionary of
+    its distinct JSON-encoded values; ASSETID.DESCRIPTION is also indexed as an
+    inverted index (tokens, doc-sorted postings, BM25 idf and length norms). The
+    running processes pick the new snapshot up when CURRENT changes.
+
+    Returns:
+        str: The directory of the new snapshot.
+    """
+    root = root or snapshot_root()
+    label_mapping = EquipmentEntryIndex.label_mapping
+    description_path = label_mapping["equipmentdesc"]
+    ids: List[str] = []
+    dictionaries: Dict[str, Dict[str, int]] = {label_key: {} for label_key in label_mapping}
+    codes: Dict[str, List[int]] = {label_key: [] for label_key in label_mapping}
+    last_seen: List[int] = []
+    vocabulary: Dict[str, int] = {}
+    postings: List[List[int]] = []
+    lengths: List[int] = []
+
+    for number, (doc_id, source) in enumerate(documents):
+        ids.append(str(doc_id))
+        for label_key, path in label_mapping.items():
+            value = _value_at(source, path)
+            if value is None or isinstance(value, (dict, list)):
+                codes[label_key].append(MISSING)
+                continue
+            dictionary = dictionaries[label_key]
+            codes[label_key].append(dictionary.setdefault(json.dumps(value), len(dictionary)))
+        last_seen.append(_epoch_millis(_value_at(source, EquipmentEntryIndex.last_seen_field)))
+        tokens = _tokenize(_value_at(source, description_path))
+        lengths.append(len(tokens))
+        for token in dict.fromkeys(tokens):
+            token_id = vocabulary.setdefault(token, len(vocabulary))
+            if token_id == len(postings):
+                postings.append([])
+            postings[token_id].append(number)
+
+    os.makedirs(root, exist_ok=True)
+    name = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}-{uuid.uuid4().hex[:8]}"
+    building = os.path.join(root, f".{name}.tmp")
+    os.makedirs(building)
+
+    assets = len(ids)
+    _save_strings(building, "ids", ids)
+    columns = {}
+    for position, label_key in enumerate(label_mapping):
+        column = f"column_{position}"
+        np.save(os.path.join(building, f"{column}.codes.npy"), np.asarray(codes[label_key], dtype=np.int32))
+        _save_strings(building, f"{column}.values", list(dictionaries[label_key]))
+        columns[label_key] = column
+    np.save(os.path.join(building, "last_seen.npy"), np.asarray(last_seen, dtype=np.int64))
+
+    document_frequency = np.asarray([len(docs) for docs in postings], dtype=np.float64)
+    idf = np.log1p((assets - document_frequency + 0.5) / (document_frequency + 0.5))
+    lengths_array = np.asarray(lengths, dtype=np.float64)
+    average_length = float(lengths_array.mean()) if assets else 0.0
+    # BM25 weight of a term occurring once, per document
+    doc_norm = (BM25_K1 + 1) / (1 + BM25_K1 * (1 - BM25_B + BM25_B * lengths_array / (average_length or 1.0)))
+    posting_offsets = np.zeros(len(postings) + 1, dtype=np.int64)
+    np.cumsum(document_frequency.astype(np.int64), out=posting_offsets[1:])
+    _save_strings(building, "tokens", list(vocabulary))
+    np.save(os.path.join(building, "idf.npy"), idf.astype(np.float32))
+    np.save(os.path.join(building, "doc_norm.npy"), doc_norm.astype(np.float32))
+    np.save(os.path.join(building, "postings.offsets.npy"), posting_offsets)
+    np.save(
+        os.path.join(building, "postings.docs.npy"),
+        np.fromiter((doc for docs in postings for doc in docs), dtype=np.int32, count=int(posting_offsets[-1])),
+    )
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "generation": generation,
+        "built_at": datetime.now(timezone.utc).isoformat(),
+        "assets": assets,
+        "tokens": len(vocabulary),
+        "columns": columns,
+    }
+    with open(os.path.join(building, "manifest.json"), "w", encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+
+    directory = os.path.join(root, name)
+    os.rename(building, directory)
+    current = os.path.join(root, f".{CURRENT_FILE}.tmp")
+    with open(current, "w", encoding="utf-8") as current_file:
+        current_file.write(name)
+    try:
+        with open(os.path.join(root, CURRENT_FILE), encoding="utf-8") as current_file:
+            previous = current_file.read().strip()
+    except OSError:
+        previous = None
+    os.replace(current, os.path.join(root, CURRENT_FILE))
+
+    # Keep the previous snapshot for processes that have not switched yet
+    for entry in os.listdir(root):
+        if entry not in (name, previous, CURRENT_FILE) and not entry.startswith("."):
+            shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
+    logger.info(f"Wrote asset snapshot {directory} ({assets} assets, {len(vocabulary)} tokens)")
+    return directory
+
+
+class AssetSnapshot:
+    """
+    One built snapshot, memory-mapped read-only.
+
+    The arrays are mapped rather than read, so the gunicorn workers of a host share
+    one copy in the page cache. Only the token vocabulary is held per process.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as manifest_file:
+            self.manifest = json.load(manifest_file)
+        if self.manifest.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"Unsupported asset snapshot format in {directory}")
+
+        self.ids = _StringArray(directory, "ids")
+        self.codes = {}
+        self.values = {}
+        for label_key, column in self.manifest["columns"].items():
+            self.codes[label_key] = self._load(f"{column}.codes.npy")
+            self.values[label_key] = _StringArray(directory, f"{column}.values")
+        self.last_seen = self._load("last_seen.npy")
+        self.idf = self._load("idf.npy")
+        self.doc_norm = self._load("doc_norm.npy")
+        self.posting_offsets = self._load("postings.offsets.npy")
+        self.posting_docs = self._load("postings.docs.npy")
+
+        tokens = _StringArray(directory, "tokens")
+        self.tokens = [tokens[position] for position in range(len(tokens))]
+        self.token_ids = {token: position for position, token in enumerate(self.tokens)}
+        self._expansions = lru_cache(maxsize=EXPANSION_CACHE_SIZE)(self._expand)
+
+    def _load(self, file_name: str) -> np.ndarray:
+        # A plain ndarray view of the map: slicing np.memmap itself is several times slower
+        return np.asarray(np.load(os.path.join(self.directory, file_name), mmap_mode="r"))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _expand(self, term: str) -> Tuple[Tuple[int, float], ...]:
+        """The vocabulary tokens within the fuzzy edit distance of term, closest first, with their score factor."""
+        limit = _max_edits(term)
+        if limit == 0:
+            token_id = self.token_ids.get(term)
+            return ((token_id, 1.0),) if token_id is not None else ()
+        if RAPIDFUZZ_AVAILABLE:
+            matches = [
+                (distance, token_id)
+                for _, distance, token_id in fuzzy_process.extract(
+                    term, self.tokens, scorer=OSA.distance, score_cutoff=limit, limit=MAX_EXPANSIONS
+                )
+            ]
+        else:
+            matches = []
+            for token_id, token in enumerate(self.tokens):
+                distance = _edit_distance(term, token, limit)
+                if distance <= limit:
+                    matches.append((distance, token_id))
+        # Fuzzy matches score less than exact ones, as in Lucene
+        return tuple(
+            (token_id, 1.0 - distance / len(term))
+            for distance, token_id in sorted(matches)[:MAX_EXPANSIONS]
+        )
+
+    def _postings(self, token_id: int) -> np.ndarray:
+        return self.posting_docs[self.posting_offsets[token_id]:self.posting_offsets[token_id + 1]]
+
+    def search(self, user_input: str, size: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The best matching documents for user_input and their scores, best first.
+
+        Each term of user_input matches the tokens within fuzziness AUTO of it and
+        the documents are ranked by BM25 over the matched terms: the in-process
+        counterpart of EquipmentEntryIndex._description_query.
+        """
+        terms = []
+        for term in dict.fromkeys(_tokenize(user_input)):
+            expansions = self._expansions(term)
+            if expansions:
+                terms.append(
+                    [(self._postings(token_id), self.idf[token_id] * factor) for token_id, factor in expansions]
+                )
+        if not terms:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        postings = sum(len(docs) for expansions in terms for docs, _ in expansions)
+        if postings * DENSE_SCORING_RATIO >= len(self):
+            # Scores of every document; the unmatched ones score 0
+            candidates, scores = None, self._score_dense(terms) * self.doc_norm
+        else:
+            candidates, scores = self._score_sparse(terms)
+            scores = scores * self.doc_norm[candidates]
+        top = np.argpartition(-scores, size - 1)[:size] if len(scores) > size else np.arange(len(scores))
+        top = top[scores[top] > 0]
+        docs = top if candidates is None else candidates[top]
+        # Best score first, then index order
+        order = np.lexsort((docs, -scores[top]))
+        return docs[order], scores[top][order]
+
+    def _score_sparse(self, terms: list) -> Tuple[np.ndarray, np.ndarray]:
+        """Scores by sorting the matched postings: for selective terms."""
+        term_docs, term_weights = [], []
+        for expansions in terms:
+            docs = np.concatenate([docs for docs, _ in expansions])
+            weights = np.repeat(
+                np.asarray([weight for _, weight in expansions], dtype=np.float32),
+                [len(docs) for docs, _ in expansions],
+            )
+            if len(expansions) > 1:
+                # A document matching several expansions of a term scores its best one
+                order = np.argsort(-weights, kind="stable")
+                docs, first = np.unique(docs[order], return_index=True)
+                weights = weights[order][first]
+            term_docs.append(docs)
+            term_weights.append(weights)
+        matched, inverse = np.unique(np.concatenate(term_docs), return_inverse=True)
+        return matched, np.bincount(inverse, weights=np.concatenate(term_weights))
+
+    def _score_dense(self, terms: list) -> np.ndarray:
+        """Scores in per-document accumulators: one pass over the postings for common terms."""
+        scores = np.zeros(len(self), dtype=np.float32)
+        term_scores = np.zeros(len(self), dtype=np.float32)
+        for expansions in terms:
+            if len(expansions) == 1:
+                docs, weight = expansions[0]
+                scores[docs] += weight
+                continue
+            term_scores.fill(0)
+            for docs, weight in expansions:
+                term_scores[docs] = np.maximum(term_scores[docs], weight)
+            scores += term_scores
+        return scores
+
+    def value(self, label_key: str, code: int):
+        return json.loads(self.values[label_key][code])
+
+    def column_values(self, label_key: str, docs: np.ndarray) -> list:
+        """The values of a field for documents, None where missing."""
+        return [None if code == MISSING else self.value(label_key, code) for code in self.codes[label_key][docs]]
+
+
+class EquipmentEntrySnapshot(EquipmentEntryIndex):
+    """
+    In-process equipment entry store answering the asset lookups from an AssetSnapshot.
+
+    Implements the synchronous lookups of EquipmentEntryElasticSearch with the same
+    return formats, without a network round trip. Retrieval is always the fuzzy BM25
+    search; the hybrid kNN search needs Elasticsearch. The snapshot is reopened when
+    data/build_asset_snapshot.py writes a new one.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or snapshot_root()
+        self.retrieval_mode = FUZZY_RETRIEVAL
+        # Lookups are cheaper than a cache lookup would save
+        self.cache = None
+        self._snapshot: Optional[AssetSnapshot] = None
+        self._mtime: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def snapshot(self) -> AssetSnapshot:
+        current = os.path.join(self.path, CURRENT_FILE)
+        mtime = os.stat(current).st_mtime
+        if self._snapshot is None or mtime != self._mtime:
+            with self._lock:
+                if self._snapshot is None or mtime != self._mtime:
+                    with open(current, encoding="utf-8") as current_file:
+                        self._snapshot = AssetSnapshot(os.path.join(self.path, current_file.read().strip()))
+                    self._mtime = mtime
+                    logger.info(f"Opened asset snapshot {self._snapshot.directory} ({len(self._snapshot)} assets)")
+        return self._snapshot
+
+    def fuzzy_search(self, user_input: str, label_key: str):
+        """Returns the distinct historical values for a field, most frequent first."""
+        return [value for value, _ in self.historical_value_counts(user_input, label_key)]
+
+    def fuzzy_search_multi(self, user_input: str, label_keys: List[str]) -> Dict[str, list]:
+        """Returns the distinct historical values of several fields, most frequent first, from one search."""
+        return {
+            label_key: [value for value, _ in value_counts]
+            for label_key, value_counts in self.historical_value_counts_multi(user_input, label_keys).items()
+        }
+
+    def historical_value_counts(self, user_input: str, label_key: str):
+        """(value, count) tuples of a field among the top 10 matches, as EquipmentEntryElasticSearch returns them."""
+        return self.historical_value_counts_multi(user_input, [label_key])[label_key]
+
+    def historical_value_counts_multi(self, user_input: str, label_keys: List[str]) -> Dict[str, list]:
+        return self.historical_value_counts_batch([(user_input, label_keys)])[0]
+
+    def historical_value_counts_batch(self, requests: List[Tuple[str, List[str]]]) -> List[Dict[str, list]]:
+        snapshot = self.snapshot
+        docs_by_input = {}
+        results = []
+        for user_input, label_keys in requests:
+            if user_input not in docs_by_input:
+                docs_by_input[user_input] = snapshot.search(user_input, DEFAULT_HITS)[0]
+            docs = docs_by_input[user_input]
+            counts = {}
+            for label_key in label_keys:
+                if label_key not in snapshot.codes:
+                    print(f"Warning: Invalid label_key '{label_key}' provided.")
+                    counts[label_key] = []
+                    continue
+                # Counter keeps the first-seen order of ties, as _count_values does over the hits
+                codes = Counter(int(code) for code in snapshot.codes[label_key][docs] if code != MISSING)
+                counts[label_key] = [(snapshot.value(label_key, code), count) for code, count in codes.most_common()]
+            results.append(counts)
+        return results
+
+    def similar_assets(
+        self, user_input: str, source: List[str], size: int = DEFAULT_HITS, mode: Optional[str] = None
+    ) -> List[dict]:
+        """Returns hits of the assets most similar to user_input, with the snapshot's fields of source."""
+        snapshot = self.snapshot
+        paths = {path: label_key for label_key, path in self.label_mapping.items() if path in source}
+        docs, scores = snapshot.search(user_input, size)
+        hits = []
+        for doc, score in zip(docs, scores):
+            hit_source = {}
+            for path, label_key in paths.items():
+                code = snapshot.codes[label_key][doc]
+                if code == MISSING:
+                    continue
+                *parents, leaf = path.split(".")
+                node = hit_source
+                for part in parents:
+                    node = node.setdefault(part, {})
+                node[leaf] = snapshot.value(label_key, code)
+            hits.append({"_id": snapshot.ids[doc], "_score": float(score), "_source": hit_source})
+        return hits
+
+    def historical_value_stats(
+        self, user_input: str, label_key: str, top_n: int = 25, sample_size: int = DEFAULT_SAMPLE_SIZE
+    ) -> List[dict]:
+        """{"value", "count", "last_seen", "total"} dicts of a field among the sample_size best matches."""
+        return self.historical_value_stats_multi(user_input, [label_key], top_n, sample_size)[label_key]
+
+    def historical_value_stats_multi(
+        self, user_input: str, label_keys: List[str], top_n: int = 25, sample_size: int = DEFAULT_SAMPLE_SIZE
+    ) -> Dict[str, List[dict]]:
+        """historical_value_stats of several fields over the same matches, as the aggregation search returns them."""
+        snapshot = self.snapshot
+        docs = snapshot.search(user_input, sample_size)[0]
+        last_seen = snapshot.last_seen[docs]
+        stats = {}
+        for label_key in label_keys:
+            if label_key not in snapshot.codes:
+                print(f"Warning: Invalid label_key '{label_key}' provided.")
+                stats[label_key] = []
+                continue
+            codes = np.asarray(snapshot.codes[label_key][docs])
+            present = codes != MISSING
+            distinct, inverse, counts = np.unique(codes[present], return_inverse=True, return_counts=True)
+            latest = np.full(len(distinct), NO_DATE, dtype=np.int64)
+            np.maximum.at(latest, inverse, last_seen[present])
+            total = int(present.sum())
+            buckets = []
+            for code, count, seen in zip(distinct, counts, latest):
+                value = snapshot.value(label_key, int(code))
+                # Terms buckets have booleans as "true"/"false"
+                if isinstance(value, bool):
+                    value = "true" if value else "false"
+                buckets.append(
+                    {"value": value, "count": int(count), "last_seen": _format_date(int(seen)), "total": total}
+                )
+            # Terms aggregation order: descending count, then ascending key
+            buckets.sort(key=lambda bucket: (-bucket["count"], str(bucket["value"])))
+            stats[label_key] = buckets[:top_n]
+        return stats
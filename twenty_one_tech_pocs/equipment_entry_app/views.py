@@ -1,18 +1,130 @@
+import asyncio
+import json
+import logging
 import os
 
-from twenty_one_tech_pocs.common import LLMFactory, LLMsEnum, PromptFactory
+from twenty_one_tech_pocs.common import ConfigManager, LLMFactory, LLMsEnum, PromptFactory
+from twenty_one_tech_pocs.common.tokens import get_token_usage
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from dotenv import load_dotenv
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .vector_store.equipment_entry import EquipmentEntryElasticSearch
+from .predictors import HistoryPredictor
+from .profiles import get_profile_store, profile_value_stats
+from .prompt_builder import DEFAULT_TOKEN_BUDGET, AssetEntryPromptBuilder
+from .vector_store.elasticsearch_vector_store import get_client_options
+from .vector_store.equipment_entry import AsyncEquipmentEntryElasticSearch, EquipmentEntryElasticSearch
+from .vector_store.snapshot import EquipmentEntrySnapshot, snapshot_available
 
-vector_store = EquipmentEntryElasticSearch()
+logger = logging.getLogger(__name__)
+
+ASSET_ENTRY_PROMPT_NAME = "asset_entry_chat_prompt"
+# Assets per historical values lookup request
+MAX_HISTORY_ASSETS = 200
+
+
+def _create_vector_store():
+    """
+    The store of the asset lookups: Elasticsearch, or the in-process asset snapshot
+    (data/build_asset_snapshot.py) when ASSET_STORE_BACKEND=snapshot.
+    """
+    if os.getenv("ASSET_STORE_BACKEND", "elasticsearch").lower() == "snapshot":
+        if snapshot_available():
+            return EquipmentEntrySnapshot()
+        print("Warning: No asset snapshot found; run data/build_asset_snapshot.py. Using Elasticsearch.")
+    return EquipmentEntryElasticSearch()
+
+
+vector_store = _create_vector_store()
 llm_factory = LLMFactory()
 load_dotenv()
 
 
+def _get_prompt_token_budget() -> int:
+    """Reads the per-call prompt token budget from ASSET_PROMPT_TOKEN_BUDGET."""
+    try:
+        return int(os.getenv("ASSET_PROMPT_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET))
+    except ValueError:
+        return DEFAULT_TOKEN_BUDGET
+
+
+def _use_hits_history() -> bool:
+    return os.getenv("ASSET_HISTORY_MODE", "aggregation").lower() == "hits"
+
+
+def _counts_as_stats(value_counts: dict) -> dict:
+    return {
+        key: [{"value": value, "count": count, "last_seen": None} for value, count in counts]
+        for key, counts in value_counts.items()
+    }
+
+
+def _historical_value_stats(asset_description: str, attribute_keys: list, accepted_values: dict = None):
+    """
+    Historical value statistics of the attributes, by attribute key, and the field profiles used.
+
+    Attributes with a profile for the class, equipment type or category given in
+    accepted_values are answered from the precomputed profiles, without a search.
+    The others are counted by Elasticsearch aggregations over the best matching
+    assets; ASSET_HISTORY_MODE=hits counts them from the top 10 hits instead.
+    """
+    profile_store = get_profile_store()
+    profiles = {}
+    for key in attribute_keys:
+        profile = profile_store.lookup(accepted_values, key)
+        if profile is not None:
+            profiles[key] = profile
+    stats = {key: profile_value_stats(profile) for key, profile in profiles.items()}
+
+    remaining = [key for key in attribute_keys if key not in profiles]
+    if remaining and _use_hits_history():
+        stats.update(_counts_as_stats(vector_store.historical_value_counts_multi(asset_description, remaining)))
+    elif remaining:
+        stats.update(vector_store.historical_value_stats_multi(asset_description, remaining))
+    return stats, profiles
+
+
+def _get_interactive_llm(llm_name: str, api_key: str):
+    """
+    Creates the model for an interactive prediction, hedged against tail latency.
+
+    Hedging is on by default with gpt-4o-mini as the secondary backend and can be
+    tuned or disabled with the LLM_HEDGE_* environment variables.
+    """
+    hedge_config = ConfigManager().get_hedge_config()
+    if not hedge_config.pop("enabled", True):
+        return llm_factory.get_llm(llm_name=llm_name, temperature=0, api_key=api_key)
+
+    hedge_llm_name = hedge_config.pop("name", LLMsEnum.GPT4O_MINI.value)
+    # LLM_HEDGE_MIN_DELAY -> min_hedge_delay, LLM_HEDGE_PERCENTILE -> hedge_percentile, ...
+    hedge_params = {
+        key.replace("delay", "hedge_delay") if key.endswith("delay") else f"hedge_{key}": value
+        for key, value in hedge_config.items()
+    }
+    return llm_factory.get_hedged_llm(
+        llm_name=llm_name,
+        hedge_llm_name=hedge_llm_name,
+        temperature=0,
+        api_key=api_key,
+        **hedge_params,
+    )
+
+
+def _log_token_usage(attribute_key, prompt_tokens, llm_result):
+    """Logs tokens-in/tokens-out (and prompt cache hits) for a single field prediction."""
+    usage = get_token_usage(llm_result)
+    logger.info(
+        f"Prediction for '{attribute_key}': tokens_in={usage['input_tokens']} "
+        f"(estimated {prompt_tokens}), cached_tokens={usage['cached_tokens']}, "
+        f"tokens_out={usage['output_tokens']}"
+    )
+
+
 class GenerateAssetView(APIView):
     def options(self, request, asset_description, *args, **kwargs):
         """
@@ -69,24 +181,20 @@ class GenerateAssetView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Format accepted values for the prompt
-        accepted_values_str = "\n".join(
-            [f"- {key}: {value}" for key, value in accepted_values_dict.items()]
-        )
-        if not accepted_values_str:
-            accepted_values_str = "None provided."
+        if not accepted_values_dict:
             return Response(
                 {"error": "No accepted values provided"},
                 status=status.HTTP_400_BAD_REQUEST,
             )  # This line seems problematic, if accepted_values is optional, this might be an issue. Keeping as is for now.
 
-        # Prepare expected_values for the prompt
-        expected_values_for_prompt = expected_values_list
-        if not expected_values_list:  # Handles None or empty list
-            expected_values_for_prompt = "None provided."
-
-        # Use the vector store’s fuzzy_search (which uses label_mapping internally)
-        historical_values = vector_store.fuzzy_search(asset_description, attribute_key)
+        # Historical values with their frequencies, most frequent first
+        historical_stats_by_attribute, profiles = _historical_value_stats(
+            asset_description, [attribute_key], accepted_values_dict
+        )
+        historical_stats = historical_stats_by_attribute[attribute_key]
+        profile = profiles.get(attribute_key)
+        historical_value_counts = [(item["value"], item["count"]) for item in historical_stats]
+        historical_values = [value for value, _ in historical_value_counts]
         target_field = vector_store.label_mapping.get(attribute_key)
         field_description = vector_store.field_descriptions.get(
             attribute_key, "No description available."
@@ -103,9 +211,21 @@ class GenerateAssetView(APIView):
         # if not historical_values:
         #     return Response({"historical_values": [], "llm_response": None}, status=status.HTTP_200_OK)
 
-        # Use prompt factory for asset_entry_prompt
+        # A value that dominates the history is returned without calling the LLM
+        history_prediction = HistoryPredictor.from_env().predict(historical_stats, expected_values_list, profile)
+        if history_prediction is not None:
+            return Response(
+                {
+                    "historical_values": historical_values,
+                    "llm_response": history_prediction,
+                    "prediction_source": "profile" if profile else "history",
+                },
+                status=status.HTTP_200_OK,
+            )
+
+        # Use prompt factory for the cache-friendly asset entry chat prompt
         try:
-            equipment_prompt = PromptFactory.get_prompt("asset_entry_prompt")
+            equipment_prompt = PromptFactory.get_prompt(ASSET_ENTRY_PROMPT_NAME)
         except ValueError as e:
             print(f"Error getting prompt: {e}")
             return Response(
@@ -122,22 +242,26 @@ class GenerateAssetView(APIView):
             )
 
         try:
-            # Get LLM instance from factory
-            # Assuming GPT4O_MINI is desired here, adjust if needed
-            model = llm_factory.get_llm(
-                llm_name=LLMsEnum.GPT4O.value, temperature=0, api_key=api_key
+            # Get LLM instance from factory, hedged with a secondary backend
+            model = _get_interactive_llm(LLMsEnum.GPT4O.value, api_key)
+            prompt_builder = AssetEntryPromptBuilder(
+                equipment_prompt,
+                model_name=LLMsEnum.GPT4O.value,
+                token_budget=_get_prompt_token_budget(),
+            )
+            prompt_inputs, prompt_tokens = prompt_builder.build(
+                asset_description=asset_description,
+                target_field=target_field,
+                field_description=field_description,
+                historical_values=historical_value_counts,
+                accepted_values=accepted_values_dict,
+                expected_values=expected_values_list,
             )
             chain = equipment_prompt | model
             llm_result = chain.invoke(
-                {
-                    "asset_description": asset_description,
-                    "historical_values": historical_values,
-                    "target_field": target_field,
-                    "field_description": field_description,
-                    "accepted_values": accepted_values_str,
-                    "expected_values": expected_values_for_prompt,  # Added
-                }
+                prompt_inputs, config={"metadata": {"prompt_name": ASSET_ENTRY_PROMPT_NAME}}
             )
+            _log_token_usage(attribute_key, prompt_tokens, llm_result)
         except ValueError as e:  # Catch specific validation errors from factory
             print(f"LLM Configuration Error: {e}")
             return Response(
@@ -157,6 +281,7 @@ class GenerateAssetView(APIView):
             {
                 "historical_values": historical_values,
                 "llm_response": llm_result.content,
+                "prediction_source": "llm",
             },
             status=status.HTTP_200_OK,
         )
@@ -224,6 +349,7 @@ class GenerateBulkAssetView(APIView):
 
         # --- Setup ---
         predictions = {}
+        prediction_sources = {}
         # API key handled by factory
         api_key = os.environ.get("LLM_API_KEY")
         if not api_key:
@@ -237,8 +363,13 @@ class GenerateBulkAssetView(APIView):
             model = llm_factory.get_llm(
                 llm_name=LLMsEnum.GPT4O_MINI.value, temperature=0, api_key=api_key
             )
-            equipment_prompt = PromptFactory.get_prompt("asset_entry_prompt")
+            equipment_prompt = PromptFactory.get_prompt(ASSET_ENTRY_PROMPT_NAME)
             chain = equipment_prompt | model
+            prompt_builder = AssetEntryPromptBuilder(
+                equipment_prompt,
+                model_name=LLMsEnum.GPT4O_MINI.value,
+                token_budget=_get_prompt_token_budget(),
+            )
         except ValueError as e:  # Catch specific validation errors from factory
             print(f"LLM/Prompt Configuration Error: {e}")
             return Response(
@@ -252,12 +383,13 @@ class GenerateBulkAssetView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
-        # Format accepted values once
-        accepted_values_str = "\n".join(
-            [f"- {key}: {value}" for key, value in accepted_values_dict.items()]
+        # Historical values of every attribute from a single search of similar assets
+        historical_stats_by_attribute, profiles = _historical_value_stats(
+            asset_description,
+            [key for key in attributes_to_predict if key in vector_store.label_mapping],
+            accepted_values_dict,
         )
-        if not accepted_values_str:
-            accepted_values_str = "None provided."
+        history_predictor = HistoryPredictor.from_env()
 
         # --- Prediction Loop ---
         for attribute_key in attributes_to_predict:
@@ -273,17 +405,21 @@ class GenerateBulkAssetView(APIView):
                 predictions[attribute_key] = None  # Indicate invalid attribute
                 continue
 
-            historical_values = vector_store.fuzzy_search(asset_description, attribute_key)
+            historical_stats = historical_stats_by_attribute[attribute_key]
+            historical_value_counts = [(item["value"], item["count"]) for item in historical_stats]
 
-            # Prepare expected_values for the current attribute
+            # Expected values for the current attribute (empty if not provided)
             current_expected_list = attributes_expected_values_map.get(
                 attribute_key, []
             )
-            expected_values_for_prompt = current_expected_list
-            if (
-                not current_expected_list
-            ):  # Handles empty list from map or if key not found
-                expected_values_for_prompt = "None provided."
+
+            # A value that dominates the history is used without calling the LLM
+            profile = profiles.get(attribute_key)
+            history_prediction = history_predictor.predict(historical_stats, current_expected_list, profile)
+            if history_prediction is not None:
+                predictions[attribute_key] = history_prediction
+                prediction_sources[attribute_key] = "profile" if profile else "history"
+                continue
 
             # if not historical_values:
             #     # Indicate no historical data
@@ -292,17 +428,20 @@ class GenerateBulkAssetView(APIView):
 
             # Invoke LLM for the current attribute
             try:
+                prompt_inputs, prompt_tokens = prompt_builder.build(
+                    asset_description=asset_description,
+                    target_field=target_field,
+                    field_description=field_description,
+                    historical_values=historical_value_counts,
+                    accepted_values=accepted_values_dict,
+                    expected_values=current_expected_list,
+                )
                 llm_result = chain.invoke(
-                    {
-                        "asset_description": asset_description,
-                        "historical_values": historical_values,
-                        "target_field": target_field,
-                        "field_description": field_description,
-                        "accepted_values": accepted_values_str,
-                        "expected_values": expected_values_for_prompt,  # Added
-                    }
+                    prompt_inputs, config={"metadata": {"prompt_name": ASSET_ENTRY_PROMPT_NAME}}
                 )
+                _log_token_usage(attribute_key, prompt_tokens, llm_result)
                 predictions[attribute_key] = llm_result.content
+                prediction_sources[attribute_key] = "llm"
             except Exception as e:
                 print(
                     f"Error invoking LLM chain for attribute '{attribute_key}' on asset '{asset_description}': {e}"
@@ -310,4 +449,77 @@ class GenerateBulkAssetView(APIView):
                 predictions[attribute_key] = None  # Indicate prediction error
 
         # --- Return Results ---
-        return Response({"predictions": predictions}, status=status.HTTP_200_OK)
+        return Response(
+            {"predictions": predictions, "prediction_sources": prediction_sources},
+            status=status.HTTP_200_OK,
+        )
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class HistoricalValuesView(View):
+    """
+    Returns the historical value statistics of the fields of several assets at once.
+
+    POST body: {"assets": [{"asset_description": "...", "attributes": ["class", ...]}, ...]}.
+    The lookups are issued concurrently from one event loop over the pooled async
+    Elasticsearch client, so a grid of new assets costs about one search latency.
+    A plain async Django view, as DRF's APIView cannot be async.
+    """
+
+    async def post(self, request):
+        try:
+            assets = json.loads(request.body or b"{}").get("assets")
+        except (ValueError, AttributeError):
+            return JsonResponse({"error": "The request body must be a JSON object"}, status=400)
+        if not isinstance(assets, list) or not assets:
+            return JsonResponse({"error": "'assets' must be a non-empty list"}, status=400)
+        if len(assets) > MAX_HISTORY_ASSETS:
+            return JsonResponse({"error": f"At most {MAX_HISTORY_ASSETS} assets per request"}, status=400)
+
+        requests = []
+        for asset in assets:
+            if not isinstance(asset, dict) or not isinstance(asset.get("attributes"), list):
+                return JsonResponse(
+                    {"error": "Each asset needs an 'asset_description' and an 'attributes' list"}, status=400
+                )
+            requests.append((str(asset.get("asset_description", "")), asset["attributes"]))
+
+        if isinstance(vector_store, EquipmentEntrySnapshot):
+            # In-process lookups do not wait on the network
+            try:
+                stats = [_historical_value_stats(*request)[0] for request in requests]
+            except Exception as e:
+                print(f"Error looking up historical values: {e}")
+                return JsonResponse({"error": "Error searching historical values."}, status=500)
+            return _historical_values_response(requests, stats)
+
+        try:
+            async with AsyncEquipmentEntryElasticSearch() as store:
+                if _use_hits_history():
+                    # One _msearch for every asset
+                    value_counts = await store.historical_value_counts_batch(requests)
+                    stats = [_counts_as_stats(counts) for counts in value_counts]
+                else:
+                    # At most one in-flight search per pooled connection
+                    slots = asyncio.Semaphore(get_client_options()["connections_per_node"])
+
+                    async def lookup(asset_description, attribute_keys):
+                        async with slots:
+                            return await store.historical_value_stats_multi(asset_description, attribute_keys)
+
+                    stats = await asyncio.gather(*(lookup(*request) for request in requests))
+        except Exception as e:
+            print(f"Error looking up historical values: {e}")
+            return JsonResponse({"error": "Error searching historical values."}, status=500)
+        return _historical_values_response(requests, stats)
+
+
+def _historical_values_response(requests: list, stats: list) -> JsonResponse:
+    return JsonResponse(
+        {
+            "results": [
+                {"asset_description": asset_description, "historical_values": asset_stats}
+                for (asset_description, _), asset_stats in zip(requests, stats)
+            ]
+        }
+    )
@@ -1,20 +1,22 @@
 import logging
 import os
-from typing import Optional
+from typing import List, Optional
 
 from django.core.files.uploadedfile import UploadedFile
-from langchain.chains.summarize import load_summarize_chain
 from langchain.prompts import (
     ChatPromptTemplate,
     HumanMessagePromptTemplate,
     SystemMessagePromptTemplate,
 )
-from langchain_community.document_loaders import UnstructuredPDFLoader
 from langchain_core.documents import Document
 from langchain_core.language_models import BaseChatModel
-from langchain_core.output_parsers import PydanticOutputParser
 from langchain_openai import ChatOpenAI
-from ..schemas import MaintenanceSchedule
+from twenty_one_tech_pocs.common.pdf_pool import load_pdf
+from twenty_one_tech_pocs.common.stages import EXTRACT_STAGE, PARSE_STAGE, stage
+from twenty_one_tech_pocs.common.eam_commit import TaskPlanCommitPipeline
+from twenty_one_tech_pocs.common.chunked_extraction import ChunkedExtractor, merge_task_plans
+from twenty_one_tech_pocs.common.structured_output import StructuredExtractor
+from ..schemas import MaintenanceSchedule, TaskPlan
 
 logger = logging.getLogger(__name__)
 
@@ -28,7 +30,10 @@ class MaintenanceAssistantService:
         os.makedirs(self.temp_dir, exist_ok=True)
 
     def process_document(
-        self, file: UploadedFile, llm: BaseChatModel
+        self,
+        file: UploadedFile,
+        llm: BaseChatModel,
+        commit_pipeline: Optional[TaskPlanCommitPipeline] = None,
     ) -> MaintenanceSchedule:
         """
         Process a maintenance procedure document using LangChain and generate structured output.
@@ -36,6 +41,8 @@ class MaintenanceAssistantService:
         Args:
             file: The uploaded PDF file to process
             llm: The language model to use for processing
+            commit_pipeline: If given, the output is streamed and the schedule and each
+                task plan are queued for creation in EAM as soon as they are complete
 
         Returns:
             MaintenanceSchedule: Structured maintenance data extracted from document
@@ -52,15 +59,16 @@ class MaintenanceAssistantService:
             file_path = self._save_temp_file(file)
             self.temp_file_path = file_path
 
-            # Load the PDF using Unstructured library for better extraction
-            loader = UnstructuredPDFLoader(file_path)
-            documents = loader.load()
+            # Parse in the PDF pool (text layer first, Unstructured only for low-quality pages)
+            with stage(PARSE_STAGE, assistant="maintenance_assistant"):
+                documents = load_pdf(file_path)
 
             if not documents:
                 raise ValueError("No content could be extracted from the PDF")
 
             # Process the document to extract maintenance information
-            processed_data = self._process_maintenance_data(llm, documents)
+            with stage(EXTRACT_STAGE, assistant="maintenance_assistant"):
+                processed_data = self._process_maintenance_data(llm, documents, commit_pipeline)
 
             return processed_data
 
@@ -163,7 +171,10 @@ Each checklist should be associated with an appropriate task plan.
 """
 
     def _process_maintenance_data(
-        self, llm: ChatOpenAI, documents: list[Document]
+        self,
+        llm: ChatOpenAI,
+        documents: list[Document],
+        commit_pipeline: Optional[TaskPlanCommitPipeline] = None,
     ) -> MaintenanceSchedule:
         """
         Process the document chunks to extract maintenance information.
@@ -171,6 +182,7 @@ Each checklist should be associated with an appropriate task plan.
         Args:
             llm: The language model to use for processing
             documents: The document chunks to process
+            commit_pipeline: Optional EAM commit stage fed while the output streams in
 
         Returns:
             MaintenanceSchedule: Structured maintenance data
@@ -180,21 +192,37 @@ Each checklist should be associated with an appropriate task plan.
         # Create the prompt template
         chat_prompt = self._create_maintenance_prompt()
 
-        # Configure the output parser for the expected schema
-        parser = PydanticOutputParser(pydantic_object=MaintenanceSchedule)
-
-        # Create a chain for document processing
-        summarize_chain = load_summarize_chain(
-            llm,
-            chain_type="stuff",
-            verbose=True,
-            prompt=chat_prompt,
-        )
+        # Extract with the provider's structured output mode; invalid output gets one repair call
+        extractor = StructuredExtractor(MaintenanceSchedule, assistant="maintenance_assistant")
+        # Large documents are split to fit the model's context window and extracted in parallel
+        chunked_extractor = ChunkedExtractor(extractor, merge=self._merge_maintenance_schedules)
 
         # Get a response from the model with the structured data
         try:
-            response = summarize_chain.invoke({"input_documents": documents})
-            parsed_response = parser.invoke(response["output_text"])
+            chunks = chunked_extractor.split(llm, chat_prompt, documents)
+            if commit_pipeline is None or len(chunks) > 1:
+                parsed_response = chunked_extractor.extract(
+                    llm, chat_prompt, chunks, prompt_name="maintenance_schedule_extraction"
+                )
+                if commit_pipeline is not None:
+                    # Merged results are only final once every chunk is done
+                    commit_pipeline.submit_maintenance_schedule(parsed_response)
+                    for task_plan in parsed_response.task_plans:
+                        commit_pipeline.submit_task_plan(task_plan)
+            else:
+                # The schedule header streams in first, so it is created before its task plans
+                parsed_response = extractor.extract_streaming(
+                    llm,
+                    chat_prompt,
+                    {"text": chunks[0]},
+                    prompt_name="maintenance_schedule_extraction",
+                    array_key="task_plans",
+                    item_schema=TaskPlan,
+                    on_item=lambda index, task_plan: commit_pipeline.submit_task_plan(task_plan),
+                    on_header=lambda header: commit_pipeline.submit_maintenance_schedule(
+                        MaintenanceSchedule.model_validate({**header, "task_plans": []})
+                    ),
+                )
             logger.info("Successfully extracted maintenance data")
             return parsed_response
         except Exception as e:
@@ -203,6 +231,17 @@ Each checklist should be associated with an appropriate task plan.
                 f"Failed to extract structured data from document: {str(e)}"
             )
 
+    @staticmethod
+    def _merge_maintenance_schedules(schedules: List[MaintenanceSchedule]) -> MaintenanceSchedule:
+        """Merges the per-chunk schedules: the first chunk names the schedule, task plans are combined."""
+        first = schedules[0]
+        return MaintenanceSchedule(
+            code=first.code,
+            description=first.description,
+            duration=max(schedule.duration for schedule in schedules),
+            task_plans=merge_task_plans(schedule.task_plans for schedule in schedules),
+        )
+
     def cleanup(self) -> None:
         """Clean up temporary files."""
         if self.temp_file_path and os.path.exists(self.temp_file_path):
@@ -0,0 +1,243 @@
+from typing import List, Optional
+
+from django.core.files.uploadedfile import UploadedFile
+
+from .schemas import Hazard, IncidentAnalysisOutput
+from .services import SafetyProcedureAssistantService
+from twenty_one_tech_pocs.common import LLMFactory
+from twenty_one_tech_pocs.common.eam_writes import (
+    EAMWrite,
+    WriteResults,
+    hazard_key,
+    hazard_status_key,
+    precaution_key,
+    precaution_status_key,
+    safety_matrix_key,
+)
+from twenty_one_tech_pocs.common.llm_scheduler import BATCH_LANE
+from twenty_one_tech_pocs.document_processing.drafts import run_with_draft
+
+ASSISTANT = "safety_procedure_assistant"
+
+# A hazard or precaution goes through RA, then A (approved), before it can be linked
+APPROVAL_STATUSES = ("RA", "A")
+
+HAZARD_TYPE_TO_EAM = {
+    "All Hazards": "GEN",
+    "Biological Hazards": "BI",
+    "Chemical Hazards": "CH",
+    "Physical Hazards": "PH",
+    "Radiological Hazards": "RA",
+}
+
+
+def document_name(document_code: str) -> str:
+    """File name given to an incident report fetched from EAM."""
+    return f"{document_code}_incident_report.dat"
+
+
+def run_document_pipeline(document: UploadedFile, create_in_eam: bool = False, document_code: str = "") -> dict:
+    """
+    Analyzes an incident report and optionally creates the hazards, precautions and
+    equipment safety links in EAM.
+
+    Shared by ProcessIncidentReportView and the background document jobs. The
+    analysis is stored as a draft; resubmitting the same report reuses it.
+
+    Returns:
+        dict: incident_analysis and draft, plus eam_processing_summary when create_in_eam is set.
+
+    Raises:
+        ValueError: If no analysis could be extracted.
+    """
+    return run_with_draft(ASSISTANT, document, document_code, create_in_eam, extract_document)
+
+
+def extract_document(document: UploadedFile, create_in_eam: bool = False):
+    """Runs the analysis; the EAM records are created afterwards from the stored draft."""
+    llm = LLMFactory().get_configured_llm(lane=BATCH_LANE)
+    spa_service = SafetyProcedureAssistantService()
+    try:
+        analysis_output: Optional[IncidentAnalysisOutput] = spa_service.process_document(file=document, llm=llm)
+    finally:
+        spa_service.cleanup()
+    if not analysis_output:
+        raise ValueError("Failed to analyze incident report or no data extracted.")
+    return {"incident_analysis": analysis_output.model_dump()}, None
+
+
+def plan_eam_writes(extraction: dict) -> List[EAMWrite]:
+    """
+    The EAM writes of a stored incident analysis.
+
+    Each hazard and precaution is created once. For every equipment safety link
+    whose hazard and precaution are created, both are approved (RA, then A) once,
+    and then the safety matrix record is created.
+    """
+    analysis_output = IncidentAnalysisOutput.model_validate(extraction["incident_analysis"])
+    writes: List[EAMWrite] = []
+    planned = set()
+
+    def add(write: EAMWrite) -> None:
+        if write.key not in planned:
+            planned.add(write.key)
+            writes.append(write)
+
+    # 1. Create all identified Hazards and their Precautions
+    for hazard in analysis_output.identified_hazards:
+        add(EAMWrite(
+            key=hazard_key(hazard.hazard_code),
+            operation="create_hazard",
+            payload=hazard.model_dump(mode="json", exclude={'precautions'}),  # EAM API might not want nested precautions
+        ))
+        for precaution in hazard.precautions:
+            add(EAMWrite(
+                key=precaution_key(precaution.precaution_code),
+                operation="create_precaution",
+                payload=precaution.model_dump(mode="json"),
+            ))
+
+    # 2. Approve the linked hazards and precautions, then create the safety matrix links
+    for index, link_obj in enumerate(analysis_output.equipment_safety_links):
+        hazard = _linked_hazard(analysis_output, link_obj)
+        precaution_code = link_obj.linked_precaution.precaution_code
+        if hazard is None or precaution_key(precaution_code) not in planned:
+            continue
+
+        hazard_steps = _approval_steps(hazard_key(hazard.hazard_code), hazard_status_key, hazard.hazard_code)
+        for status_code, depends_on in hazard_steps:
+            add(EAMWrite(
+                key=hazard_status_key(hazard.hazard_code, status_code),
+                operation="update_hazard_status",
+                payload={"hazard_code": hazard.hazard_code, "status_code": status_code},
+                depends_on=depends_on,
+            ))
+        precaution_steps = _approval_steps(precaution_key(precaution_code), precaution_status_key, precaution_code)
+        for status_code, depends_on in precaution_steps:
+            add(EAMWrite(
+                key=precaution_status_key(precaution_code, status_code),
+                operation="update_precaution_status",
+                payload={"precaution_code": precaution_code, "status_code": status_code},
+                depends_on=depends_on,
+            ))
+
+        add(EAMWrite(
+            key=safety_matrix_key(index),
+            operation="create_safety_matrix",
+            payload={
+                "hazard_code": hazard.hazard_code,
+                "precaution_code": precaution_code,
+                "hazard_eam_type_code": HAZARD_TYPE_TO_EAM.get(hazard.hazard_type.value, "PH"),
+                "equipment_details": _equipment_details_for_eam(link_obj),
+                "hazard_description": hazard.description or "",
+                "precaution_description": link_obj.linked_precaution.description or "",
+            },
+            depends_on=(
+                hazard_key(hazard.hazard_code),
+                precaution_key(precaution_code),
+                hazard_status_key(hazard.hazard_code, APPROVAL_STATUSES[-1]),
+                precaution_status_key(precaution_code, APPROVAL_STATUSES[-1]),
+            ),
+        ))
+    return writes
+
+
+def summarize_eam_writes(extraction: dict, results: WriteResults) -> dict:
+    """The EAM part of the response: the hazard and precaution creation log and the safety link log."""
+    analysis_output = IncidentAnalysisOutput.model_validate(extraction["incident_analysis"])
+    eam_creation_summary = []
+    logged = set()
+
+    for hazard_obj_from_llm in analysis_output.identified_hazards:
+        hazard_responses = []
+        precaution_responses_for_hazard = []
+        if hazard_key(hazard_obj_from_llm.hazard_code) not in logged:
+            logged.add(hazard_key(hazard_obj_from_llm.hazard_code))
+            hazard_responses.append(results.get(hazard_key(hazard_obj_from_llm.hazard_code)))
+        for precaution_obj_from_llm in hazard_obj_from_llm.precautions:
+            if precaution_key(precaution_obj_from_llm.precaution_code) not in logged:
+                logged.add(precaution_key(precaution_obj_from_llm.precaution_code))
+                precaution_responses_for_hazard.append(
+                    results.get(precaution_key(precaution_obj_from_llm.precaution_code))
+                )
+
+        eam_creation_summary.append({
+            "processed_hazard_code_llm": hazard_obj_from_llm.hazard_code,
+            "eam_hazard_creation_responses": hazard_responses,
+            "eam_precaution_creation_responses_for_hazard": precaution_responses_for_hazard
+        })
+
+    equipment_link_eam_summaries = []
+    for index, link_obj in enumerate(analysis_output.equipment_safety_links):
+        precaution_code = link_obj.linked_precaution.precaution_code
+        hazard_response = results.get(hazard_key(link_obj.parent_hazard_code))
+        precaution_response = results.get(precaution_key(precaution_code))
+        eam_hazard_code = (
+            hazard_response.get("HAZARDCODE", link_obj.parent_hazard_code) if hazard_response else None
+        )
+        eam_precaution_code = (
+            precaution_response.get("PRECAUTIONCODE", precaution_code) if precaution_response else None
+        )
+        equipment_link_summary = {
+            "equipment_details_from_link": link_obj.equipment_details.model_dump(),
+            "linked_precaution_code_llm": precaution_code,
+            "parent_hazard_code_llm": link_obj.parent_hazard_code,
+            "eam_hazard_code_ref": eam_hazard_code,
+            "eam_precaution_code_ref": eam_precaution_code,
+        }
+
+        if safety_matrix_key(index) in results:
+            equipment_link_summary["eam_equipment_safety_link_creation_response"] = {
+                "status": "success",
+                "safety_matrix_result": results[safety_matrix_key(index)],
+                "hazard_ra_result": results.get(hazard_status_key(link_obj.parent_hazard_code, "RA")),
+                "hazard_approval_result": results.get(hazard_status_key(link_obj.parent_hazard_code, "A")),
+                "precaution_ra_result": results.get(precaution_status_key(precaution_code, "RA")),
+                "precaution_approval_result": results.get(precaution_status_key(precaution_code, "A")),
+            }
+            equipment_link_summary["eam_equipment_safety_link_creation_status"] = "ATTEMPTED"
+        else:
+            equipment_link_summary["eam_equipment_safety_link_creation_status"] = "SKIPPED - Missing EAM hazard/precaution code or hazard type."
+            equipment_link_summary["eam_equipment_safety_link_creation_response"] = {
+                "error": "Missing mapped EAM codes or hazard type for this link.",
+                "details": {
+                    "eam_hazard_code_found": bool(eam_hazard_code),
+                    "eam_precaution_code_found": bool(eam_precaution_code),
+                    "hazard_eam_type_code_found": _linked_hazard(analysis_output, link_obj) is not None
+                }
+            }
+        equipment_link_eam_summaries.append(equipment_link_summary)
+
+    # Consolidate EAM creation feedback
+    return {
+        "eam_processing_summary": {
+            "hazard_precaution_creation_log": eam_creation_summary,
+            "equipment_safety_link_processing_log": equipment_link_eam_summaries
+        }
+    }
+
+
+def _approval_steps(created_key: str, status_key, code: str):
+    # Each status update needs the created record and the previous status
+    depends_on = (created_key,)
+    for status_code in APPROVAL_STATUSES:
+        yield status_code, depends_on
+        depends_on = (created_key, status_key(code, status_code))
+
+
+def _linked_hazard(analysis_output: IncidentAnalysisOutput, link_obj) -> Optional[Hazard]:
+    for hazard_in_list in analysis_output.identified_hazards:
+        if hazard_in_list.hazard_code == link_obj.parent_hazard_code:
+            return hazard_in_list
+    return None
+
+
+def _equipment_details_for_eam(link_obj) -> dict:
+    if not link_obj.equipment_details:
+        return {}
+    dumped_details = link_obj.equipment_details.model_dump()
+    return {
+        "class_code": dumped_details.get("class_code"),
+        "category": dumped_details.get("category"),
+        "equipment_id": dumped_details.get("equipment_id")
+    }
@@ -6,16 +6,13 @@ import logging
 import os
 
 from django.core.files.uploadedfile import UploadedFile
-from langchain.chains.summarize import load_summarize_chain
 from langchain.prompts import (
     ChatPromptTemplate,
     HumanMessagePromptTemplate,
     SystemMessagePromptTemplate,
 )
-from langchain_community.document_loaders import UnstructuredPDFLoader
 from langchain_core.documents import Document
 from langchain_core.language_models import BaseChatModel
-from langchain_core.output_parsers import PydanticOutputParser
 
 from .schemas import (
     Hazard,
@@ -24,7 +21,11 @@ from .schemas import (
     PrecautionTimingChoices,
     IncidentAnalysisOutput
 )
+from twenty_one_tech_pocs.common.pdf_pool import load_pdf
+from twenty_one_tech_pocs.common.stages import EXTRACT_STAGE, PARSE_STAGE, stage
 from twenty_one_tech_pocs.common.eam_api import EAMApiService
+from twenty_one_tech_pocs.common.chunked_extraction import ChunkedExtractor, CodeRegistry, dedupe_by, normalize_key
+from twenty_one_tech_pocs.common.structured_output import StructuredExtractor, StructuredOutputError
 
 logger = logging.getLogger(__name__)
 
@@ -53,14 +54,15 @@ class SafetyProcedureAssistantService:
         try:
             file_path = self._save_temp_file(file)
             self.temp_file_path = file_path
-            loader = UnstructuredPDFLoader(file_path)
-            documents = loader.load()
+            with stage(PARSE_STAGE, assistant="safety_procedure_assistant"):
+                documents = load_pdf(file_path)
 
             if not documents:
                 logger.warning(f"No content extracted from {file.name}")
                 return None
 
-            analysis_output = self._extract_incident_analysis(llm, documents)
+            with stage(EXTRACT_STAGE, assistant="safety_procedure_assistant"):
+                analysis_output = self._extract_incident_analysis(llm, documents)
             
             if analysis_output:
                 logger.info(f"Successfully extracted incident analysis. Identified {len(analysis_output.identified_hazards)} hazards and {len(analysis_output.equipment_safety_links)} equipment links.")
@@ -178,25 +180,94 @@ Respond with ONLY the JSON object adhering to the schema described in the system
     ) -> Optional[IncidentAnalysisOutput]:
         logger.info(f"Starting incident analysis extraction from {len(documents)} document chunks.")
         extraction_prompt = self._create_extraction_prompt()
-        parser = PydanticOutputParser(pydantic_object=IncidentAnalysisOutput)
+        extractor = StructuredExtractor(IncidentAnalysisOutput, assistant="safety_procedure_assistant")
+        chunked_extractor = ChunkedExtractor(extractor, merge=self._merge_incident_analyses)
 
-        chain = load_summarize_chain(
-            llm, chain_type="stuff", verbose=True, prompt=extraction_prompt
-        )
         try:
-            response = chain.invoke({"input_documents": documents})
-            output_text = response.get("output_text", "")
-            if not output_text:
-                logger.warning("LLM returned empty output for incident analysis.")
-                return None
-            
-            parsed_response = parser.invoke(output_text)
+            chunks = chunked_extractor.split(llm, extraction_prompt, documents)
+            parsed_response = chunked_extractor.extract(
+                llm, extraction_prompt, chunks, prompt_name="incident_analysis_extraction"
+            )
             logger.info("Successfully parsed LLM response into IncidentAnalysisOutput.")
             return parsed_response
+        except StructuredOutputError as e:
+            logger.error(f"Failed to parse LLM response for incident analysis. Error: {str(e)}. Raw output: '{e.raw_output[:500]}...'")
+            return None
         except Exception as e:
-            logger.error(f"Failed to parse LLM response for incident analysis. Error: {str(e)}. Raw output: '{output_text[:500]}...'")
+            logger.error(f"Failed to extract incident analysis. Error: {str(e)}")
             return None
 
+    @staticmethod
+    def _merge_incident_analyses(analyses: List[IncidentAnalysisOutput]) -> IncidentAnalysisOutput:
+        """
+        Merges the per-chunk analyses.
+
+        A hazard with the description of an earlier one is combined with it, and a
+        precaution with the description of an earlier one is that precaution (EAM
+        creates each precaution code once). A different hazard or precaution that
+        reuses a code gets the code suffixed with its chunk number. The equipment
+        links of each chunk are re-pointed to the codes kept for that chunk's hazards
+        and precautions, then deduplicated.
+        """
+        hazard_registry = CodeRegistry()
+        precaution_registry = CodeRegistry()
+        hazards = []
+        links = []
+        for chunk_number, analysis in enumerate(analyses, start=1):
+            # The chunk's codes -> the kept codes; precautions by (hazard, precaution) code
+            hazard_codes = {}
+            precaution_codes = {}
+            for hazard in analysis.identified_hazards:
+                kept = hazard_registry.match(hazard.hazard_code, hazard.description)
+                if kept is None:
+                    kept = hazard.model_copy(update={"precautions": []})
+                    kept.hazard_code = hazard_registry.add(kept, hazard.hazard_code, hazard.description, chunk_number)
+                    hazards.append(kept)
+                hazard_key = normalize_key(hazard.hazard_code)
+                hazard_codes[hazard_key] = kept.hazard_code
+                for precaution in hazard.precautions:
+                    kept_precaution = precaution_registry.match(precaution.precaution_code, precaution.description)
+                    if kept_precaution is None:
+                        kept_precaution = precaution.model_copy()
+                        kept_precaution.precaution_code = precaution_registry.add(
+                            kept_precaution, precaution.precaution_code, precaution.description, chunk_number
+                        )
+                    if all(existing is not kept_precaution for existing in kept.precautions):
+                        kept.precautions.append(kept_precaution)
+                    precaution_key = normalize_key(precaution.precaution_code)
+                    precaution_codes[(hazard_key, precaution_key)] = kept_precaution.precaution_code
+                    precaution_codes.setdefault((None, precaution_key), kept_precaution.precaution_code)
+
+            for link in analysis.equipment_safety_links:
+                hazard_key = normalize_key(link.parent_hazard_code)
+                precaution_key = normalize_key(link.linked_precaution.precaution_code)
+                precaution_code = precaution_codes.get(
+                    (hazard_key, precaution_key),
+                    precaution_codes.get((None, precaution_key), link.linked_precaution.precaution_code),
+                )
+                links.append(
+                    link.model_copy(
+                        update={
+                            "parent_hazard_code": hazard_codes.get(hazard_key, link.parent_hazard_code),
+                            "linked_precaution": link.linked_precaution.model_copy(
+                                update={"precaution_code": precaution_code}
+                            ),
+                        }
+                    )
+                )
+        links = dedupe_by(
+            links,
+            lambda link: "|".join(
+                normalize_key(value)
+                for value in (
+                    link.equipment_details.equipment_id,
+                    link.linked_precaution.precaution_code,
+                    link.parent_hazard_code,
+                )
+            ),
+        )
+        return IncidentAnalysisOutput(identified_hazards=hazards, equipment_safety_links=links)
+
     def cleanup(self) -> None:
         if self.temp_file_path and os.path.exists(self.temp_file_path):
             try:
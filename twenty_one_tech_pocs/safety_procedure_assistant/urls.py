@@ -1,8 +1,11 @@
 from django.urls import path
 from .views import ProcessIncidentReportView
+from .pipeline import ASSISTANT
+from twenty_one_tech_pocs.document_processing.views import DocumentBatchView
 
 app_name = 'safety_procedure_assistant'
 
 urlpatterns = [
     path('process-incident-report/', ProcessIncidentReportView.as_view(), name='process_incident_report'),
-] 
\ No newline at end of file
+    path('process-incident-reports/batch/', DocumentBatchView.as_view(assistant=ASSISTANT), name='process_incident_reports_batch'),
+]
@@ -0,0 +1,65 @@
+from typing import List
+
+from django.core.files.uploadedfile import UploadedFile
+
+from .schemas import TaskPlan
+from .services import ServiceManualsAssistantService
+from twenty_one_tech_pocs.common import EAMApiService, LLMFactory
+from twenty_one_tech_pocs.common.eam_commit import TaskPlanCommitPipeline
+from twenty_one_tech_pocs.common.eam_writes import EAMWrite, WriteResults, task_plan_summaries, task_plan_writes
+from twenty_one_tech_pocs.common.llm_scheduler import BATCH_LANE
+from twenty_one_tech_pocs.document_processing.drafts import run_with_draft
+
+ASSISTANT = "service_manuals_assistant"
+
+
+def document_name(document_code: str) -> str:
+    """File name given to a document fetched from EAM (the attachment is always a PDF)."""
+    return f"{document_code}.pdf"
+
+
+def run_document_pipeline(document: UploadedFile, create_in_eam: bool = False, document_code: str = "") -> dict:
+    """
+    Extracts the task plans from a service manual and optionally creates them in EAM.
+
+    Shared by ProcessServiceManualDocumentView and the background document jobs. The
+    extraction is stored as a draft; resubmitting the same document reuses it.
+
+    Returns:
+        dict: extracted_data (a list of task plans) and draft, plus created_in_eam
+              when create_in_eam is set.
+    """
+    return run_with_draft(ASSISTANT, document, document_code, create_in_eam, extract_document)
+
+
+def extract_document(document: UploadedFile, create_in_eam: bool = False):
+    """Runs the extraction; with create_in_eam each task plan is created as soon as it has streamed in."""
+    llm = LLMFactory().get_configured_llm(lane=BATCH_LANE)
+    service = ServiceManualsAssistantService()
+    commit_pipeline = TaskPlanCommitPipeline(EAMApiService(), assistant=ASSISTANT) if create_in_eam else None
+    try:
+        extracted_task_plans = service.process_document(document, llm=llm, commit_pipeline=commit_pipeline)
+    except Exception:
+        if commit_pipeline:
+            commit_pipeline.abort()
+        raise
+    finally:
+        service.cleanup()
+
+    extraction = {"extracted_data": [task_plan.model_dump() for task_plan in extracted_task_plans]}
+    if commit_pipeline is None:
+        return extraction, None
+    return extraction, commit_pipeline.finish
+
+
+def plan_eam_writes(extraction: dict) -> List[EAMWrite]:
+    """The EAM writes of stored task plans: each task plan followed by its checklists."""
+    writes = []
+    for task_plan in extraction["extracted_data"]:
+        writes.extend(task_plan_writes(TaskPlan.model_validate(task_plan)))
+    return writes
+
+
+def summarize_eam_writes(extraction: dict, results: WriteResults) -> dict:
+    """The EAM part of the response: one summary per task plan."""
+    return {"created_in_eam": task_plan_summaries(extraction["extracted_data"], results)}
@@ -3,17 +3,19 @@ import os
 from typing import Optional, List
 
 from django.core.files.uploadedfile import UploadedFile
-from langchain.chains.summarize import load_summarize_chain
 from langchain.prompts import (
     ChatPromptTemplate,
     HumanMessagePromptTemplate,
     SystemMessagePromptTemplate,
 )
-from langchain_community.document_loaders import UnstructuredPDFLoader
 from langchain_core.documents import Document
 from langchain_core.language_models import BaseChatModel
-from langchain_core.output_parsers import PydanticOutputParser
 from langchain_openai import ChatOpenAI
+from twenty_one_tech_pocs.common.pdf_pool import load_pdf
+from twenty_one_tech_pocs.common.stages import EXTRACT_STAGE, PARSE_STAGE, stage
+from twenty_one_tech_pocs.common.eam_commit import TaskPlanCommitPipeline
+from twenty_one_tech_pocs.common.chunked_extraction import ChunkedExtractor, merge_task_plans
+from twenty_one_tech_pocs.common.structured_output import StructuredExtractor
 from ..schemas import TaskPlan, TaskPlanListContainer # Added TaskPlanListContainer
 
 logger = logging.getLogger(__name__)
@@ -28,7 +30,10 @@ class ServiceManualsAssistantService:
         os.makedirs(self.temp_dir, exist_ok=True)
 
     def process_document(
-        self, file: UploadedFile, llm: BaseChatModel
+        self,
+        file: UploadedFile,
+        llm: BaseChatModel,
+        commit_pipeline: Optional[TaskPlanCommitPipeline] = None,
     ) -> List[TaskPlan]: 
         """
         Process a service manual document using LangChain and generate structured output.
@@ -36,6 +41,8 @@ class ServiceManualsAssistantService:
         Args:
             file: The uploaded PDF file to process
             llm: The language model to use for processing
+            commit_pipeline: If given, the output is streamed and each task plan is queued
+                for creation in EAM as soon as it is complete
 
         Returns:
             List[TaskPlan]: A list of structured task plans extracted from document
@@ -51,13 +58,14 @@ class ServiceManualsAssistantService:
             file_path = self._save_temp_file(file)
             self.temp_file_path = file_path
 
-            loader = UnstructuredPDFLoader(file_path)
-            documents = loader.load()
+            with stage(PARSE_STAGE, assistant="service_manuals_assistant"):
+                documents = load_pdf(file_path)
 
             if not documents:
                 raise ValueError("No content could be extracted from the PDF")
 
-            processed_data_container = self._process_task_plan_data(llm, documents)
+            with stage(EXTRACT_STAGE, assistant="service_manuals_assistant"):
+                processed_data_container = self._process_task_plan_data(llm, documents, commit_pipeline)
             return processed_data_container.task_plans # Extract list from container
 
         except Exception as e:
@@ -161,37 +169,51 @@ For any missing required fields in the schema (task_code, description, checklist
 """
 
     def _process_task_plan_data(
-        self, llm: ChatOpenAI, documents: list[Document]
+        self,
+        llm: ChatOpenAI,
+        documents: list[Document],
+        commit_pipeline: Optional[TaskPlanCommitPipeline] = None,
     ) -> TaskPlanListContainer: # Changed return type to the container
         """
         Process the document chunks to extract task plan information.
         Args:
             llm: The language model to use for processing
             documents: The document chunks to process
+            commit_pipeline: Optional EAM commit stage fed while the output streams in
         Returns:
             TaskPlanListContainer: Container with structured task plan data
         """
         logger.info(f"Processing {len(documents)} document chunks")
         chat_prompt = self._create_task_plan_prompt()
-        parser = PydanticOutputParser(pydantic_object=TaskPlanListContainer) # Use the container model
-
-        summarize_chain = load_summarize_chain(
-            llm,
-            chain_type="stuff",
-            verbose=True,
-            prompt=chat_prompt,
+        extractor = StructuredExtractor(TaskPlanListContainer, assistant="service_manuals_assistant") # Use the container model
+        chunked_extractor = ChunkedExtractor(
+            extractor,
+            merge=lambda containers: TaskPlanListContainer(
+                task_plans=merge_task_plans(container.task_plans for container in containers)
+            ),
         )
 
         try:
-            response = summarize_chain.invoke({"input_documents": documents})
-            output_text = response["output_text"]
-            # Strip markdown JSON fences if present - keeping this as a safeguard
-            if output_text.startswith("```json\n"):
-                output_text = output_text[7:]
-            if output_text.endswith("\n```"):
-                output_text = output_text[:-4]
-            
-            parsed_response = parser.invoke(output_text)
+            # Markdown JSON fences are stripped by the extractor
+            chunks = chunked_extractor.split(llm, chat_prompt, documents)
+            if commit_pipeline is None or len(chunks) > 1:
+                parsed_response = chunked_extractor.extract(
+                    llm, chat_prompt, chunks, prompt_name="task_plan_extraction"
+                )
+                if commit_pipeline is not None:
+                    # Merged results are only final once every chunk is done
+                    for task_plan in parsed_response.task_plans:
+                        commit_pipeline.submit_task_plan(task_plan)
+            else:
+                parsed_response = extractor.extract_streaming(
+                    llm,
+                    chat_prompt,
+                    {"text": chunks[0]},
+                    prompt_name="task_plan_extraction",
+                    array_key="task_plans",
+                    item_schema=TaskPlan,
+                    on_item=lambda index, task_plan: commit_pipeline.submit_task_plan(task_plan),
+                )
             logger.info("Successfully extracted task plan data container")
             return parsed_response
         except Exception as e:
@@ -1,6 +1,9 @@
 from django.urls import path
 from .views import ProcessServiceManualDocumentView
+from .pipeline import ASSISTANT
+from twenty_one_tech_pocs.document_processing.views import DocumentBatchView
 
 urlpatterns = [
     path('process-document/', ProcessServiceManualDocumentView.as_view(), name='process-service-manual-document'),
-] 
\ No newline at end of file
+    path('process-documents/batch/', DocumentBatchView.as_view(assistant=ASSISTANT), name='process-service-manual-documents-batch'),
+]
@@ -8,9 +8,7 @@ import base64
 from django.core.files.base import ContentFile
 from typing import List # Added for type hinting
 
-from .schemas import TaskPlan # Changed from MaintenanceSchedule
-from .services import ServiceManualsAssistantService # Changed service
-from twenty_one_tech_pocs.common import EAMApiService, LLMFactory, ConfigManager
+from .pipeline import run_document_pipeline
 
 
 class ProcessServiceManualDocumentView(APIView): # Changed class name
@@ -89,60 +87,9 @@ class ProcessServiceManualDocumentView(APIView): # Changed class name
             document_name = f"{document_code}.pdf"
             document = ContentFile(file_bytes, name=document_name)
 
-            service = ServiceManualsAssistantService() # Changed service
-            eam_api = EAMApiService()
-            response_data = {}
-            llm_factory = LLMFactory()
-            config_manager = ConfigManager()
-
-            llm_params = config_manager.get_llm_config()
-
-            if not llm_params.get("name"):
-                return Response(
-                    {"error": "LLM_NAME not found in environment variables."},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                )
-
-            llm = llm_factory.get_llm(llm_name=llm_params.pop("name"), **llm_params)
-            try:
-                # Process the document to extract a list of task plans
-                extracted_task_plans: List[TaskPlan] = service.process_document(document, llm=llm)
-                # Serialize each TaskPlan object in the list
-                response_data["extracted_data"] = [tp.model_dump() for tp in extracted_task_plans]
-
-                if create_in_eam:
-                    created_tasks_summary = []
-                    # Iterate through each task plan in the extracted data
-                    for task_plan_obj in extracted_task_plans:
-                        # Create the task plan in EAM
-                        task_response = eam_api.create_task_plan(task_plan_obj)
-                        task_info = {
-                            "task_code": task_plan_obj.task_code,
-                            "description": task_plan_obj.description,
-                            "api_response": task_response,
-                            "checklists": [],
-                        }
-
-                        # Create each checklist for this task plan
-                        for i, checklist_item in enumerate(task_plan_obj.checklist):
-                            checklist_response = eam_api.create_checklist(
-                                task_plan_obj.task_code,
-                                checklist_item,
-                                sequence=(i + 1) * 10,
-                            )
-                            task_info["checklists"].append(
-                                {
-                                    "checklist_id": checklist_item.checklist_id,
-                                    "description": checklist_item.description,
-                                    "api_response": checklist_response,
-                                }
-                            )
-                        created_tasks_summary.append(task_info)
-                    response_data["created_in_eam"] = created_tasks_summary
-
-                return Response(response_data, status=status.HTTP_200_OK)
-            finally:
-                service.cleanup()
+            # Parsing, LLM extraction and the optional EAM creation are shared with the background jobs
+            response_data = run_document_pipeline(document, create_in_eam=create_in_eam, document_code=document_code)
+            return Response(response_data, status=status.HTTP_200_OK)
 
         except Exception as e:
             return Response(
@@ -0,0 +1,107 @@
+from typing import List, Optional
+
+from django.core.files.uploadedfile import UploadedFile
+
+from .schemas import TrainingManualQualificationExtraction
+from .services import TrainingManualsAssistantService
+from twenty_one_tech_pocs.common import LLMFactory
+from twenty_one_tech_pocs.common.eam_writes import EAMWrite, WriteResults, qualification_key
+from twenty_one_tech_pocs.common.llm_scheduler import BATCH_LANE
+from twenty_one_tech_pocs.document_processing.drafts import run_with_draft
+
+ASSISTANT = "training_manuals_assistant"
+
+
+def document_name(document_code: str) -> str:
+    """File name given to a training manual fetched from EAM."""
+    return f"{document_code}_training_manual.pdf"
+
+
+def run_document_pipeline(document: UploadedFile, create_in_eam: bool = False, document_code: str = "") -> dict:
+    """
+    Extracts the qualification requirements from a training manual and optionally
+    creates the qualifications in EAM.
+
+    Shared by ProcessTrainingManualView and the background document jobs. The
+    extraction is stored as a draft; resubmitting the same manual reuses it.
+
+    Returns:
+        dict: qualification_extraction, summary and draft, plus qualification_summary_for_eam
+              and eam_creation_summary when create_in_eam is set.
+
+    Raises:
+        ValueError: If no qualifications could be extracted.
+    """
+    return run_with_draft(ASSISTANT, document, document_code, create_in_eam, extract_document)
+
+
+def extract_document(document: UploadedFile, create_in_eam: bool = False):
+    """Runs the extraction; the qualifications are created afterwards from the stored draft."""
+    llm = LLMFactory().get_configured_llm(lane=BATCH_LANE)
+    training_service = TrainingManualsAssistantService()
+    try:
+        # Process the training manual to extract qualification requirements
+        qualification_extraction: Optional[TrainingManualQualificationExtraction] = training_service.process_document(
+            file=document, llm=llm
+        )
+    finally:
+        training_service.cleanup()
+    if not qualification_extraction:
+        raise ValueError(
+            "Failed to extract qualifications from training manual or no qualification data found."
+        )
+
+    extraction = {"qualification_extraction": qualification_extraction.model_dump()}
+    # Add summary statistics
+    extraction["summary"] = {
+        "total_qualifications": len(qualification_extraction.qualifications),
+        "qualification_codes": [q.qualification_code for q in qualification_extraction.qualifications],
+    }
+    return extraction, None
+
+
+def plan_eam_writes(extraction: dict) -> List[EAMWrite]:
+    """The EAM writes of a stored extraction: one qualification creation each."""
+    qualification_extraction = TrainingManualQualificationExtraction.model_validate(
+        extraction["qualification_extraction"]
+    )
+    return [
+        EAMWrite(
+            key=qualification_key(qualification.qualification_code),
+            operation="create_qualification",
+            payload={
+                "qualification_code": qualification.qualification_code,
+                "qualification_description": qualification.qualification_description,
+            },
+        )
+        for qualification in qualification_extraction.qualifications
+    ]
+
+
+def summarize_eam_writes(extraction: dict, results: WriteResults) -> dict:
+    """The EAM part of the response: the qualification summary and the creation counts."""
+    qualifications = extraction["qualification_extraction"]["qualifications"]
+    qualification_summary = []
+    eam_creation_results = []
+
+    for qualification in qualifications:
+        eam_result = results.get(qualification_key(qualification["qualification_code"])) or {}
+        eam_creation_results.append(eam_result)
+
+        qualification_summary_item = {
+            "qualification_code": qualification["qualification_code"],
+            "qualification_description": qualification["qualification_description"],
+            "eam_integration_status": eam_result.get("status", "unknown"),
+            "eam_creation_result": eam_result
+        }
+        qualification_summary.append(qualification_summary_item)
+
+    return {
+        "qualification_summary_for_eam": qualification_summary,
+        "eam_creation_summary": {
+            "total_qualifications_processed": len(qualifications),
+            "successful_creations": len([r for r in eam_creation_results if r.get("status") == "success"]),
+            "failed_creations": len([r for r in eam_creation_results if r.get("status") == "failed"]),
+            "creation_results": eam_creation_results
+        },
+    }
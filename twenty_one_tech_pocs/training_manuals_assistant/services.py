@@ -3,16 +3,18 @@ import os
 from typing import Optional, List
 
 from django.core.files.uploadedfile import UploadedFile
-from langchain.chains.summarize import load_summarize_chain
 from langchain.prompts import (
     ChatPromptTemplate,
     HumanMessagePromptTemplate,
     SystemMessagePromptTemplate,
 )
-from langchain_community.document_loaders import UnstructuredPDFLoader
 from langchain_core.documents import Document
 from langchain_core.language_models import BaseChatModel
-from langchain_core.output_parsers import PydanticOutputParser
+
+from twenty_one_tech_pocs.common.pdf_pool import load_pdf
+from twenty_one_tech_pocs.common.stages import EXTRACT_STAGE, PARSE_STAGE, stage
+from twenty_one_tech_pocs.common.chunked_extraction import ChunkedExtractor, CodeRegistry
+from twenty_one_tech_pocs.common.structured_output import StructuredExtractor, StructuredOutputError
 
 from .schemas import (
     TrainingManualQualificationExtraction,
@@ -47,14 +49,15 @@ class TrainingManualsAssistantService:
         try:
             file_path = self._save_temp_file(file)
             self.temp_file_path = file_path
-            loader = UnstructuredPDFLoader(file_path)
-            documents = loader.load()
+            with stage(PARSE_STAGE, assistant="training_manuals_assistant"):
+                documents = load_pdf(file_path)
 
             if not documents:
                 logger.warning(f"No content extracted from {file.name}")
                 return None
 
-            qualification_extraction = self._extract_qualifications(llm, documents)
+            with stage(EXTRACT_STAGE, assistant="training_manuals_assistant"):
+                qualification_extraction = self._extract_qualifications(llm, documents)
             
             if qualification_extraction:
                 logger.info(f"Successfully extracted {len(qualification_extraction.qualifications)} qualifications from training manual.")
@@ -201,25 +204,46 @@ Respond with ONLY the JSON object following the schema provided in the system pr
     ) -> Optional[TrainingManualQualificationExtraction]:
         logger.info(f"Starting qualification extraction from {len(documents)} document chunks.")
         extraction_prompt = self._create_extraction_prompt()
-        parser = PydanticOutputParser(pydantic_object=TrainingManualQualificationExtraction)
+        extractor = StructuredExtractor(TrainingManualQualificationExtraction, assistant="training_manuals_assistant")
+        chunked_extractor = ChunkedExtractor(extractor, merge=self._merge_qualifications)
 
-        chain = load_summarize_chain(
-            llm, chain_type="stuff", verbose=True, prompt=extraction_prompt
-        )
         try:
-            response = chain.invoke({"input_documents": documents})
-            output_text = response.get("output_text", "")
-            if not output_text:
-                logger.warning("LLM returned empty output for qualification extraction.")
-                return None
-            
-            parsed_response = parser.invoke(output_text)
+            chunks = chunked_extractor.split(llm, extraction_prompt, documents)
+            parsed_response = chunked_extractor.extract(
+                llm, extraction_prompt, chunks, prompt_name="qualification_extraction"
+            )
             logger.info("Successfully parsed LLM response into TrainingManualQualificationExtraction.")
             return parsed_response
+        except StructuredOutputError as e:
+            logger.error(f"Failed to parse LLM response for qualification extraction. Error: {str(e)}. Raw output: '{e.raw_output[:500]}...'")
+            return None
         except Exception as e:
-            logger.error(f"Failed to parse LLM response for qualification extraction. Error: {str(e)}. Raw output: '{output_text[:500]}...'")
+            logger.error(f"Failed to extract qualifications. Error: {str(e)}")
             return None
 
+    @staticmethod
+    def _merge_qualifications(
+        extractions: List[TrainingManualQualificationExtraction],
+    ) -> TrainingManualQualificationExtraction:
+        """
+        Merges the per-chunk qualifications.
+
+        A qualification with the description of an earlier one is dropped; a
+        different qualification that reuses a code gets the code suffixed with its
+        chunk number.
+        """
+        registry = CodeRegistry()
+        qualifications = []
+        for chunk_number, extraction in enumerate(extractions, start=1):
+            for qualification in extraction.qualifications:
+                code, description = qualification.qualification_code, qualification.qualification_description
+                if registry.match(code, description) is not None:
+                    continue
+                qualification = qualification.model_copy()
+                qualification.qualification_code = registry.add(qualification, code, description, chunk_number)
+                qualifications.append(qualification)
+        return TrainingManualQualificationExtraction(qualifications=qualifications)
+
     def cleanup(self) -> None:
         if self.temp_file_path and os.path.exists(self.temp_file_path):
             try:
@@ -1,8 +1,11 @@
 from django.urls import path
 from .views import ProcessTrainingManualView
+from .pipeline import ASSISTANT
+from twenty_one_tech_pocs.document_processing.views import DocumentBatchView
 
 app_name = 'training_manuals_assistant'
 
 urlpatterns = [
     path('process-training-manual/', ProcessTrainingManualView.as_view(), name='process_training_manual'),
-] 
\ No newline at end of file
+    path('process-training-manuals/batch/', DocumentBatchView.as_view(assistant=ASSISTANT), name='process_training_manuals_batch'),
+]
@@ -9,10 +9,7 @@ import requests
 import base64
 from typing import Optional
 
-from .schemas import TrainingManualQualificationExtraction
-from .services import TrainingManualsAssistantService
-from twenty_one_tech_pocs.common import LLMFactory, ConfigManager
-from twenty_one_tech_pocs.common.eam_api import EAMApiService
+from .pipeline import run_document_pipeline
 
 class ProcessTrainingManualView(APIView):
     def __init__(self):
@@ -93,85 +90,19 @@ class ProcessTrainingManualView(APIView):
             if not processed_file_for_service:
                 return Response({"error": "Failed to prepare document for processing."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-            # Initialize services
-            training_service = TrainingManualsAssistantService()
-            llm_factory = LLMFactory()
-            config_manager = ConfigManager()
-
-            # Get LLM configuration
-            llm_params = config_manager.get_llm_config()
-            if not llm_params.get("name"):
-                return Response({"error": "LLM_NAME not found in environment variables."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-            
-            llm = llm_factory.get_llm(llm_name=llm_params.pop("name"), **llm_params)
-
-            response_data = {}
             try:
-                # Process the training manual to extract qualification requirements
-                qualification_extraction: Optional[TrainingManualQualificationExtraction] = training_service.process_document(
-                    file=processed_file_for_service, llm=llm
+                # Parsing, LLM extraction and the optional EAM creation are shared with the background jobs
+                response_data = run_document_pipeline(
+                    processed_file_for_service,
+                    create_in_eam=create_qualifications_in_eam,
+                    document_code=document_code or "",
                 )
-
-                if not qualification_extraction:
-                    return Response({"error": "Failed to extract qualifications from training manual or no qualification data found."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-                response_data["qualification_extraction"] = qualification_extraction.model_dump()
-
-                # Add summary statistics
-                response_data["summary"] = {
-                    "total_qualifications": len(qualification_extraction.qualifications),
-                    "qualification_codes": [q.qualification_code for q in qualification_extraction.qualifications],
-                }
-
-                # Future enhancement: EAM integration for creating qualification records
-                if create_qualifications_in_eam:
-                    # Initialize EAM API service
-                    eam_service = EAMApiService()
-                    
-                    qualification_summary = []
-                    eam_creation_results = []
-                    
-                    for qualification in qualification_extraction.qualifications:
-                        # Create qualification in EAM
-                        qualification_data = {
-                            "qualification_code": qualification.qualification_code,
-                            "qualification_description": qualification.qualification_description
-                        }
-                        
-                        eam_result = eam_service.create_qualification(
-                            qualification_data=qualification_data,
-                            organization_code="*",
-                            class_code="*"
-                        )
-                        
-                        eam_creation_results.append(eam_result)
-                        
-                        qualification_summary_item = {
-                            "qualification_code": qualification.qualification_code,
-                            "qualification_description": qualification.qualification_description,
-                            "eam_integration_status": eam_result.get("status", "unknown"),
-                            "eam_creation_result": eam_result
-                        }
-                        qualification_summary.append(qualification_summary_item)
-                    
-                    response_data["qualification_summary_for_eam"] = qualification_summary
-                    response_data["eam_creation_summary"] = {
-                        "total_qualifications_processed": len(qualification_extraction.qualifications),
-                        "successful_creations": len([r for r in eam_creation_results if r.get("status") == "success"]),
-                        "failed_creations": len([r for r in eam_creation_results if r.get("status") == "failed"]),
-                        "creation_results": eam_creation_results
-                    }
-
                 return Response(response_data, status=status.HTTP_200_OK)
             
             except Exception as e:
                 import traceback
                 print(f"Error during service processing: {traceback.format_exc()}")
                 return Response({"error": f"An error occurred during processing: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-            
-            finally:
-                if 'training_service' in locals() and hasattr(training_service, 'cleanup'):
-                    training_service.cleanup()
 
         except Exception as e:
             import traceback
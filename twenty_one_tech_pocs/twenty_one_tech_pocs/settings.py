@@ -48,6 +48,8 @@ INSTALLED_APPS = [
     'twenty_one_tech_pocs.service_manuals_assistant',
     'twenty_one_tech_pocs.safety_procedure_assistant',
     'twenty_one_tech_pocs.training_manuals_assistant',
+    'twenty_one_tech_pocs.document_processing',
+    'twenty_one_tech_pocs.equipment_entry_app',
 ]
 
 MIDDLEWARE = [
@@ -59,6 +61,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'twenty_one_tech_pocs.common.middleware.LLMCallContextMiddleware',
 ]
 
 ROOT_URLCONF = 'twenty_one_tech_pocs.twenty_one_tech_pocs.urls'
@@ -102,6 +105,8 @@ else:
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            # Document job workers write from several threads; wait for the lock instead of failing
+            'OPTIONS': {'timeout': 20},
         }
     }
 
@@ -24,4 +24,7 @@ urlpatterns = [
     path('api/service-manuals/', include('twenty_one_tech_pocs.service_manuals_assistant.urls')),
     path('api/safety-procedures/', include('twenty_one_tech_pocs.safety_procedure_assistant.urls')),
     path('api/training-manuals/', include('twenty_one_tech_pocs.training_manuals_assistant.urls')),
+    path('api/document-jobs/', include('twenty_one_tech_pocs.document_processing.urls')),
+    path('api/extraction-drafts/', include('twenty_one_tech_pocs.document_processing.draft_urls')),
+    path('api/metrics/', include('twenty_one_tech_pocs.common.urls')),
 ]